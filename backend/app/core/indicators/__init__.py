@@ -9,6 +9,9 @@ from app.core.indicators.volatility import BollingerBandsIndicator, ATRIndicator
 from app.core.indicators.volume import OBVIndicator, VolumeROCIndicator
 from app.core.indicators.levels import FibonacciIndicator, SupportResistanceIndicator
 from app.core.indicators.adx import ADXIndicator
+from app.core.indicators.incremental import (
+    IncrementalSMA, IncrementalEMA, IncrementalBB, IncrementalATR, IncrementalRSI, IncrementalMACD
+)
 
 __all__ = [
     'Indicator',
@@ -26,5 +29,11 @@ __all__ = [
     'VolumeROCIndicator',
     'FibonacciIndicator',
     'SupportResistanceIndicator',
-    'ADXIndicator'
+    'ADXIndicator',
+    'IncrementalSMA',
+    'IncrementalEMA',
+    'IncrementalBB',
+    'IncrementalATR',
+    'IncrementalRSI',
+    'IncrementalMACD'
 ]
\ No newline at end of file
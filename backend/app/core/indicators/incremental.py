@@ -0,0 +1,275 @@
+"""
+Incremental indicators for strategies evaluated bar by bar.
+
+The full indicator classes recompute every series over the whole frame on
+each call. Strategies that only read the latest values can use these
+instead: window indicators reduce just their trailing window, so the cost
+per bar no longer grows with history, and the EMA and MACD carry their
+recursions forward across calls when the frame has only been extended.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.utils.jit import njit
+
+
+@njit(cache=True, nogil=True)
+def _ema_fold(values, alpha, weighted, old_wt):
+    """
+    Fold values into a running adjust=False EWM, returning the updated
+    (weighted, old_wt) pair. Mirrors pandas' ewm recursion, including its
+    handling of missing values, so results match Series.ewm().mean().
+    """
+    old_wt_factor = 1.0 - alpha
+    for i in range(values.shape[0]):
+        cur = values[i]
+        observed = cur == cur
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if observed:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif observed:
+            weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True, nogil=True)
+def _macd_fold(values, alphas, state):
+    """
+    Fold values into running fast, slow and signal EWMs. state holds the
+    (weighted, old_wt) pair of each, in that order, and is updated in place.
+    """
+    for i in range(values.shape[0]):
+        state[0], state[1] = _ema_fold(values[i:i + 1], alphas[0], state[0], state[1])
+        state[2], state[3] = _ema_fold(values[i:i + 1], alphas[1], state[2], state[3])
+        macd = np.full(1, state[0] - state[2])
+        state[4], state[5] = _ema_fold(macd, alphas[2], state[4], state[5])
+
+
+@njit(cache=True, nogil=True)
+def _macd_series(values, alphas):
+    """MACD line and signal line at every bar, folded one bar at a time"""
+    state = np.array([np.nan, 1.0, np.nan, 1.0, np.nan, 1.0])
+    macd = np.empty(values.shape[0])
+    signal = np.empty(values.shape[0])
+    for i in range(values.shape[0]):
+        _macd_fold(values[i:i + 1], alphas, state)
+        macd[i] = state[0] - state[2]
+        signal[i] = state[4]
+    return macd, signal
+
+
+def rolling_reduce(values: np.ndarray, period: int, reduce: Callable, **kwargs) -> np.ndarray:
+    """
+    reduce applied to each trailing window of period values, NaN where the
+    window is incomplete; matches reducing the tail slice bar by bar.
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = reduce(sliding_window_view(values, period), axis=1, **kwargs)
+    return out
+
+
+class IncrementalSMA:
+    """Simple moving average of the last bar"""
+    
+    def __init__(self, period: int):
+        self.period = period
+    
+    def last(self, values: np.ndarray) -> float:
+        """SMA at the last bar, NaN until a full window is available"""
+        if len(values) < self.period:
+            return np.nan
+        return values[-self.period:].mean()
+
+
+class IncrementalBB:
+    """Bollinger Bands of the last two bars"""
+    
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+    
+    def last(self, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (upper, middle, lower) bands, each holding [previous bar, last bar].
+        Bars without a full window are NaN.
+        """
+        period = self.period
+        middle = np.full(2, np.nan)
+        std = np.full(2, np.nan)
+        for offset in (0, 1):
+            end = len(closes) - 1 + offset
+            if end >= period:
+                window = closes[end - period:end]
+                middle[offset] = window.mean()
+                std[offset] = window.std(ddof=1)
+        return middle + self.std_dev * std, middle, middle - self.std_dev * std
+
+
+class IncrementalRSI:
+    """Relative Strength Index (simple mean of gains and losses) of the last two bars"""
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+    
+    def last(self, closes: np.ndarray) -> np.ndarray:
+        """
+        RSI at [previous bar, last bar]. Like the full indicator, bars without
+        a full window or without any movement read a neutral 50.
+        """
+        period = self.period
+        tail = closes[-period - 2:]
+        delta = np.diff(tail)
+        if len(tail) < period + 2:
+            # The first bar has no change and counts as flat
+            delta = np.concatenate(([0.0], delta))
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta < 0, -delta, 0.0)
+        
+        rsi = np.full(2, 50.0)
+        for offset in (0, 1):
+            end = len(delta) - 1 + offset
+            if end >= period:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    value = 100 - 100 / (1 + gains[end - period:end].mean() / losses[end - period:end].mean())
+                if not np.isnan(value):
+                    rsi[offset] = value
+        return rsi
+    
+    def series(self, closes: np.ndarray) -> np.ndarray:
+        """RSI at every bar, as last() reports it for each prefix"""
+        delta = np.concatenate(([0.0], np.diff(closes)))
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta < 0, -delta, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + rolling_reduce(gains, self.period, np.mean) /
+                               rolling_reduce(losses, self.period, np.mean))
+        return np.where(np.isnan(rsi), 50.0, rsi)
+
+
+class IncrementalATR:
+    """Average True Range (simple mean of true range) of the last bar"""
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+    
+    def last(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> float:
+        """ATR at the last bar, NaN until a full window is available"""
+        period = self.period
+        n = len(closes)
+        if n < period:
+            return np.nan
+        high = highs[-period:]
+        low = lows[-period:]
+        if n > period:
+            prev_close = closes[-period - 1:-1]
+        else:
+            # The first bar has no previous close
+            prev_close = np.concatenate(([np.nan], closes[:-1]))
+        # fmax skips the missing previous close like the full indicator does
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        return true_range.mean()
+
+
+class IncrementalEMA:
+    """
+    Exponential moving average (adjust=False) of the last bar, kept per key.
+    The average through the bar before last is carried across calls: when a
+    frame extends the one last seen for its key only the new bars are folded
+    in, and any other change rebuilds it from the whole frame. The last bar is
+    always applied fresh, so a still-forming candle may change between calls.
+    """
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1.0)
+        # key -> (first timestamp, last folded timestamp, bars folded, weighted, old_wt)
+        self._states: Dict[str, Tuple[pd.Timestamp, pd.Timestamp, int, float, float]] = {}
+    
+    def update(self, key: str, index: pd.Index, values: np.ndarray) -> float:
+        """EMA at the last bar of values, whose timestamps are index"""
+        settled = len(values) - 1
+        if settled < 0:
+            return np.nan
+        
+        state = self._states.get(key)
+        if (state is not None and settled >= state[2] and
+                index[0] == state[0] and index[state[2] - 1] == state[1]):
+            _, _, seen, weighted, old_wt = state
+        else:
+            seen, weighted, old_wt = 0, np.nan, 1.0
+        
+        if settled > seen:
+            weighted, old_wt = _ema_fold(values[seen:settled], self.alpha, weighted, old_wt)
+            self._states[key] = (index[0], index[settled - 1], settled, weighted, old_wt)
+        
+        return _ema_fold(values[settled:], self.alpha, weighted, old_wt)[0]
+    
+    def reset(self, key: Optional[str] = None):
+        """Drop the state for key, or for every key"""
+        if key is None:
+            self._states.clear()
+        else:
+            self._states.pop(key, None)
+
+
+class IncrementalMACD:
+    """
+    MACD line, signal line and histogram of the last two bars, kept per key.
+    The three averages are carried across calls the same way IncrementalEMA
+    carries its own.
+    """
+    
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.alphas = np.array([2.0 / (fast + 1.0), 2.0 / (slow + 1.0), 2.0 / (signal + 1.0)])
+        # key -> (first timestamp, last folded timestamp, bars folded, fold state)
+        self._states: Dict[str, Tuple[pd.Timestamp, pd.Timestamp, int, np.ndarray]] = {}
+    
+    def update(self, key: str, index: pd.Index, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (macd, signal, histogram) for values, whose timestamps are index, each
+        holding [previous bar, last bar]
+        """
+        macd = np.full(2, np.nan)
+        signal = np.full(2, np.nan)
+        settled = len(values) - 1
+        if settled < 0:
+            return macd, signal, macd - signal
+        
+        state = self._states.get(key)
+        if (state is not None and settled >= state[2] and
+                index[0] == state[0] and index[state[2] - 1] == state[1]):
+            seen, folded = state[2], state[3]
+        else:
+            seen, folded = 0, np.array([np.nan, 1.0, np.nan, 1.0, np.nan, 1.0])
+        
+        if settled > seen:
+            folded = folded.copy()
+            _macd_fold(values[seen:settled], self.alphas, folded)
+            self._states[key] = (index[0], index[settled - 1], settled, folded)
+        
+        last = folded.copy()
+        _macd_fold(values[settled:], self.alphas, last)
+        for offset, fold in enumerate((folded, last)):
+            macd[offset] = fold[0] - fold[2]
+            signal[offset] = fold[4]
+        return macd, signal, macd - signal
+    
+    def series(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(macd, signal, histogram) at every bar, as update() reports them"""
+        macd, signal = _macd_series(values, self.alphas)
+        return macd, signal, macd - signal
+    
+    def reset(self, key: Optional[str] = None):
+        """Drop the state for key, or for every key"""
+        if key is None:
+            self._states.clear()
+        else:
+            self._states.pop(key, None)
@@ -266,6 +266,7 @@ class AdaptiveMultiStrategyBot(MultiStrategyBot):
             # Get current positions
             positions = await self.exchange.get_positions()
             self.portfolio.positions = positions
+            self.portfolio.invalidate_exposure()
             
             # Get current balance
             balance = await self.exchange.get_balance()
@@ -2,11 +2,17 @@
 Base classes and interfaces for the Analytical Punch trading bot system.
 """
 
+import itertools
+import math
+import os
+import sys
+import time
 import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, Union
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from enum import Enum
 import pandas as pd
 import numpy as np
@@ -14,6 +20,28 @@ import numpy as np
 from app.services.bot_persistence import bot_persistence
 
 
+# Naive UTC epoch used to convert nanosecond timestamps to datetimes
+_EPOCH = datetime(1970, 1, 1)
+
+
+# Portfolios up to this many positions aggregate in plain Python
+_SMALL_PORTFOLIO = 8
+
+# Initial capacity of a portfolio's closed-trade arrays
+_TRADE_BUFFER = 256
+
+
+@lru_cache(maxsize=512)
+def base_asset(symbol: str) -> str:
+    """Base asset of a trading pair ('BTC/USDT' -> 'BTC'), interned"""
+    return sys.intern(symbol.partition('/')[0])
+
+
+def datetime_to_ns(value: datetime) -> int:
+    """Naive UTC datetime as integer nanoseconds since epoch"""
+    return (value - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
 class OrderType(Enum):
     """Order types"""
     MARKET = "market"
@@ -52,7 +80,7 @@ class RiskLevel(Enum):
     AGGRESSIVE = "aggressive"
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """Represents a trading position"""
     symbol: str
@@ -65,6 +93,7 @@ class Position:
     realized_pnl: float = 0.0
     stop_loss: Optional[float] = None
     take_profit: Optional[float] = None
+    cost_basis: float = 0.0  # Running sum of size * entry for averaging
     
     @property
     def market_value(self) -> float:
@@ -80,7 +109,7 @@ class Position:
             return ((self.entry_price - self.current_price) / self.entry_price) * 100
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     """Represents a trading order"""
     id: str
@@ -94,9 +123,18 @@ class Order:
     filled_amount: float = 0.0
     filled_price: Optional[float] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
-    updated_at: datetime = field(default_factory=datetime.utcnow)
+    updated_ns: int = field(default_factory=time.time_ns)  # Last update, ns since epoch
     commission: float = 0.0
     
+    @property
+    def updated_at(self) -> datetime:
+        """Last update time as a naive UTC datetime"""
+        return _EPOCH + timedelta(microseconds=self.updated_ns // 1000)
+    
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        self.updated_ns = datetime_to_ns(value)
+    
     @property
     def remaining_amount(self) -> float:
         """Remaining amount to be filled"""
@@ -113,7 +151,7 @@ class Order:
         return self.status in [OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Represents a completed trade"""
     id: str
@@ -162,6 +200,26 @@ class Signal:
         return self.confidence >= 0.7
 
 
+@dataclass(slots=True)
+class SignalArrays:
+    """
+    Signals of one symbol over many bars as parallel arrays, for backtests
+    that have no use for a Signal object per entry. directions holds +1 for
+    buy and -1 for sell; conditions is a strategy-specific bitmask.
+    """
+    timestamps: np.ndarray
+    directions: np.ndarray
+    confidences: np.ndarray
+    prices: np.ndarray
+    stop_losses: np.ndarray
+    take_profits: np.ndarray
+    risk_reward_ratios: np.ndarray
+    conditions: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.directions)
+
+
 @dataclass
 class Portfolio:
     """Portfolio state"""
@@ -172,6 +230,123 @@ class Portfolio:
     total_value: float = 0.0
     unrealized_pnl: float = 0.0
     realized_pnl: float = 0.0
+    peak_value: float = 0.0  # Highest total_value seen by update_portfolio_value
+    max_drawdown: float = 0.0  # Largest fractional drop from peak_value
+    
+    # Market value aggregates (total, sum of squares, value and position
+    # count by base asset), kept with the positions they were built from
+    _exposure: Optional[Tuple[float, float, Dict[str, float], Dict[str, int]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _exposure_key: Optional[Tuple[int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _largest_position: float = field(default=0.0, init=False, repr=False, compare=False)
+    
+    # Closed-trade PnL and entry/exit times (ns since epoch) as parallel
+    # arrays, appended from ``trades`` as it grows
+    _trade_pnl: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _trade_entry_ns: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _trade_exit_ns: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _trade_count: int = field(default=0, init=False, repr=False, compare=False)
+    _trade_key: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    
+    def exposure(self) -> Tuple[float, float, Dict[str, float], Dict[str, int]]:
+        """
+        Total market value, sum of squared market values, and market value
+        and position count by base asset. Refreshed by
+        ``update_portfolio_value``, ``set_position`` and ``remove_position``,
+        and rebuilt here when invalidated or when the positions dict is
+        replaced or changes size. Code that edits positions any other way,
+        e.g. a Position's size or price in place, must call
+        ``invalidate_exposure`` (or ``update_portfolio_value``) before the
+        next risk check.
+        """
+        if self._exposure is None or self._exposure_key != (id(self.positions), len(self.positions)):
+            self._refresh_exposure()
+        return self._exposure
+    
+    def invalidate_exposure(self):
+        """Drop the cached aggregates so the next ``exposure()`` rebuilds them"""
+        self._exposure = None
+    
+    def set_position(self, position: Position):
+        """Add or replace the position for its symbol"""
+        self.positions[position.symbol] = position
+        self._exposure = None
+    
+    def remove_position(self, symbol: str) -> Optional[Position]:
+        """Remove and return the position for symbol, if any"""
+        position = self.positions.pop(symbol, None)
+        self._exposure = None
+        return position
+    
+    def _refresh_exposure(self):
+        """Rebuild the market value aggregates from the current positions"""
+        positions = list(self.positions.values())
+        values = [position.market_value for position in positions]
+        
+        if len(values) > _SMALL_PORTFOLIO:
+            array = np.asarray(values, dtype=np.float64)
+            total = float(array.sum())
+            sum_sq = float(np.square(array).sum())
+            largest = float(array.max())
+        else:
+            total = math.fsum(values)
+            sum_sq = math.fsum(value * value for value in values)
+            largest = max(values, default=0.0)
+        
+        by_base: Dict[str, float] = {}
+        count_by_base: Dict[str, int] = {}
+        for position, value in zip(positions, values):
+            base = base_asset(position.symbol)
+            by_base[base] = by_base.get(base, 0.0) + value
+            count_by_base[base] = count_by_base.get(base, 0) + 1
+        
+        self._exposure = (total, sum_sq, by_base, count_by_base)
+        self._exposure_key = (id(self.positions), len(self.positions))
+        self._largest_position = largest
+    
+    def largest_position_value(self) -> float:
+        """Market value of the largest position, kept with ``exposure()``"""
+        self.exposure()
+        return self._largest_position
+    
+    def trade_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        PnL, entry and exit time (ns since epoch) of closed trades, oldest
+        first. Only trades added since the last call are converted; the
+        arrays are rebuilt if ``trades`` is replaced or shrinks.
+        """
+        trades = self.trades
+        count = len(trades)
+        
+        if self._trade_key != id(trades) or self._trade_count > count:
+            self._trade_key = id(trades)
+            self._trade_count = 0
+        
+        start = self._trade_count
+        if start < count:
+            if self._trade_pnl is None or len(self._trade_pnl) < count:
+                capacity = max(_TRADE_BUFFER, 2 * count)
+                pnl = np.empty(capacity, dtype=np.float64)
+                entry_ns = np.empty(capacity, dtype=np.int64)
+                exit_ns = np.empty(capacity, dtype=np.int64)
+                if start:
+                    pnl[:start] = self._trade_pnl[:start]
+                    entry_ns[:start] = self._trade_entry_ns[:start]
+                    exit_ns[:start] = self._trade_exit_ns[:start]
+                self._trade_pnl, self._trade_entry_ns, self._trade_exit_ns = pnl, entry_ns, exit_ns
+            
+            new_trades = trades[start:count]
+            self._trade_pnl[start:count] = [trade.pnl for trade in new_trades]
+            self._trade_entry_ns[start:count] = [datetime_to_ns(trade.entry_time) for trade in new_trades]
+            self._trade_exit_ns[start:count] = [datetime_to_ns(trade.exit_time) for trade in new_trades]
+            self._trade_count = count
+        
+        if self._trade_pnl is None:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return self._trade_pnl[:count], self._trade_entry_ns[:count], self._trade_exit_ns[:count]
     
     def get_position(self, symbol: str) -> Optional[Position]:
         """Get position for symbol"""
@@ -200,6 +375,15 @@ class Portfolio:
         
         self.total_value = self.cash + position_value
         self.unrealized_pnl = unrealized_pnl
+        self._refresh_exposure()
+        
+        # Running peak and max drawdown, updated on every valuation
+        if self.total_value > self.peak_value:
+            self.peak_value = self.total_value
+        elif self.peak_value > 0:
+            drawdown = (self.peak_value - self.total_value) / self.peak_value
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
 
 
 class ExchangeInterface(ABC):
@@ -273,11 +457,26 @@ class RiskManager(ABC):
 class TradingStrategy(ABC):
     """Abstract trading strategy interface"""
     
+    # Signal ids are unique per process: pid and start time, then a sequence
+    # number. Kept within the 36 characters the signal id columns hold.
+    _signal_ids = itertools.count()
+    _signal_id_prefix = f"{os.getpid()}-{int(time.time())}"
+    
     def __init__(self, name: str, parameters: Dict[str, Any]):
         self.name = name
         self.parameters = parameters
         self.active = False
     
+    def _next_signal_id(self) -> str:
+        """
+        Id for a new signal. A process-local sequence is far cheaper than
+        uuid4 during backtests; set the 'uuid_signal_ids' parameter where
+        ids must be globally unique.
+        """
+        if self.parameters.get('uuid_signal_ids'):
+            return str(uuid.uuid4())
+        return f"{self._signal_id_prefix}-{next(self._signal_ids)}"
+    
     @abstractmethod
     async def generate_signals(
         self, 
@@ -483,6 +682,7 @@ class TradingBot(ABC):
                 
                 # Restore positions
                 self.portfolio.positions.clear()
+                self.portfolio.invalidate_exposure()
                 for symbol, pos_data in portfolio_state.get('positions', {}).items():
                     position = Position(
                         symbol=symbol,
@@ -495,7 +695,7 @@ class TradingBot(ABC):
                         stop_loss=pos_data.get('stop_loss'),
                         take_profit=pos_data.get('take_profit')
                     )
-                    self.portfolio.positions[symbol] = position
+                    self.portfolio.set_position(position)
             
             # Restore performance metrics
             self.trades_today = state.get('trades_today', 0)
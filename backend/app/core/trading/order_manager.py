@@ -4,9 +4,9 @@ Smart Order Execution System with slippage protection and advanced order types.
 
 import asyncio
 import uuid
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Awaitable
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import pandas as pd
 import numpy as np
@@ -67,15 +67,552 @@ class ExecutionReport:
     price_improvement: float = 0.0
 
 
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Immutable view of the market taken once per execution"""
+    symbol: str
+    bid: float = 0.0
+    ask: float = 0.0
+    last: float = 0.0
+    volume: float = 0.0
+    timestamp: Optional[datetime] = None
+    
+    @classmethod
+    def from_market_data(cls, symbol: str, market_data: Dict[str, Any]) -> 'MarketSnapshot':
+        """Build a snapshot from a market data cache entry"""
+        return cls(
+            symbol=symbol,
+            bid=market_data.get('bid') or 0.0,
+            ask=market_data.get('ask') or 0.0,
+            last=market_data.get('last') or 0.0,
+            volume=market_data.get('volume') or 0.0,
+            timestamp=market_data.get('timestamp')
+        )
+    
+    @property
+    def spread_pct(self) -> float:
+        """Relative bid/ask spread, 0 when either side is missing"""
+        if self.bid > 0 and self.ask > 0:
+            return (self.ask - self.bid) / ((self.ask + self.bid) / 2)
+        return 0.0
+
+
+@dataclass
+class ExecutionContext:
+    """
+    Per-order execution state. Each execution owns its own child order
+    book-keeping so concurrent executions never share mutable dicts.
+    """
+    exchange: BinanceExchange
+    order: Order
+    params: ExecutionParams
+    snapshot: MarketSnapshot
+    active_orders: Dict[str, Order] = field(default_factory=dict)
+    fill_futures: Dict[str, asyncio.Future] = field(default_factory=dict)
+    
+    async def place_order(self, order: Order) -> str:
+        """Place a child order and track it until it completes"""
+        order_id = await self.exchange.place_order(order)
+        self.active_orders[order_id] = order
+        return order_id
+    
+    async def cancel_order(self, order_id: str) -> bool:
+        """Cancel a child order"""
+        self.active_orders.pop(order_id, None)
+        return await self.exchange.cancel_order(order_id)
+    
+    async def wait_for_fill(
+        self, 
+        order_id: str, 
+        timeout: int, 
+        allow_partial: bool = False
+    ) -> Optional[Order]:
+        """Wait for a child order to fill"""
+        filled = await wait_for_fill(self.exchange, order_id, timeout, allow_partial)
+        if filled and filled.is_filled:
+            self.active_orders.pop(order_id, None)
+        return filled
+    
+    def watch_fill(
+        self, 
+        order_id: str, 
+        timeout: int, 
+        allow_partial: bool = False
+    ) -> asyncio.Future:
+        """Start watching a child order; the future resolves on (partial) fill"""
+        future = asyncio.ensure_future(
+            self.wait_for_fill(order_id, timeout, allow_partial)
+        )
+        self.fill_futures[order_id] = future
+        future.add_done_callback(lambda _: self.fill_futures.pop(order_id, None))
+        return future
+    
+    async def first_fill(self, order_id: str, max_wait: float) -> Optional[Order]:
+        """
+        Wake as soon as the order (partially) fills or ``max_wait`` elapses,
+        whichever comes first.
+        """
+        future = self.fill_futures.get(order_id)
+        if future is None:
+            future = self.watch_fill(order_id, max_wait, allow_partial=True)
+        
+        done, _ = await asyncio.wait(
+            {future}, timeout=max_wait, return_when=asyncio.FIRST_COMPLETED
+        )
+        if future not in done:
+            future.cancel()
+            return None
+        return future.result()
+    
+    def slippage(self, average_price: float, reference_price: float) -> float:
+        """Signed slippage of the average fill against a reference price"""
+        if self.order.side == OrderSide.BUY:
+            return (average_price - reference_price) / reference_price
+        return (reference_price - average_price) / reference_price
+
+
+async def wait_for_fill(
+    exchange: BinanceExchange,
+    order_id: str, 
+    timeout: int, 
+    allow_partial: bool = False
+) -> Optional[Order]:
+    """Wait for order to fill"""
+    
+    start_time = datetime.utcnow()
+    
+    while (datetime.utcnow() - start_time).total_seconds() < timeout:
+        try:
+            order = await exchange.get_order_status(order_id)
+            
+            if order.is_filled:
+                return order
+            
+            if allow_partial and order.filled_amount > 0:
+                return order
+            
+            await asyncio.sleep(1)  # Check every second
+            
+        except Exception as e:
+            logger.error(f"Error checking order status {order_id}: {e}")
+            await asyncio.sleep(2)
+    
+    return None
+
+
+async def get_volume_profile(exchange: BinanceExchange, symbol: str) -> List[float]:
+    """Get volume profile for VWAP execution"""
+    try:
+        # Get recent volume data
+        df = await exchange.get_ohlcv(symbol, '5m', limit=48)  # 4 hours of 5min data
+        
+        if df.empty:
+            return []
+        
+        # Calculate volume profile (simplified)
+        volume_profile = df['volume'].rolling(window=6).mean().fillna(0).tolist()
+        return volume_profile[-12:]  # Last hour in 5-min chunks
+        
+    except Exception as e:
+        logger.error(f"Error getting volume profile for {symbol}: {e}")
+        return []
+
+
+def choose_execution_strategy(
+    order: Order, 
+    params: ExecutionParams,
+    snapshot: MarketSnapshot
+) -> ExecutionStrategy:
+    """Choose optimal execution strategy based on market conditions"""
+    
+    spread_pct = snapshot.spread_pct
+    volume = snapshot.volume
+    
+    # Decision logic
+    order_size_usd = order.amount * snapshot.last
+    
+    # Small orders - immediate execution
+    if order_size_usd < 1000:
+        return ExecutionStrategy.IMMEDIATE
+    
+    # Large orders in low volume - TWAP
+    if order_size_usd > 10000 and volume < params.volume_threshold:
+        return ExecutionStrategy.TWAP
+    
+    # Very large orders - Iceberg
+    if order_size_usd > 50000:
+        return ExecutionStrategy.ICEBERG
+    
+    # Wide spreads - VWAP
+    if spread_pct > params.spread_threshold:
+        return ExecutionStrategy.VWAP
+    
+    # Normal conditions - TWAP for medium orders
+    if order_size_usd > 5000:
+        return ExecutionStrategy.TWAP
+    
+    return ExecutionStrategy.IMMEDIATE
+
+
+def twap_schedule(amount: float, chunk_size: float, max_chunks: int = 20) -> np.ndarray:
+    """
+    Closed-form TWAP schedule: ``amount`` split into equal slices no larger
+    than ``chunk_size``. Any floating-point residue is folded into the last
+    slice so the schedule sums exactly to ``amount``. Past ``max_chunks``
+    slices only ``max_chunks * chunk_size`` is scheduled.
+    """
+    n_chunks = int(np.ceil(amount / chunk_size - 1e-9)) if chunk_size > 0 else 1
+    if n_chunks > max_chunks:
+        return np.full(max_chunks, chunk_size)
+    n_chunks = max(1, n_chunks)
+    
+    sizes = np.full(n_chunks, amount / n_chunks)
+    sizes[-1] += amount - sizes.sum()
+    return sizes
+
+
+async def execute_immediate(ctx: ExecutionContext) -> ExecutionReport:
+    """Execute market order immediately"""
+    
+    order, params, snapshot = ctx.order, ctx.params, ctx.snapshot
+    
+    # Check spread before execution
+    spread_pct = snapshot.spread_pct
+    if spread_pct > params.spread_threshold:
+        logger.warning(f"Wide spread detected: {spread_pct:.4f} for {order.symbol}")
+    
+    # Execute order
+    start_price = snapshot.ask if order.side == OrderSide.BUY else snapshot.bid
+    order_id = await ctx.place_order(order)
+    
+    # Wait for fill
+    filled_order = await ctx.wait_for_fill(order_id, params.time_limit)
+    
+    if not filled_order or not filled_order.is_filled:
+        raise Exception("Order not filled within time limit")
+    
+    # Calculate slippage
+    executed_price = filled_order.filled_price
+    slippage = ctx.slippage(executed_price, start_price)
+    
+    # Check slippage tolerance
+    if abs(slippage) > params.max_slippage:
+        logger.warning(f"High slippage: {slippage:.4f} for {order.symbol}")
+    
+    return ExecutionReport(
+        order_id=order_id,
+        symbol=order.symbol,
+        requested_amount=order.amount,
+        executed_amount=filled_order.filled_amount,
+        average_price=executed_price,
+        requested_price=start_price,
+        total_slippage=slippage,
+        execution_time=0,  # Will be set by caller
+        fees_paid=filled_order.commission,
+        strategy_used=ExecutionStrategy.IMMEDIATE,
+        chunks_executed=1,
+        success=True
+    )
+
+
+async def execute_twap(ctx: ExecutionContext) -> ExecutionReport:
+    """Execute using Time-Weighted Average Price strategy"""
+    
+    order, params = ctx.order, ctx.params
+    
+    chunk_size = params.chunk_size or (order.amount / 5)  # 5 chunks by default
+    sizes = twap_schedule(order.amount, chunk_size)
+    last_chunk = len(sizes) - 1
+    time_interval = params.time_limit / len(sizes)
+    
+    executed_amount = 0.0
+    total_cost = 0.0
+    total_fees = 0.0
+    chunks_executed = 0
+    
+    for i, current_chunk in enumerate(sizes.tolist()):
+        try:
+            # Create chunk order
+            chunk_order = Order(
+                id=str(uuid.uuid4()),
+                symbol=order.symbol,
+                type=OrderType.MARKET,
+                side=order.side,
+                amount=current_chunk
+            )
+            
+            # Execute chunk
+            chunk_order_id = await ctx.place_order(chunk_order)
+            filled_chunk = await ctx.wait_for_fill(chunk_order_id, 60)  # 1 min per chunk
+            
+            if filled_chunk and filled_chunk.is_filled:
+                executed_amount += filled_chunk.filled_amount
+                total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
+                total_fees += filled_chunk.commission
+                chunks_executed += 1
+                
+                # Wait before next chunk (unless it's the last one)
+                if i < last_chunk:
+                    await asyncio.sleep(min(time_interval, 30))  # Max 30s between chunks
+            else:
+                logger.warning(f"TWAP chunk {chunks_executed + 1} failed to fill")
+                break
+            
+        except Exception as e:
+            logger.error(f"Error in TWAP chunk {chunks_executed + 1}: {e}")
+            break
+    
+    if executed_amount == 0:
+        raise Exception("No chunks executed successfully")
+    
+    average_price = total_cost / executed_amount
+    initial_price = ctx.snapshot.last or average_price
+    
+    return ExecutionReport(
+        order_id=order.id,
+        symbol=order.symbol,
+        requested_amount=order.amount,
+        executed_amount=executed_amount,
+        average_price=average_price,
+        requested_price=initial_price,
+        total_slippage=ctx.slippage(average_price, initial_price),
+        execution_time=0,
+        fees_paid=total_fees,
+        strategy_used=ExecutionStrategy.TWAP,
+        chunks_executed=chunks_executed,
+        success=executed_amount >= order.amount * 0.9  # 90% fill threshold
+    )
+
+
+async def execute_vwap(ctx: ExecutionContext) -> ExecutionReport:
+    """Execute using Volume-Weighted Average Price strategy"""
+    
+    order, params = ctx.order, ctx.params
+    
+    # Get volume profile
+    volume_profile = await get_volume_profile(ctx.exchange, order.symbol)
+    
+    if not volume_profile:
+        # Fallback to TWAP if no volume data
+        return await execute_twap(ctx)
+    
+    # Calculate volume-based chunks
+    total_volume = sum(volume_profile)
+    target_participation = total_volume * params.participation_rate
+    
+    chunks = []
+    remaining_amount = order.amount
+    
+    for volume in volume_profile:
+        if remaining_amount <= 0:
+            break
+        
+        # Calculate chunk size based on volume proportion
+        volume_proportion = volume / total_volume
+        chunk_size = min(
+            remaining_amount,
+            order.amount * volume_proportion,
+            target_participation * volume_proportion
+        )
+        
+        if chunk_size > 0:
+            chunks.append(chunk_size)
+            remaining_amount -= chunk_size
+    
+    # Execute chunks
+    executed_amount = 0.0
+    total_cost = 0.0
+    total_fees = 0.0
+    chunks_executed = 0
+    
+    for i, chunk_size in enumerate(chunks):
+        try:
+            chunk_order = Order(
+                id=str(uuid.uuid4()),
+                symbol=order.symbol,
+                type=OrderType.MARKET,
+                side=order.side,
+                amount=chunk_size
+            )
+            
+            chunk_order_id = await ctx.place_order(chunk_order)
+            filled_chunk = await ctx.wait_for_fill(chunk_order_id, 60)
+            
+            if filled_chunk and filled_chunk.is_filled:
+                executed_amount += filled_chunk.filled_amount
+                total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
+                total_fees += filled_chunk.commission
+                chunks_executed += 1
+                
+                # Wait between chunks based on volume pattern
+                if i < len(chunks) - 1:
+                    wait_time = max(5, min(30, 60 / len(chunks)))
+                    await asyncio.sleep(wait_time)
+            else:
+                break
+            
+        except Exception as e:
+            logger.error(f"Error in VWAP chunk {i + 1}: {e}")
+            break
+    
+    if executed_amount == 0:
+        raise Exception("No VWAP chunks executed successfully")
+    
+    average_price = total_cost / executed_amount
+    initial_price = ctx.snapshot.last or average_price
+    
+    return ExecutionReport(
+        order_id=order.id,
+        symbol=order.symbol,
+        requested_amount=order.amount,
+        executed_amount=executed_amount,
+        average_price=average_price,
+        requested_price=initial_price,
+        total_slippage=ctx.slippage(average_price, initial_price),
+        execution_time=0,
+        fees_paid=total_fees,
+        strategy_used=ExecutionStrategy.VWAP,
+        chunks_executed=chunks_executed,
+        success=executed_amount >= order.amount * 0.9
+    )
+
+
+async def execute_iceberg(ctx: ExecutionContext) -> ExecutionReport:
+    """Execute using Iceberg strategy (hidden size)"""
+    
+    order, params, snapshot = ctx.order, ctx.params, ctx.snapshot
+    
+    visible_size = order.amount * params.hidden_size_pct
+    total_executed = 0.0
+    total_cost = 0.0
+    total_fees = 0.0
+    chunks_executed = 0
+    
+    remaining_amount = order.amount
+    
+    # Rest at best bid/ask from the snapshot
+    limit_price = snapshot.bid if order.side == OrderSide.BUY else snapshot.ask
+    
+    while remaining_amount > 0:
+        try:
+            # Show only a small portion
+            current_visible = min(visible_size, remaining_amount)
+            
+            if limit_price == 0:
+                # Fallback to market order
+                chunk_order = Order(
+                    id=str(uuid.uuid4()),
+                    symbol=order.symbol,
+                    type=OrderType.MARKET,
+                    side=order.side,
+                    amount=current_visible
+                )
+            else:
+                chunk_order = Order(
+                    id=str(uuid.uuid4()),
+                    symbol=order.symbol,
+                    type=OrderType.LIMIT,
+                    side=order.side,
+                    amount=current_visible,
+                    price=limit_price
+                )
+            
+            chunk_order_id = await ctx.place_order(chunk_order)
+            ctx.watch_fill(
+                chunk_order_id, 
+                params.price_improvement_wait,
+                allow_partial=True
+            )
+            
+            # React to the first (partial) fill instead of a fixed pause
+            filled_chunk = await ctx.first_fill(
+                chunk_order_id, params.price_improvement_wait
+            )
+            
+            if filled_chunk and filled_chunk.filled_amount > 0:
+                total_executed += filled_chunk.filled_amount
+                total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
+                total_fees += filled_chunk.commission
+                remaining_amount -= filled_chunk.filled_amount
+                chunks_executed += 1
+                
+                # If not fully filled, cancel and try again
+                if not filled_chunk.is_filled:
+                    await ctx.cancel_order(chunk_order_id)
+            else:
+                # Cancel unfilled order
+                await ctx.cancel_order(chunk_order_id)
+                break
+            
+        except Exception as e:
+            logger.error(f"Error in Iceberg chunk {chunks_executed + 1}: {e}")
+            break
+    
+    if total_executed == 0:
+        raise Exception("No Iceberg chunks executed successfully")
+    
+    average_price = total_cost / total_executed
+    initial_price = snapshot.last or average_price
+    
+    return ExecutionReport(
+        order_id=order.id,
+        symbol=order.symbol,
+        requested_amount=order.amount,
+        executed_amount=total_executed,
+        average_price=average_price,
+        requested_price=initial_price,
+        total_slippage=ctx.slippage(average_price, initial_price),
+        execution_time=0,
+        fees_paid=total_fees,
+        strategy_used=ExecutionStrategy.ICEBERG,
+        chunks_executed=chunks_executed,
+        success=total_executed >= order.amount * 0.9
+    )
+
+
+class StrategyDispatcher:
+    """
+    Stateless mapping from execution strategy to its executor. Holds no
+    per-order state, so a single instance is safe to share across
+    concurrent executions.
+    """
+    
+    EXECUTORS: Dict[ExecutionStrategy, Callable[[ExecutionContext], Awaitable[ExecutionReport]]] = {
+        ExecutionStrategy.IMMEDIATE: execute_immediate,
+        ExecutionStrategy.TWAP: execute_twap,
+        ExecutionStrategy.VWAP: execute_vwap,
+        ExecutionStrategy.ICEBERG: execute_iceberg,
+    }
+    
+    def resolve(
+        self, 
+        order: Order, 
+        params: ExecutionParams, 
+        snapshot: MarketSnapshot
+    ) -> ExecutionStrategy:
+        """Resolve ADAPTIVE into a concrete strategy"""
+        if params.strategy == ExecutionStrategy.ADAPTIVE:
+            return choose_execution_strategy(order, params, snapshot)
+        return params.strategy
+    
+    async def dispatch(self, ctx: ExecutionContext) -> ExecutionReport:
+        """Run the executor for the context's strategy"""
+        executor = self.EXECUTORS.get(ctx.params.strategy, execute_immediate)
+        return await executor(ctx)
+
+
 class SmartOrderManager:
     """
     Smart order execution system that optimizes trade execution
     to minimize slippage and market impact.
+    
+    The manager only owns shared caches and reports; each execution runs
+    in its own ``ExecutionContext`` against an immutable ``MarketSnapshot``.
     """
     
     def __init__(self, exchange: BinanceExchange):
         self.exchange = exchange
-        self.active_orders: Dict[str, Order] = {}
+        self.dispatcher = StrategyDispatcher()
         self.execution_reports: List[ExecutionReport] = []
         self.market_data_cache: Dict[str, Dict] = {}
         self.volume_profiles: Dict[str, List[float]] = {}
@@ -112,26 +649,23 @@ class SmartOrderManager:
         start_time = datetime.utcnow()
         
         try:
-            # Update market data
+            # Update market data and freeze it for this execution
             await self._update_market_data(signal.symbol)
+            snapshot = MarketSnapshot.from_market_data(
+                signal.symbol, self.market_data_cache.get(signal.symbol, {})
+            )
             
-            # Choose optimal execution strategy
-            if execution_params.strategy == ExecutionStrategy.ADAPTIVE:
-                execution_params.strategy = await self._choose_execution_strategy(
-                    order, execution_params
-                )
+            # Choose optimal execution strategy without mutating caller params
+            strategy = self.dispatcher.resolve(order, execution_params, snapshot)
+            execution_params = replace(execution_params, strategy=strategy)
             
-            # Execute based on chosen strategy
-            if execution_params.strategy == ExecutionStrategy.IMMEDIATE:
-                report = await self._execute_immediate(order, execution_params)
-            elif execution_params.strategy == ExecutionStrategy.TWAP:
-                report = await self._execute_twap(order, execution_params)
-            elif execution_params.strategy == ExecutionStrategy.VWAP:
-                report = await self._execute_vwap(order, execution_params)
-            elif execution_params.strategy == ExecutionStrategy.ICEBERG:
-                report = await self._execute_iceberg(order, execution_params)
-            else:
-                report = await self._execute_immediate(order, execution_params)
+            context = ExecutionContext(
+                exchange=self.exchange,
+                order=order,
+                params=execution_params,
+                snapshot=snapshot
+            )
+            report = await self.dispatcher.dispatch(context)
             
             # Calculate execution metrics
             execution_time = (datetime.utcnow() - start_time).total_seconds()
@@ -178,384 +712,6 @@ class SmartOrderManager:
             
             return report
     
-    async def _execute_immediate(
-        self, 
-        order: Order, 
-        params: ExecutionParams
-    ) -> ExecutionReport:
-        """Execute market order immediately"""
-        
-        # Check spread before execution
-        market_data = self.market_data_cache.get(order.symbol, {})
-        bid = market_data.get('bid', 0)
-        ask = market_data.get('ask', 0)
-        
-        if bid > 0 and ask > 0:
-            spread_pct = (ask - bid) / ((ask + bid) / 2)
-            if spread_pct > params.spread_threshold:
-                logger.warning(f"Wide spread detected: {spread_pct:.4f} for {order.symbol}")
-        
-        # Execute order
-        start_price = ask if order.side == OrderSide.BUY else bid
-        order_id = await self.exchange.place_order(order)
-        
-        # Wait for fill
-        filled_order = await self._wait_for_fill(order_id, params.time_limit)
-        
-        if not filled_order or not filled_order.is_filled:
-            raise Exception("Order not filled within time limit")
-        
-        # Calculate slippage
-        executed_price = filled_order.filled_price
-        if order.side == OrderSide.BUY:
-            slippage = (executed_price - start_price) / start_price
-        else:
-            slippage = (start_price - executed_price) / start_price
-        
-        # Check slippage tolerance
-        if abs(slippage) > params.max_slippage:
-            logger.warning(f"High slippage: {slippage:.4f} for {order.symbol}")
-        
-        return ExecutionReport(
-            order_id=order_id,
-            symbol=order.symbol,
-            requested_amount=order.amount,
-            executed_amount=filled_order.filled_amount,
-            average_price=executed_price,
-            requested_price=start_price,
-            total_slippage=slippage,
-            execution_time=0,  # Will be set by caller
-            fees_paid=filled_order.commission,
-            strategy_used=ExecutionStrategy.IMMEDIATE,
-            chunks_executed=1,
-            success=True
-        )
-    
-    async def _execute_twap(
-        self, 
-        order: Order, 
-        params: ExecutionParams
-    ) -> ExecutionReport:
-        """Execute using Time-Weighted Average Price strategy"""
-        
-        chunk_size = params.chunk_size or (order.amount / 5)  # 5 chunks by default
-        time_interval = params.time_limit / max(1, order.amount / chunk_size)
-        
-        executed_amount = 0.0
-        total_cost = 0.0
-        total_fees = 0.0
-        chunks_executed = 0
-        
-        remaining_amount = order.amount
-        
-        while remaining_amount > 0 and chunks_executed < 20:  # Max 20 chunks
-            try:
-                # Calculate chunk size (smaller chunks towards the end)
-                current_chunk = min(chunk_size, remaining_amount)
-                
-                # Create chunk order
-                chunk_order = Order(
-                    id=str(uuid.uuid4()),
-                    symbol=order.symbol,
-                    type=OrderType.MARKET,
-                    side=order.side,
-                    amount=current_chunk
-                )
-                
-                # Execute chunk
-                chunk_order_id = await self.exchange.place_order(chunk_order)
-                filled_chunk = await self._wait_for_fill(chunk_order_id, 60)  # 1 min per chunk
-                
-                if filled_chunk and filled_chunk.is_filled:
-                    executed_amount += filled_chunk.filled_amount
-                    total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
-                    total_fees += filled_chunk.commission
-                    remaining_amount -= filled_chunk.filled_amount
-                    chunks_executed += 1
-                    
-                    # Wait before next chunk (unless it's the last one)
-                    if remaining_amount > 0:
-                        await asyncio.sleep(min(time_interval, 30))  # Max 30s between chunks
-                else:
-                    logger.warning(f"TWAP chunk {chunks_executed + 1} failed to fill")
-                    break
-                
-            except Exception as e:
-                logger.error(f"Error in TWAP chunk {chunks_executed + 1}: {e}")
-                break
-        
-        if executed_amount == 0:
-            raise Exception("No chunks executed successfully")
-        
-        average_price = total_cost / executed_amount
-        initial_price = self.market_data_cache.get(order.symbol, {}).get('last', average_price)
-        
-        if order.side == OrderSide.BUY:
-            slippage = (average_price - initial_price) / initial_price
-        else:
-            slippage = (initial_price - average_price) / initial_price
-        
-        return ExecutionReport(
-            order_id=order.id,
-            symbol=order.symbol,
-            requested_amount=order.amount,
-            executed_amount=executed_amount,
-            average_price=average_price,
-            requested_price=initial_price,
-            total_slippage=slippage,
-            execution_time=0,
-            fees_paid=total_fees,
-            strategy_used=ExecutionStrategy.TWAP,
-            chunks_executed=chunks_executed,
-            success=executed_amount >= order.amount * 0.9  # 90% fill threshold
-        )
-    
-    async def _execute_vwap(
-        self, 
-        order: Order, 
-        params: ExecutionParams
-    ) -> ExecutionReport:
-        """Execute using Volume-Weighted Average Price strategy"""
-        
-        # Get volume profile
-        volume_profile = await self._get_volume_profile(order.symbol)
-        
-        if not volume_profile:
-            # Fallback to TWAP if no volume data
-            return await self._execute_twap(order, params)
-        
-        # Calculate volume-based chunks
-        total_volume = sum(volume_profile)
-        target_participation = total_volume * params.participation_rate
-        
-        chunks = []
-        remaining_amount = order.amount
-        
-        for volume in volume_profile:
-            if remaining_amount <= 0:
-                break
-            
-            # Calculate chunk size based on volume proportion
-            volume_proportion = volume / total_volume
-            chunk_size = min(
-                remaining_amount,
-                order.amount * volume_proportion,
-                target_participation * volume_proportion
-            )
-            
-            if chunk_size > 0:
-                chunks.append(chunk_size)
-                remaining_amount -= chunk_size
-        
-        # Execute chunks
-        executed_amount = 0.0
-        total_cost = 0.0
-        total_fees = 0.0
-        chunks_executed = 0
-        
-        for i, chunk_size in enumerate(chunks):
-            try:
-                chunk_order = Order(
-                    id=str(uuid.uuid4()),
-                    symbol=order.symbol,
-                    type=OrderType.MARKET,
-                    side=order.side,
-                    amount=chunk_size
-                )
-                
-                chunk_order_id = await self.exchange.place_order(chunk_order)
-                filled_chunk = await self._wait_for_fill(chunk_order_id, 60)
-                
-                if filled_chunk and filled_chunk.is_filled:
-                    executed_amount += filled_chunk.filled_amount
-                    total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
-                    total_fees += filled_chunk.commission
-                    chunks_executed += 1
-                    
-                    # Wait between chunks based on volume pattern
-                    if i < len(chunks) - 1:
-                        wait_time = max(5, min(30, 60 / len(chunks)))
-                        await asyncio.sleep(wait_time)
-                else:
-                    break
-                
-            except Exception as e:
-                logger.error(f"Error in VWAP chunk {i + 1}: {e}")
-                break
-        
-        if executed_amount == 0:
-            raise Exception("No VWAP chunks executed successfully")
-        
-        average_price = total_cost / executed_amount
-        initial_price = self.market_data_cache.get(order.symbol, {}).get('last', average_price)
-        
-        if order.side == OrderSide.BUY:
-            slippage = (average_price - initial_price) / initial_price
-        else:
-            slippage = (initial_price - average_price) / initial_price
-        
-        return ExecutionReport(
-            order_id=order.id,
-            symbol=order.symbol,
-            requested_amount=order.amount,
-            executed_amount=executed_amount,
-            average_price=average_price,
-            requested_price=initial_price,
-            total_slippage=slippage,
-            execution_time=0,
-            fees_paid=total_fees,
-            strategy_used=ExecutionStrategy.VWAP,
-            chunks_executed=chunks_executed,
-            success=executed_amount >= order.amount * 0.9
-        )
-    
-    async def _execute_iceberg(
-        self, 
-        order: Order, 
-        params: ExecutionParams
-    ) -> ExecutionReport:
-        """Execute using Iceberg strategy (hidden size)"""
-        
-        visible_size = order.amount * params.hidden_size_pct
-        total_executed = 0.0
-        total_cost = 0.0
-        total_fees = 0.0
-        chunks_executed = 0
-        
-        remaining_amount = order.amount
-        
-        while remaining_amount > 0:
-            try:
-                # Show only a small portion
-                current_visible = min(visible_size, remaining_amount)
-                
-                # Create limit order at best bid/ask
-                market_data = self.market_data_cache.get(order.symbol, {})
-                if order.side == OrderSide.BUY:
-                    limit_price = market_data.get('bid', 0)
-                else:
-                    limit_price = market_data.get('ask', 0)
-                
-                if limit_price == 0:
-                    # Fallback to market order
-                    chunk_order = Order(
-                        id=str(uuid.uuid4()),
-                        symbol=order.symbol,
-                        type=OrderType.MARKET,
-                        side=order.side,
-                        amount=current_visible
-                    )
-                else:
-                    chunk_order = Order(
-                        id=str(uuid.uuid4()),
-                        symbol=order.symbol,
-                        type=OrderType.LIMIT,
-                        side=order.side,
-                        amount=current_visible,
-                        price=limit_price
-                    )
-                
-                chunk_order_id = await self.exchange.place_order(chunk_order)
-                
-                # Wait for partial or full fill
-                filled_chunk = await self._wait_for_fill(
-                    chunk_order_id, 
-                    params.price_improvement_wait,
-                    allow_partial=True
-                )
-                
-                if filled_chunk and filled_chunk.filled_amount > 0:
-                    total_executed += filled_chunk.filled_amount
-                    total_cost += filled_chunk.filled_amount * filled_chunk.filled_price
-                    total_fees += filled_chunk.commission
-                    remaining_amount -= filled_chunk.filled_amount
-                    chunks_executed += 1
-                    
-                    # If not fully filled, cancel and try again
-                    if not filled_chunk.is_filled:
-                        await self.exchange.cancel_order(chunk_order_id)
-                else:
-                    # Cancel unfilled order
-                    await self.exchange.cancel_order(chunk_order_id)
-                    break
-                
-                # Short pause before next iceberg slice
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Error in Iceberg chunk {chunks_executed + 1}: {e}")
-                break
-        
-        if total_executed == 0:
-            raise Exception("No Iceberg chunks executed successfully")
-        
-        average_price = total_cost / total_executed
-        initial_price = self.market_data_cache.get(order.symbol, {}).get('last', average_price)
-        
-        if order.side == OrderSide.BUY:
-            slippage = (average_price - initial_price) / initial_price
-        else:
-            slippage = (initial_price - average_price) / initial_price
-        
-        return ExecutionReport(
-            order_id=order.id,
-            symbol=order.symbol,
-            requested_amount=order.amount,
-            executed_amount=total_executed,
-            average_price=average_price,
-            requested_price=initial_price,
-            total_slippage=slippage,
-            execution_time=0,
-            fees_paid=total_fees,
-            strategy_used=ExecutionStrategy.ICEBERG,
-            chunks_executed=chunks_executed,
-            success=total_executed >= order.amount * 0.9
-        )
-    
-    async def _choose_execution_strategy(
-        self, 
-        order: Order, 
-        params: ExecutionParams
-    ) -> ExecutionStrategy:
-        """Choose optimal execution strategy based on market conditions"""
-        
-        market_data = self.market_data_cache.get(order.symbol, {})
-        
-        # Get market metrics
-        spread_pct = 0
-        volume = market_data.get('volume', 0)
-        
-        bid = market_data.get('bid', 0)
-        ask = market_data.get('ask', 0)
-        
-        if bid > 0 and ask > 0:
-            spread_pct = (ask - bid) / ((ask + bid) / 2)
-        
-        # Decision logic
-        order_size_usd = order.amount * market_data.get('last', 0)
-        
-        # Small orders - immediate execution
-        if order_size_usd < 1000:
-            return ExecutionStrategy.IMMEDIATE
-        
-        # Large orders in low volume - TWAP
-        if order_size_usd > 10000 and volume < params.volume_threshold:
-            return ExecutionStrategy.TWAP
-        
-        # Very large orders - Iceberg
-        if order_size_usd > 50000:
-            return ExecutionStrategy.ICEBERG
-        
-        # Wide spreads - VWAP
-        if spread_pct > params.spread_threshold:
-            return ExecutionStrategy.VWAP
-        
-        # Normal conditions - TWAP for medium orders
-        if order_size_usd > 5000:
-            return ExecutionStrategy.TWAP
-        
-        return ExecutionStrategy.IMMEDIATE
-    
     async def _update_market_data(self, symbol: str):
         """Update market data cache"""
         try:
@@ -572,51 +728,6 @@ class SmartOrderManager:
         except Exception as e:
             logger.error(f"Error updating market data for {symbol}: {e}")
     
-    async def _get_volume_profile(self, symbol: str) -> List[float]:
-        """Get volume profile for VWAP execution"""
-        try:
-            # Get recent volume data
-            df = await self.exchange.get_ohlcv(symbol, '5m', limit=48)  # 4 hours of 5min data
-            
-            if df.empty:
-                return []
-            
-            # Calculate volume profile (simplified)
-            volume_profile = df['volume'].rolling(window=6).mean().fillna(0).tolist()
-            return volume_profile[-12:]  # Last hour in 5-min chunks
-            
-        except Exception as e:
-            logger.error(f"Error getting volume profile for {symbol}: {e}")
-            return []
-    
-    async def _wait_for_fill(
-        self, 
-        order_id: str, 
-        timeout: int, 
-        allow_partial: bool = False
-    ) -> Optional[Order]:
-        """Wait for order to fill"""
-        
-        start_time = datetime.utcnow()
-        
-        while (datetime.utcnow() - start_time).total_seconds() < timeout:
-            try:
-                order = await self.exchange.get_order_status(order_id)
-                
-                if order.is_filled:
-                    return order
-                
-                if allow_partial and order.filled_amount > 0:
-                    return order
-                
-                await asyncio.sleep(1)  # Check every second
-                
-            except Exception as e:
-                logger.error(f"Error checking order status {order_id}: {e}")
-                await asyncio.sleep(2)
-        
-        return None
-    
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get execution performance metrics"""
         if not self.execution_reports:
@@ -3,9 +3,18 @@ Paper Trading Engine - Safe testing environment for trading strategies.
 """
 
 import asyncio
+import multiprocessing
+import random
+import time
 import uuid
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple, Deque, Set
+from bisect import insort
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from heapq import nlargest
+from itertools import islice
+from operator import attrgetter
+from datetime import datetime
 from dataclasses import dataclass, field
 import pandas as pd
 import numpy as np
@@ -16,12 +25,77 @@ from app.core.trading.base import (
 )
 from app.core.trading.exchange import BinanceExchange
 from app.data.manager import data_manager
+from app.utils.jit import njit
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
-@dataclass
+MAX_TRADE_HISTORY = 100_000  # Closed trades retained per paper account
+DEFAULT_COMMISSION_RATE = 0.001  # 0.1%
+
+
+class PositionArrays:
+    """
+    Structure-of-arrays mirror of an account's open positions so that
+    unrealized PnL can be recomputed for every position in one expression.
+    """
+    
+    def __init__(self, capacity: int = 16):
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.entry = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.side_sign = np.zeros(capacity)
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def upsert(self, position: Position):
+        """Insert or refresh the row for a position"""
+        idx = self.index.get(position.symbol)
+        
+        if idx is None:
+            idx = len(self.symbols)
+            if idx == len(self.entry):
+                self._grow()
+            self.symbols.append(position.symbol)
+            self.index[position.symbol] = idx
+        
+        self.entry[idx] = position.entry_price
+        self.size[idx] = position.size
+        self.side_sign[idx] = 1.0 if position.side == 'long' else -1.0
+    
+    def remove(self, symbol: str):
+        """Drop a position, moving the last row into its slot"""
+        idx = self.index.pop(symbol, None)
+        if idx is None:
+            return
+        
+        last = len(self.symbols) - 1
+        if idx != last:
+            moved = self.symbols[last]
+            self.symbols[idx] = moved
+            self.index[moved] = idx
+            self.entry[idx] = self.entry[last]
+            self.size[idx] = self.size[last]
+            self.side_sign[idx] = self.side_sign[last]
+        
+        self.symbols.pop()
+    
+    def unrealized_pnl(self, prices: np.ndarray) -> np.ndarray:
+        """Unrealized PnL for every row given current prices in row order"""
+        n = len(self.symbols)
+        return self.side_sign[:n] * (prices - self.entry[:n]) * self.size[:n]
+    
+    def _grow(self):
+        capacity = len(self.entry) * 2
+        self.entry = np.resize(self.entry, capacity)
+        self.size = np.resize(self.size, capacity)
+        self.side_sign = np.resize(self.side_sign, capacity)
+
+
+@dataclass(slots=True)
 class PaperAccount:
     """Paper trading account state"""
     account_id: str
@@ -29,8 +103,11 @@ class PaperAccount:
     current_balance: float
     positions: Dict[str, Position] = field(default_factory=dict)
     orders: Dict[str, Order] = field(default_factory=dict)
-    trades: List[Trade] = field(default_factory=list)
+    order_index: List[Tuple[datetime, str]] = field(default_factory=list)  # Sorted by created_at
+    active_order_ids: Set[str] = field(default_factory=set)
+    trades: Deque[Trade] = field(default_factory=lambda: deque(maxlen=MAX_TRADE_HISTORY))
     created_at: datetime = field(default_factory=datetime.utcnow)
+    pos_arrays: PositionArrays = field(default_factory=PositionArrays, repr=False)
     
     # Performance metrics
     total_pnl: float = 0.0
@@ -40,21 +117,20 @@ class PaperAccount:
     trades_count: int = 0
     winning_trades: int = 0
     losing_trades: int = 0
+    traded_volume: float = 0.0  # Sum of size * entry price over closed trades
     
     # Settings
-    commission_rate: float = 0.001  # 0.1%
+    commission_rate: float = DEFAULT_COMMISSION_RATE
     slippage_rate: float = 0.0005   # 0.05%
     realistic_fills: bool = True    # Simulate realistic order fills
+    store_filled_orders: bool = True  # Keep filled orders in the order book
     
     def calculate_metrics(self):
-        """Calculate account performance metrics"""
-        self.trades_count = len(self.trades)
-        
+        """
+        Calculate account performance metrics. Trade counters and total PnL
+        are maintained incrementally by ``record_trade``.
+        """
         if self.trades_count > 0:
-            self.winning_trades = sum(1 for trade in self.trades if trade.pnl > 0)
-            self.losing_trades = self.trades_count - self.winning_trades
-            self.total_pnl = sum(trade.pnl for trade in self.trades)
-            
             if self.initial_balance > 0:
                 self.total_return_pct = (self.current_balance - self.initial_balance) / self.initial_balance * 100
         
@@ -64,6 +140,180 @@ class PaperAccount:
         
         if self.max_balance > 0:
             self.max_drawdown = max(self.max_drawdown, (self.max_balance - self.current_balance) / self.max_balance)
+    
+    def store_order(self, order: Order):
+        """Store an order, keeping the created_at index and active set in sync"""
+        if order.status == OrderStatus.FILLED and not self.store_filled_orders:
+            # Nothing reads filled orders back on this account; keep the book lean
+            if self.orders.pop(order.id, None) is not None:
+                self.order_index.remove((order.created_at, order.id))
+            self.active_order_ids.discard(order.id)
+            return
+        
+        if order.id not in self.orders:
+            insort(self.order_index, (order.created_at, order.id))
+        self.orders[order.id] = order
+        
+        if order.is_active:
+            self.active_order_ids.add(order.id)
+        else:
+            self.active_order_ids.discard(order.id)
+    
+    def record_trade(self, trade: Trade):
+        """Append a closed trade and update the running trade counters"""
+        self.trades.append(trade)
+        self.total_pnl += trade.pnl
+        self.traded_volume += trade.size * trade.entry_price
+        self.trades_count += 1
+        if trade.pnl > 0:
+            self.winning_trades += 1
+        else:
+            self.losing_trades += 1
+
+
+SLIPPAGE_BUFFER_SIZE = 4096  # Power of two so the index wraps with a mask
+
+
+# Column layout of the trade records produced by _run_backtest_nb
+BT_SYMBOL, BT_ENTRY_IDX, BT_EXIT_IDX, BT_ENTRY_PRICE, BT_EXIT_PRICE, \
+    BT_SIZE, BT_PNL, BT_PNL_PCT, BT_COMMISSION = range(9)
+
+
+def _nearest_candle_indices(
+    candle_ns: np.ndarray, 
+    signal_ns: np.ndarray, 
+    tolerance_ns: int
+) -> np.ndarray:
+    """
+    Index of the nearest candle for each signal (ties go to the later
+    candle), or -1 when none lies within ``tolerance_ns``. Works on sorted
+    int64 nanosecond arrays with a single binary search.
+    """
+    if len(candle_ns) == 0:
+        return np.full(len(signal_ns), -1, dtype=np.int64)
+    
+    right = np.minimum(np.searchsorted(candle_ns, signal_ns), len(candle_ns) - 1)
+    left = np.maximum(right - 1, 0)
+    
+    right_gap = np.abs(candle_ns[right] - signal_ns)
+    left_gap = np.abs(candle_ns[left] - signal_ns)
+    
+    nearest = np.where(left_gap < right_gap, left, right)
+    gap = np.minimum(left_gap, right_gap)
+    
+    return np.where(gap <= tolerance_ns, nearest, -1)
+
+
+@njit(cache=True)
+def _backtest_position_size(balance, price, stop):
+    """Risk 10% of balance, sized off the stop distance when one is set (NaN = none)"""
+    risk_amount = balance * 0.1
+    
+    if not np.isnan(stop):
+        risk_per_share = abs(price - stop)
+        if risk_per_share > 0:
+            return risk_amount / risk_per_share
+    
+    # Fallback to fixed allocation
+    return risk_amount / price
+
+
+@njit(cache=True)
+def _run_backtest_nb(
+    highs, lows, closes,
+    sig_idx, sig_dir, sig_stop, sig_sym, n_symbols,
+    initial_balance, commission_rate
+):
+    """
+    Numeric backtest kernel. Mirrors the paper account fill rules: buys
+    fill at the candle high, sells at the candle low, 10% of balance is
+    risked per signal and sizing uses the stop distance when available.
+    
+    Returns (trades, orders, equity_curve, balance, pos_size, pos_entry,
+    pos_entry_idx). ``trades`` rows follow the BT_* column layout, ``orders``
+    is a (side, price, amount, commission) structure-of-arrays with one slot
+    per signal (side 0 = not executed) and ``equity_curve`` holds the equity
+    after every signal: cash plus open positions marked at the signal
+    candle's close.
+    """
+    n_signals = sig_idx.shape[0]
+    
+    trades = np.empty((n_signals, 9))
+    equity_curve = np.empty(n_signals)
+    
+    order_side = np.zeros(n_signals, dtype=np.int8)
+    order_price = np.zeros(n_signals)
+    order_amount = np.zeros(n_signals)
+    order_commission = np.zeros(n_signals)
+    
+    pos_size = np.zeros(n_symbols)
+    pos_entry = np.zeros(n_symbols)
+    pos_entry_idx = np.full(n_symbols, -1, dtype=np.int64)
+    
+    balance = initial_balance
+    n_trades = 0
+    
+    for k in range(n_signals):
+        i = sig_idx[k]
+        s = sig_sym[k]
+        price = closes[i]
+        
+        size = _backtest_position_size(balance, price, sig_stop[k])
+        
+        if size <= 0:
+            equity_curve[k] = balance + pos_size.sum() * price
+            continue
+        
+        if sig_dir[k] > 0:
+            # Buy at high of candle (worst case)
+            fill_price = highs[i]
+            commission = size * fill_price * commission_rate
+            balance -= size * fill_price + commission
+            
+            if pos_entry_idx[s] >= 0:
+                total_size = pos_size[s] + size
+                pos_entry[s] = (pos_size[s] * pos_entry[s] + size * fill_price) / total_size
+                pos_size[s] = total_size
+            else:
+                pos_size[s] = size
+                pos_entry[s] = fill_price
+                pos_entry_idx[s] = i
+        else:
+            # Sell at low of candle (worst case)
+            fill_price = lows[i]
+            commission = size * fill_price * commission_rate
+            balance += size * fill_price - commission
+            
+            if pos_entry_idx[s] >= 0:
+                pnl = (fill_price - pos_entry[s]) * size - commission
+                
+                trades[n_trades, BT_SYMBOL] = s
+                trades[n_trades, BT_ENTRY_IDX] = pos_entry_idx[s]
+                trades[n_trades, BT_EXIT_IDX] = i
+                trades[n_trades, BT_ENTRY_PRICE] = pos_entry[s]
+                trades[n_trades, BT_EXIT_PRICE] = fill_price
+                trades[n_trades, BT_SIZE] = size
+                trades[n_trades, BT_PNL] = pnl
+                trades[n_trades, BT_PNL_PCT] = pnl / (pos_entry[s] * size) * 100
+                trades[n_trades, BT_COMMISSION] = commission
+                n_trades += 1
+                
+                pos_size[s] -= size
+                if pos_size[s] <= 0:
+                    pos_size[s] = 0.0
+                    pos_entry_idx[s] = -1
+        
+        order_side[k] = sig_dir[k]
+        order_price[k] = fill_price
+        order_amount[k] = size
+        order_commission[k] = commission
+        equity_curve[k] = balance + pos_size.sum() * price
+    
+    return (
+        trades[:n_trades],
+        (order_side, order_price, order_amount, order_commission),
+        equity_curve, balance, pos_size, pos_entry, pos_entry_idx
+    )
 
 
 class PaperTradingEngine:
@@ -78,9 +328,9 @@ class PaperTradingEngine:
         self.active_simulations: Dict[str, bool] = {}
         
         # Market simulation parameters
-        self.price_cache: Dict[str, Dict] = {}
+        self._px: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, monotonic ts)
         self.order_book_cache: Dict[str, Dict] = {}
-        self.last_price_update: Dict[str, datetime] = {}
+        self.price_ttl = 30.0  # seconds
         
         # Simulation settings
         self.update_interval = 5  # seconds
@@ -89,6 +339,11 @@ class PaperTradingEngine:
         self.simulate_order_rejections = True
         self.max_slippage = 0.01  # 1%
         
+        # Pre-drawn standard normals for slippage, consumed by index
+        self._rng = np.random.default_rng()
+        self._slip_buf = self._rng.standard_normal(SLIPPAGE_BUFFER_SIZE)
+        self._slip_i = 0
+        
         # Performance tracking
         self.total_simulated_trades = 0
         self.successful_simulations = 0
@@ -96,9 +351,10 @@ class PaperTradingEngine:
     async def create_account(
         self, 
         initial_balance: float = 100000,
-        commission_rate: float = 0.001,
+        commission_rate: float = DEFAULT_COMMISSION_RATE,
         slippage_rate: float = 0.0005,
-        realistic_fills: bool = True
+        realistic_fills: bool = True,
+        store_filled_orders: bool = True
     ) -> str:
         """Create a new paper trading account"""
         
@@ -110,7 +366,8 @@ class PaperTradingEngine:
             current_balance=initial_balance,
             commission_rate=commission_rate,
             slippage_rate=slippage_rate,
-            realistic_fills=realistic_fills
+            realistic_fills=realistic_fills,
+            store_filled_orders=store_filled_orders
         )
         
         account.max_balance = initial_balance
@@ -149,7 +406,7 @@ class PaperTradingEngine:
         # Validate order
         if not await self._validate_order(account, order):
             order.status = OrderStatus.REJECTED
-            account.orders[order.id] = order
+            account.store_order(order)
             raise ValueError("Order validation failed")
         
         # Update market data
@@ -167,11 +424,11 @@ class PaperTradingEngine:
             raise ValueError(f"Unsupported order type: {order.type}")
         
         # Store order
-        account.orders[order.id] = order
+        account.store_order(order)
         
         # Simulate processing delay for realism
         if simulate_delay:
-            await asyncio.sleep(np.random.uniform(0.1, 0.5))
+            await asyncio.sleep(random.uniform(0.1, 0.5))
         
         logger.info(f"Paper order placed: {order.id} - {order.side.value} {order.amount} {order.symbol}")
         return order.id
@@ -193,7 +450,8 @@ class PaperTradingEngine:
             return False
         
         order.status = OrderStatus.CANCELLED
-        order.updated_at = datetime.utcnow()
+        order.updated_ns = time.time_ns()
+        account.active_order_ids.discard(order_id)
         
         logger.info(f"Paper order cancelled: {order_id}")
         return True
@@ -211,14 +469,16 @@ class PaperTradingEngine:
         portfolio_value = account.current_balance
         position_value = 0.0
         
-        for symbol, position in account.positions.items():
-            try:
-                current_price = await self._get_current_price(symbol)
-                if current_price:
-                    position.current_price = current_price
-                    position_value += position.size * current_price
-            except:
+        symbols = list(account.positions.keys())
+        prices = await self._get_current_prices(symbols)
+        
+        for symbol, current_price in zip(symbols, prices):
+            if not current_price:  # None when the fetch failed
                 continue
+            
+            position = account.positions[symbol]
+            position.current_price = current_price
+            position_value += position.size * current_price
         
         total_value = account.current_balance + position_value
         
@@ -236,7 +496,7 @@ class PaperTradingEngine:
             'losing_trades': account.losing_trades,
             'win_rate': account.winning_trades / max(1, account.trades_count),
             'open_positions': len(account.positions),
-            'open_orders': len([o for o in account.orders.values() if o.is_active]),
+            'open_orders': len(account.active_order_ids),
             'created_at': account.created_at.isoformat(),
             'commission_rate': account.commission_rate,
             'slippage_rate': account.slippage_rate
@@ -250,19 +510,25 @@ class PaperTradingEngine:
         
         account = self.accounts[account_id]
         
-        # Update position values with current prices
-        for symbol, position in account.positions.items():
-            try:
-                current_price = await self._get_current_price(symbol)
-                if current_price:
-                    position.current_price = current_price
-                    
-                    if position.side == 'long':
-                        position.unrealized_pnl = (current_price - position.entry_price) * position.size
-                    else:
-                        position.unrealized_pnl = (position.entry_price - current_price) * position.size
-            except:
+        # Update position values with current prices, fetched concurrently
+        pos_arrays = account.pos_arrays
+        symbols = list(pos_arrays.symbols)
+        prices = await self._get_current_prices(symbols)
+        
+        current = np.fromiter(
+            (p or np.nan for p in prices),
+            dtype=np.float64,
+            count=len(symbols)
+        )
+        unrealized = pos_arrays.unrealized_pnl(current)
+        
+        for symbol, current_price, pnl in zip(symbols, current.tolist(), unrealized.tolist()):
+            if current_price != current_price:  # NaN: price unavailable
                 continue
+            
+            position = account.positions[symbol]
+            position.current_price = current_price
+            position.unrealized_pnl = pnl
         
         return account.positions.copy()
     
@@ -273,21 +539,38 @@ class PaperTradingEngine:
             return []
         
         account = self.accounts[account_id]
-        return account.trades[-limit:] if limit else account.trades.copy()
+        if not limit:
+            return list(account.trades)
+        
+        # Walk back from the newest trade only as far as needed
+        return list(islice(reversed(account.trades), limit))[::-1]
     
-    async def get_orders(self, account_id: str, active_only: bool = False) -> List[Order]:
-        """Get orders for account"""
+    async def get_orders(
+        self, 
+        account_id: str, 
+        active_only: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Order]:
+        """Get orders for account, newest first, optionally only the latest ``limit``"""
         
         if account_id not in self.accounts:
             return []
         
         account = self.accounts[account_id]
-        orders = list(account.orders.values())
+        by_created = attrgetter('created_at')
         
         if active_only:
-            orders = [order for order in orders if order.is_active]
-        
-        return sorted(orders, key=lambda x: x.created_at, reverse=True)
+            # Only the (small) active set needs ordering
+            orders = [account.orders[order_id] for order_id in account.active_order_ids]
+            if limit is not None:
+                return nlargest(limit, orders, key=by_created)
+            return sorted(orders, key=by_created, reverse=True)
+        
+        # The created_at index is already sorted; read it newest first
+        return [
+            account.orders[order_id]
+            for _, order_id in islice(reversed(account.order_index), limit)
+        ]
     
     async def run_backtest(
         self,
@@ -308,62 +591,14 @@ class PaperTradingEngine:
         
         try:
             # Get historical data
-            df = await data_manager.fetch_ohlcv(
-                symbol=symbol,
-                timeframe='1h',
-                start_time=start_date,
-                end_time=end_date
-            )
+            df = await self._fetch_backtest_data(symbol, start_date, end_date)
+            prepared = self._prepare_backtest_signals(df, strategy_signals)
             
-            if df.empty:
-                raise ValueError("No historical data available")
+            account = self.accounts[backtest_account_id]
             
-            # Process signals chronologically
-            executed_signals = 0
-            
-            for signal in sorted(strategy_signals, key=lambda x: x.timestamp):
-                # Find corresponding price data
-                signal_time = pd.Timestamp(signal.timestamp)
-                
-                # Find nearest candle
-                time_diff = abs(df.index - signal_time)
-                nearest_idx = time_diff.argmin()
-                
-                if time_diff.iloc[nearest_idx] > timedelta(hours=2):
-                    continue  # Skip if signal is too far from any candle
-                
-                candle = df.iloc[nearest_idx]
-                
-                # Create order from signal
-                position_size = self._calculate_backtest_position_size(
-                    backtest_account_id, signal, candle['close']
-                )
-                
-                if position_size <= 0:
-                    continue
-                
-                order = Order(
-                    id=str(uuid.uuid4()),
-                    symbol=signal.symbol,
-                    type=OrderType.MARKET,
-                    side=OrderSide.BUY if signal.direction == 'buy' else OrderSide.SELL,
-                    amount=position_size,
-                    price=candle['close']
-                )
-                
-                # Execute order with historical price
-                try:
-                    await self._execute_backtest_order(
-                        backtest_account_id, order, candle, signal
-                    )
-                    executed_signals += 1
-                except Exception as e:
-                    logger.warning(f"Failed to execute backtest order: {e}")
-                    continue
-            
-            # Get final results
-            final_status = await self.get_account_status(backtest_account_id)
-            trades = await self.get_trades(backtest_account_id)
+            run = _run_backtest_nb(
+                *prepared['arrays'], float(initial_balance), account.commission_rate
+            )
             
             return {
                 'backtest_id': backtest_account_id,
@@ -372,21 +607,176 @@ class PaperTradingEngine:
                     'start': start_date.isoformat(),
                     'end': end_date.isoformat()
                 },
-                'initial_balance': initial_balance,
-                'final_balance': final_status['current_balance'],
-                'total_return': final_status['total_return_pct'],
-                'max_drawdown': final_status['max_drawdown'],
-                'total_trades': len(trades),
-                'signals_processed': len(strategy_signals),
-                'signals_executed': executed_signals,
-                'win_rate': final_status['win_rate'],
-                'trades': [self._trade_to_dict(trade) for trade in trades]
+                **self._summarize_backtest(
+                    run, df, prepared, initial_balance, len(strategy_signals)
+                )
             }
         
         finally:
             # Clean up temporary account
             await self.delete_account(backtest_account_id)
     
+    async def run_backtests_batch(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        strategy_signals: List[Signal],
+        param_grid: List[Dict[str, float]],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one backtest per parameter set (``initial_balance``,
+        ``commission_rate``) over the same signals. Data is fetched and
+        signals are aligned once; the kernels run in a process pool.
+        """
+        
+        df = await self._fetch_backtest_data(symbol, start_date, end_date)
+        prepared = self._prepare_backtest_signals(df, strategy_signals)
+        
+        settings = [
+            (
+                float(params.get('initial_balance', 100000)),
+                float(params.get('commission_rate', DEFAULT_COMMISSION_RATE))
+            )
+            for params in param_grid
+        ]
+        
+        # Spawn workers: forking a process that already runs threads is unsafe
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')
+        ) as pool:
+            runs = await asyncio.gather(*[
+                loop.run_in_executor(
+                    pool, _run_backtest_nb, *prepared['arrays'], initial_balance, commission_rate
+                )
+                for initial_balance, commission_rate in settings
+            ])
+        
+        return [
+            {
+                'symbol': symbol,
+                'period': {
+                    'start': start_date.isoformat(),
+                    'end': end_date.isoformat()
+                },
+                'params': dict(params),
+                **self._summarize_backtest(
+                    run, df, prepared, initial_balance, len(strategy_signals)
+                )
+            }
+            for params, (initial_balance, _), run in zip(param_grid, settings, runs)
+        ]
+    
+    async def _fetch_backtest_data(
+        self, 
+        symbol: str, 
+        start_date: datetime, 
+        end_date: datetime
+    ) -> pd.DataFrame:
+        """Fetch hourly candles for a backtest window"""
+        
+        df = await data_manager.fetch_ohlcv(
+            symbol=symbol,
+            timeframe='1h',
+            start_time=start_date,
+            end_time=end_date
+        )
+        
+        if df.empty:
+            raise ValueError("No historical data available")
+        
+        return df
+    
+    def _prepare_backtest_signals(
+        self, 
+        df: pd.DataFrame, 
+        strategy_signals: List[Signal]
+    ) -> Dict[str, Any]:
+        """Sort and align signals to candles, packed as backtest kernel inputs"""
+        
+        # Normalize timestamps once, then sort chronologically with one
+        # stable argsort on int64 nanoseconds
+        signal_ns = pd.to_datetime([s.timestamp for s in strategy_signals]).asi8
+        chronological = np.argsort(signal_ns, kind='stable')
+        sorted_signals = [strategy_signals[k] for k in chronological]
+        
+        # Resolve every signal to its nearest candle in one pass;
+        # signals more than 2 hours from any candle map to -1
+        candle_indices = _nearest_candle_indices(
+            df.index.asi8, signal_ns[chronological], pd.Timedelta(hours=2).value
+        )
+        
+        # Pack aligned signals into parallel arrays for the kernel
+        aligned = np.flatnonzero(candle_indices >= 0)
+        aligned_signals = [sorted_signals[k] for k in aligned]
+        
+        symbols = list(dict.fromkeys(s.symbol for s in aligned_signals))
+        symbol_ids = {sym: n for n, sym in enumerate(symbols)}
+        
+        sig_idx = candle_indices[aligned].astype(np.int64)
+        sig_dir = np.array(
+            [1 if s.direction == 'buy' else -1 for s in aligned_signals], dtype=np.int8
+        )
+        sig_stop = np.array(
+            [s.stop_loss or np.nan for s in aligned_signals], dtype=np.float64
+        )
+        sig_sym = np.array(
+            [symbol_ids[s.symbol] for s in aligned_signals], dtype=np.int64
+        )
+        
+        return {
+            'signals': aligned_signals,
+            'symbols': symbols,
+            'sig_idx': sig_idx,
+            'arrays': (
+                df['high'].to_numpy(dtype=np.float64),
+                df['low'].to_numpy(dtype=np.float64),
+                df['close'].to_numpy(dtype=np.float64),
+                sig_idx, sig_dir, sig_stop, sig_sym, len(symbols)
+            )
+        }
+    
+    def _summarize_backtest(
+        self,
+        run: Tuple,
+        df: pd.DataFrame,
+        prepared: Dict[str, Any],
+        initial_balance: float,
+        signals_processed: int
+    ) -> Dict[str, Any]:
+        """Compute backtest metrics and tables from one kernel run"""
+        
+        trade_records, orders, equity_curve, balance = run[:4]
+        
+        order_side = orders[0]
+        executed_signals = int(np.count_nonzero(order_side))
+        
+        # Final metrics straight from the kernel arrays
+        total_trades = len(trade_records)
+        winning_trades = int(np.count_nonzero(trade_records[:, BT_PNL] > 0))
+        
+        max_drawdown = 0.0
+        if len(equity_curve) > 0:
+            peaks = np.maximum.accumulate(np.maximum(equity_curve, initial_balance))
+            max_drawdown = float(np.max((peaks - equity_curve) / peaks))
+        
+        return {
+            'initial_balance': initial_balance,
+            'final_balance': float(balance),
+            'total_return': (balance - initial_balance) / initial_balance * 100 if initial_balance > 0 else 0.0,
+            'max_drawdown': max_drawdown,
+            'total_trades': total_trades,
+            'signals_processed': signals_processed,
+            'signals_executed': executed_signals,
+            'win_rate': winning_trades / max(1, total_trades),
+            'trades': self._backtest_trades_frame(trade_records, df.index, prepared['symbols']),
+            'orders': self._backtest_orders_frame(
+                orders, prepared['sig_idx'], df.index, prepared['signals']
+            )
+        }
+    
     async def _validate_order(self, account: PaperAccount, order: Order) -> bool:
         """Validate order against account constraints"""
         
@@ -428,7 +818,7 @@ class PaperTradingEngine:
         
         # Apply slippage
         if account.realistic_fills:
-            slippage = np.random.normal(0, account.slippage_rate)
+            slippage = self._next_standard_normal() * account.slippage_rate
             slippage = max(-self.max_slippage, min(self.max_slippage, slippage))
             
             if order.side == OrderSide.BUY:
@@ -439,19 +829,38 @@ class PaperTradingEngine:
             fill_price = current_price
         
         # Execute fill
-        order.filled_price = fill_price
-        order.filled_amount = order.amount
-        order.status = OrderStatus.FILLED
-        order.updated_at = datetime.utcnow()
-        
-        # Calculate commission
-        notional_value = order.amount * fill_price
-        commission = notional_value * account.commission_rate
-        order.commission = commission
+        self._apply_fill(order, account, fill_price, time.time_ns())
         
         # Update account
         await self._update_account_from_fill(account, order)
     
+    def _apply_fill(
+        self, 
+        order: Order, 
+        account: PaperAccount, 
+        fill_price: float, 
+        ts_ns: int
+    ) -> float:
+        """Mark an order completely filled at ``fill_price`` and charge commission"""
+        amount = order.amount
+        notional_value = amount * fill_price
+        
+        order.filled_price = fill_price
+        order.filled_amount = amount
+        order.status = OrderStatus.FILLED
+        order.updated_ns = ts_ns
+        order.commission = notional_value * account.commission_rate
+        
+        return notional_value
+    
+    def _next_standard_normal(self) -> float:
+        """Next pre-drawn standard normal, refilling the buffer on wrap"""
+        value = self._slip_buf[self._slip_i]
+        self._slip_i = (self._slip_i + 1) & (SLIPPAGE_BUFFER_SIZE - 1)
+        if self._slip_i == 0:
+            self._slip_buf = self._rng.standard_normal(SLIPPAGE_BUFFER_SIZE)
+        return float(value)
+    
     async def _process_limit_order(self, account: PaperAccount, order: Order):
         """Process a limit order (simplified - immediate check)"""
         
@@ -470,15 +879,7 @@ class PaperTradingEngine:
         
         if should_fill:
             # Fill at limit price (better execution)
-            order.filled_price = order.price
-            order.filled_amount = order.amount
-            order.status = OrderStatus.FILLED
-            order.updated_at = datetime.utcnow()
-            
-            # Calculate commission
-            notional_value = order.amount * order.price
-            commission = notional_value * account.commission_rate
-            order.commission = commission
+            self._apply_fill(order, account, order.price, time.time_ns())
             
             # Update account
             await self._update_account_from_fill(account, order)
@@ -512,141 +913,152 @@ class PaperTradingEngine:
     async def _update_account_from_fill(self, account: PaperAccount, order: Order):
         """Update account state after order fill"""
         
+        # Bind hot attributes to locals once
+        symbol = order.symbol
+        amount = order.amount
+        fill_price = order.filled_price
+        commission = order.commission
+        positions = account.positions
+        position = positions.get(symbol)
+        
         if order.side == OrderSide.BUY:
             # Deduct cash and commission
-            total_cost = (order.amount * order.filled_price) + order.commission
-            account.current_balance -= total_cost
+            account.current_balance -= amount * fill_price + commission
             
             # Add to position
-            if order.symbol in account.positions:
-                position = account.positions[order.symbol]
-                # Update average price
-                total_size = position.size + order.amount
-                total_cost_basis = (position.size * position.entry_price) + (order.amount * order.filled_price)
-                new_avg_price = total_cost_basis / total_size
-                
-                position.size = total_size
-                position.entry_price = new_avg_price
+            if position is not None:
+                # Update average price from the running cost basis
+                position.cost_basis += amount * fill_price
+                position.size += amount
+                position.entry_price = position.cost_basis / position.size
             else:
                 # New position
-                account.positions[order.symbol] = Position(
-                    symbol=order.symbol,
+                position = Position(
+                    symbol=symbol,
                     side='long',
-                    size=order.amount,
-                    entry_price=order.filled_price,
-                    current_price=order.filled_price,
-                    entry_time=order.updated_at
+                    size=amount,
+                    entry_price=fill_price,
+                    current_price=fill_price,
+                    entry_time=order.updated_at,
+                    cost_basis=amount * fill_price
                 )
+                positions[symbol] = position
+            
+            account.pos_arrays.upsert(position)
         
         elif order.side == OrderSide.SELL:
             # Add cash minus commission
-            total_proceeds = (order.amount * order.filled_price) - order.commission
-            account.current_balance += total_proceeds
+            account.current_balance += amount * fill_price - commission
             
             # Remove from position
-            if order.symbol in account.positions:
-                position = account.positions[order.symbol]
+            if position is not None:
+                entry_price = position.entry_price
                 
                 # Create trade record
-                pnl = (order.filled_price - position.entry_price) * order.amount - order.commission
+                pnl = (fill_price - entry_price) * amount - commission
                 
                 trade = Trade(
                     id=str(uuid.uuid4()),
-                    symbol=order.symbol,
+                    symbol=symbol,
                     side='long',  # Position side
-                    entry_price=position.entry_price,
-                    exit_price=order.filled_price,
-                    size=order.amount,
+                    entry_price=entry_price,
+                    exit_price=fill_price,
+                    size=amount,
                     entry_time=position.entry_time,
                     exit_time=order.updated_at,
                     pnl=pnl,
-                    pnl_pct=(pnl / (position.entry_price * order.amount)) * 100,
-                    commission=order.commission,
+                    pnl_pct=(pnl / (entry_price * amount)) * 100,
+                    commission=commission,
                     exit_reason='Manual',
                     strategy='paper_trading'
                 )
                 
-                account.trades.append(trade)
+                account.record_trade(trade)
                 
-                # Update position
-                position.size -= order.amount
+                # Update position, scaling cost basis with the remaining size
+                old_size = position.size
+                position.size = old_size - amount
                 if position.size <= 0:
-                    del account.positions[order.symbol]
+                    del positions[symbol]
+                    account.pos_arrays.remove(symbol)
+                else:
+                    position.cost_basis *= position.size / old_size
+                    account.pos_arrays.upsert(position)
     
-    async def _execute_backtest_order(
-        self, 
-        account_id: str, 
-        order: Order, 
-        candle: pd.Series,
-        signal: Signal
-    ):
-        """Execute order in backtest mode with historical data"""
-        
-        account = self.accounts[account_id]
-        
-        # Use historical prices for realistic fills
-        if order.side == OrderSide.BUY:
-            # Buy at high of candle (worst case)
-            fill_price = candle['high']
-        else:
-            # Sell at low of candle (worst case)
-            fill_price = candle['low']
-        
-        order.filled_price = fill_price
-        order.filled_amount = order.amount
-        order.status = OrderStatus.FILLED
-        order.updated_at = pd.Timestamp(candle.name).to_pydatetime()
-        
-        # Calculate commission
-        notional_value = order.amount * fill_price
-        commission = notional_value * account.commission_rate
-        order.commission = commission
-        
-        # Store order
-        account.orders[order.id] = order
-        
-        # Update account
-        await self._update_account_from_fill(account, order)
+    def _backtest_trades_frame(
+        self,
+        trade_records: np.ndarray,
+        index: pd.DatetimeIndex,
+        symbols: List[str]
+    ) -> pd.DataFrame:
+        """Build the backtest trade table from kernel records in one shot"""
+        
+        # Named columns keep the table typed when no trade closed
+        records = pd.DataFrame({
+            name: trade_records[:, column] for name, column in (
+                ('symbol', BT_SYMBOL), ('entry_idx', BT_ENTRY_IDX), ('exit_idx', BT_EXIT_IDX),
+                ('entry_price', BT_ENTRY_PRICE), ('exit_price', BT_EXIT_PRICE), ('size', BT_SIZE),
+                ('pnl', BT_PNL), ('pnl_pct', BT_PNL_PCT), ('commission', BT_COMMISSION)
+            )
+        })
+        
+        entry_time = index[records['entry_idx'].to_numpy(dtype=np.int64)]
+        exit_time = index[records['exit_idx'].to_numpy(dtype=np.int64)]
+        
+        return pd.DataFrame({
+            'id': [f"bt-{n}" for n in range(len(records))],
+            'symbol': np.asarray(symbols, dtype=object)[records['symbol'].to_numpy(dtype=np.int64)],
+            'side': 'long',
+            'entry_price': records['entry_price'],
+            'exit_price': records['exit_price'],
+            'size': records['size'],
+            'entry_time': entry_time,
+            'exit_time': exit_time,
+            'pnl': records['pnl'],
+            'pnl_pct': records['pnl_pct'],
+            'commission': records['commission'],
+            'exit_reason': 'Manual',
+            'duration': exit_time - entry_time
+        })
     
-    def _calculate_backtest_position_size(
-        self, 
-        account_id: str, 
-        signal: Signal, 
-        price: float
-    ) -> float:
-        """Calculate position size for backtest"""
-        
-        account = self.accounts[account_id]
-        
-        # Use 10% of balance per trade (simplified)
-        risk_amount = account.current_balance * 0.1
-        
-        # Calculate size based on stop loss if available
-        if signal.stop_loss:
-            risk_per_share = abs(price - signal.stop_loss)
-            if risk_per_share > 0:
-                return risk_amount / risk_per_share
-        
-        # Fallback to fixed allocation
-        return risk_amount / price
+    def _backtest_orders_frame(
+        self,
+        orders: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        sig_idx: np.ndarray,
+        index: pd.DatetimeIndex,
+        signals: List[Signal]
+    ) -> pd.DataFrame:
+        """Build the executed-order table from the kernel's order arrays"""
+        
+        order_side, order_price, order_amount, order_commission = orders
+        executed = np.flatnonzero(order_side)
+        
+        return pd.DataFrame({
+            'id': [f"bt-{k}" for k in executed],
+            'symbol': [signals[k].symbol for k in executed],
+            'side': np.where(order_side[executed] > 0, OrderSide.BUY.value, OrderSide.SELL.value),
+            'filled_price': order_price[executed],
+            'filled_amount': order_amount[executed],
+            'commission': order_commission[executed],
+            'filled_at': index[sig_idx[executed]]
+        })
     
     async def _get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price for symbol"""
         
+        # Check cache first
+        entry = self._px.get(symbol)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.price_ttl:
+            return entry[0]
+        
         try:
-            # Check cache first
-            if symbol in self.price_cache:
-                cache_time = self.last_price_update.get(symbol, datetime.min)
-                if (datetime.utcnow() - cache_time).total_seconds() < 30:  # 30 second cache
-                    return self.price_cache[symbol].get('price')
-            
             # Fetch from exchange
             ticker = await self.exchange.get_ticker(symbol)
             price = ticker.get('last', 0)
             
             # Update cache
-            self.price_cache[symbol] = {'price': price}
-            self.last_price_update[symbol] = datetime.utcnow()
+            self._px[symbol] = (price, time.monotonic())
             
             return price
             
@@ -654,50 +1066,49 @@ class PaperTradingEngine:
             logger.error(f"Error getting price for {symbol}: {e}")
             return None
     
+    async def _get_current_prices(self, symbols: List[str]) -> List[Optional[float]]:
+        """
+        Get current prices for several symbols in one round-trip. Failed
+        fetches come back as None, so cancellation still propagates.
+        """
+        return await asyncio.gather(
+            *(self._get_current_price(symbol) for symbol in symbols)
+        )
+    
     async def _update_market_data(self, symbol: str):
         """Update market data cache"""
         
+        # Skip the refresh entirely while the cached price is still hot
+        entry = self._px.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.update_interval:
+            return
+        
         try:
-            ticker = await self.exchange.get_ticker(symbol)
-            order_book = await self.exchange.get_order_book(symbol, limit=5)
+            ticker, order_book = await asyncio.gather(
+                self.exchange.get_ticker(symbol),
+                self.exchange.get_order_book(symbol, limit=5)
+            )
             
-            self.price_cache[symbol] = ticker
+            self._px[symbol] = (ticker.get('last', 0), time.monotonic())
             self.order_book_cache[symbol] = order_book
-            self.last_price_update[symbol] = datetime.utcnow()
             
         except Exception as e:
             logger.error(f"Error updating market data for {symbol}: {e}")
     
-    def _trade_to_dict(self, trade: Trade) -> Dict[str, Any]:
-        """Convert trade to dictionary"""
-        
-        return {
-            'id': trade.id,
-            'symbol': trade.symbol,
-            'side': trade.side,
-            'entry_price': trade.entry_price,
-            'exit_price': trade.exit_price,
-            'size': trade.size,
-            'entry_time': trade.entry_time.isoformat(),
-            'exit_time': trade.exit_time.isoformat(),
-            'pnl': trade.pnl,
-            'pnl_pct': trade.pnl_pct,
-            'commission': trade.commission,
-            'exit_reason': trade.exit_reason,
-            'duration': str(trade.duration) if hasattr(trade, 'duration') else None
-        }
-    
     def get_global_stats(self) -> Dict[str, Any]:
         """Get global paper trading statistics"""
         
         total_accounts = len(self.accounts)
-        active_accounts = sum(1 for acc in self.accounts.values() if len(acc.positions) > 0)
-        
-        total_trades = sum(len(acc.trades) for acc in self.accounts.values())
-        total_volume = sum(
-            sum(trade.size * trade.entry_price for trade in acc.trades)
-            for acc in self.accounts.values()
-        )
+        active_accounts = 0
+        total_trades = 0
+        total_volume = 0.0
+        
+        # Per-account running counters keep this O(accounts), not O(trades)
+        for acc in self.accounts.values():
+            if acc.positions:
+                active_accounts += 1
+            total_trades += acc.trades_count
+            total_volume += acc.traded_volume
         
         return {
             'total_accounts': total_accounts,
@@ -2,21 +2,45 @@
 Comprehensive risk management framework for trading bots.
 """
 
+import heapq
 import math
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timedelta
+import time
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 
 from app.core.trading.base import (
-    RiskManager, Order, Portfolio, Position, Signal, Trade, RiskLevel
+    RiskManager, Order, OrderSide, Portfolio, Position, Signal, Trade, RiskLevel, base_asset
 )
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+EQUITY_WINDOW = 252  # Equity points kept for risk metrics (1 year of days)
+_SQRT_252 = math.sqrt(252.0)  # Annualization factor for daily return statistics
+
+# Alert messages for (drawdown, concentration, daily loss) in check_portfolio_risk
+_RISK_ALERTS = (
+    "Approaching max drawdown: {:.2%}",
+    "High concentration risk: {:.2%}",
+    "Approaching daily loss limit: {:.2%}"
+)
+
+_STD_NORMAL = NormalDist()
+_Z_CACHE: Dict[float, float] = {}
+
+
+def _z_score(confidence: float) -> float:
+    """Lower-tail standard normal quantile for a confidence level, memoized"""
+    z = _Z_CACHE.get(confidence)
+    if z is None:
+        z = _Z_CACHE[confidence] = _STD_NORMAL.inv_cdf(1 - confidence)
+    return z
+
+
 @dataclass
 class RiskMetrics:
     """Risk metrics for portfolio"""
@@ -29,9 +53,13 @@ class RiskMetrics:
     correlation_risk: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class RiskLimits:
-    """Risk limits configuration"""
+    """
+    Risk limits configuration. Frozen: replace the limits on a manager
+    (e.g. with dataclasses.replace) rather than editing them in place, so the
+    manager can rebuild its order validator.
+    """
     max_position_size: float = 0.1  # 10% of portfolio per position
     max_portfolio_risk: float = 0.02  # 2% portfolio risk per trade
     max_daily_loss: float = 0.05  # 5% daily loss limit
@@ -55,110 +83,153 @@ class RiskLimits:
 class AdvancedRiskManager(RiskManager):
     """Advanced risk management with multiple risk models"""
     
+    # Base assets assumed to move together; at most one open position per cluster
+    _HIGH_CORR_CLUSTERS = {
+        'crypto_major': frozenset({'BTC', 'ETH'})
+    }
+    
     def __init__(self, risk_limits: Optional[RiskLimits] = None):
-        self.risk_limits = risk_limits or RiskLimits()
         self.daily_trades = 0
         self.daily_pnl = 0.0
-        self.last_trade_date = None
+        self._last_trade_day = -1  # UTC days since epoch of the counters
         self.max_portfolio_value = 0.0
-        self.equity_curve = []
+        
+        # Equity curve ring buffer: write index and number of valid points
+        self._eq_buf = np.empty(EQUITY_WINDOW, dtype=np.float64)
+        self._eq_head = 0
+        self._eq_len = 0
+        self._equity_arr: Optional[np.ndarray] = None  # Chronological view, cached
+        
+        # Running peak and max drawdown over the window, updated per trade
+        self._running_peak = 0.0
+        self._cached_max_dd = 0.0
+        self._dd_stale = False  # Set when an eviction may change the drawdown
+        
+        # Welford statistics (count, mean, M2) of the returns in the window
+        self._ret_n = 0
+        self._ret_mean = 0.0
+        self._ret_m2 = 0.0
+        
+        # Max-heap (negated) of the smallest returns in the window, just
+        # enough of them to interpolate the 5th percentile for VaR
+        self._worst_returns: List[float] = []
+        self._tail_k = 0
+        self._tail_stale = False
+        
+        # Equity-derived metrics cached per equity version (bumped per trade)
+        self._version = 0
+        self._last_metrics: Optional[Dict[str, float]] = None
+        self._last_metrics_version = -1
         
         # Risk models
         self.kelly_criterion = KellyCriterion()
         self.var_calculator = VaRCalculator()
         self.correlation_monitor = CorrelationMonitor()
         
-    def validate_order(self, order: Order, portfolio: Portfolio) -> bool:
-        """Validate if order passes all risk checks"""
-        try:
-            # Update daily counters
-            self._update_daily_counters()
-            
-            # Basic validations
-            if not self._validate_basic_limits(order, portfolio):
-                return False
-            
-            # Position size validation
-            if not self._validate_position_size(order, portfolio):
-                return False
-            
-            # Portfolio risk validation
-            if not self._validate_portfolio_risk(order, portfolio):
-                return False
-            
-            # Correlation validation
-            if not self._validate_correlation(order, portfolio):
-                return False
-            
-            # Time-based validation
-            if not self._validate_trading_hours():
-                return False
-            
-            # Daily limits validation
-            if not self._validate_daily_limits():
-                return False
-            
-            logger.info(f"Order {order.id} passed all risk validations")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Risk validation error: {e}")
-            return False
+        # Also builds the specialized validate_order for these limits
+        self.risk_limits = risk_limits or RiskLimits()
     
-    def _validate_basic_limits(self, order: Order, portfolio: Portfolio) -> bool:
-        """Validate basic risk limits"""
-        # Check maximum open positions
-        if len(portfolio.positions) >= self.risk_limits.max_open_positions:
-            logger.warning(f"Maximum open positions ({self.risk_limits.max_open_positions}) reached")
-            return False
-        
-        # Check if we already have a position in this symbol
-        if order.symbol in portfolio.positions and order.side.value == 'buy':
-            logger.warning(f"Already have position in {order.symbol}")
-            return False
-        
-        return True
+    @property
+    def risk_limits(self) -> RiskLimits:
+        """Active risk limits; assigning new limits rebuilds the validator"""
+        return self._risk_limits
     
-    def _validate_position_size(self, order: Order, portfolio: Portfolio) -> bool:
-        """Validate position size limits"""
-        order_value = order.amount * (order.price or 0)
-        max_position_value = portfolio.total_value * self.risk_limits.max_position_size
-        
-        if order_value > max_position_value:
-            logger.warning(f"Order value {order_value} exceeds max position size {max_position_value}")
-            return False
-        
-        # Check single asset concentration
-        base_asset = order.symbol.split('/')[0]
-        current_asset_value = sum(
-            pos.market_value for pos in portfolio.positions.values()
-            if pos.symbol.startswith(base_asset)
-        )
-        
-        total_asset_value = current_asset_value + order_value
-        max_asset_value = portfolio.total_value * self.risk_limits.max_single_asset
-        
-        if total_asset_value > max_asset_value:
-            logger.warning(f"Asset concentration for {base_asset} would exceed limit")
-            return False
-        
-        return True
+    @risk_limits.setter
+    def risk_limits(self, limits: RiskLimits):
+        self._risk_limits = limits
+        self.validate_order = self._build_validator()
     
-    def _validate_portfolio_risk(self, order: Order, portfolio: Portfolio) -> bool:
-        """Validate portfolio-level risk"""
-        # Check maximum daily loss
-        if self.daily_pnl < -portfolio.total_value * self.risk_limits.max_daily_loss:
-            logger.warning("Daily loss limit reached")
-            return False
-        
-        # Check maximum drawdown
-        if portfolio.total_value > 0:
-            current_drawdown = (self.max_portfolio_value - portfolio.total_value) / self.max_portfolio_value
-            if current_drawdown > self.risk_limits.max_drawdown:
-                logger.warning(f"Maximum drawdown {current_drawdown:.2%} exceeded")
+    def _build_validator(self) -> Callable[[Order, Portfolio], bool]:
+        """
+        Specialize ``validate_order`` for the current limits: the limit
+        values become closure constants. This closure is the one place the
+        order checks are defined; ``validate_order`` on the class delegates here.
+        """
+        limits = self._risk_limits
+        max_trades_per_day = limits.max_trades_per_day
+        max_open_positions = limits.max_open_positions
+        max_position_size = limits.max_position_size
+        max_single_asset = limits.max_single_asset
+        max_daily_loss = limits.max_daily_loss
+        max_drawdown = limits.max_drawdown
+        
+        manager = self
+        validate_trading_hours = self._validate_trading_hours
+        validate_correlation = self._validate_correlation
+        buy = OrderSide.BUY
+        
+        def validate_order(order: Order, portfolio: Portfolio) -> bool:
+            """Validate if order passes all risk checks"""
+            try:
+                # Read the clock once for every time-based check below
+                now = time.time()
+                manager._update_daily_counters(now)
+                
+                # Daily limits
+                if manager.daily_trades >= max_trades_per_day:
+                    logger.warning(f"Daily trade limit {max_trades_per_day} reached")
+                    return False
+                
+                # Trading hours
+                if not validate_trading_hours(now):
+                    return False
+                
+                # Basic limits
+                positions = portfolio.positions
+                if len(positions) >= max_open_positions:
+                    logger.warning(f"Maximum open positions ({max_open_positions}) reached")
+                    return False
+                
+                symbol = order.symbol
+                if order.side is buy and symbol in positions:
+                    logger.warning(f"Already have position in {symbol}")
+                    return False
+                
+                # Position size and single asset concentration
+                total_value = portfolio.total_value
+                order_value = order.amount * (order.price or 0)
+                max_position_value = total_value * max_position_size
+                if order_value > max_position_value:
+                    logger.warning(f"Order value {order_value} exceeds max position size {max_position_value}")
+                    return False
+                
+                base = base_asset(symbol)
+                _, _, value_by_base, _ = portfolio.exposure()
+                if value_by_base.get(base, 0.0) + order_value > total_value * max_single_asset:
+                    logger.warning(f"Asset concentration for {base} would exceed limit")
+                    return False
+                
+                # Correlation
+                if not validate_correlation(order, portfolio):
+                    return False
+                
+                # Portfolio risk
+                if manager.daily_pnl < -total_value * max_daily_loss:
+                    logger.warning("Daily loss limit reached")
+                    return False
+                
+                if total_value > 0:
+                    peak = manager.max_portfolio_value
+                    current_drawdown = (peak - total_value) / peak
+                    if current_drawdown > max_drawdown:
+                        logger.warning(f"Maximum drawdown {current_drawdown:.2%} exceeded")
+                        return False
+                
+                logger.info(f"Order {order.id} passed all risk validations")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Risk validation error: {e}")
                 return False
         
-        return True
+        return validate_order
+    
+    def validate_order(self, order: Order, portfolio: Portfolio) -> bool:
+        """
+        Validate if order passes all risk checks. Instances shadow this
+        with the closure from ``_build_validator``, which holds the checks.
+        """
+        return self._build_validator()(order, portfolio)
     
     def _validate_correlation(self, order: Order, portfolio: Portfolio) -> bool:
         """Validate correlation risk"""
@@ -167,47 +238,46 @@ class AdvancedRiskManager(RiskManager):
         
         # This is a simplified correlation check
         # In production, would use actual price correlations
-        base_asset = order.symbol.split('/')[0]
-        similar_positions = [
-            pos for pos in portfolio.positions.values()
-            if pos.symbol.split('/')[0] in ['BTC', 'ETH'] and base_asset in ['BTC', 'ETH']
-        ]
+        base = base_asset(order.symbol)
         
-        if len(similar_positions) >= 2:
-            logger.warning("High correlation risk detected")
-            return False
+        for members in self._HIGH_CORR_CLUSTERS.values():
+            if base not in members:
+                continue
+            
+            _, _, _, count_by_base = portfolio.exposure()
+            if sum(count_by_base.get(member, 0) for member in members) >= 2:
+                logger.warning("High correlation risk detected")
+                return False
         
         return True
     
-    def _validate_trading_hours(self) -> bool:
-        """Validate trading hours"""
+    def _validate_trading_hours(self, now: Optional[float] = None) -> bool:
+        """Validate trading hours at now, a UNIX timestamp (default: the clock)"""
         # Crypto markets are 24/7, but can add restrictions if needed
-        current_time = datetime.utcnow()
+        if now is None:
+            now = time.time()
+        seconds = int(now)
+        weekday = (seconds // 86400 + 3) % 7  # The epoch fell on a Thursday
+        hour = seconds % 86400 // 3600
         
         # Example: No trading on maintenance days
-        if current_time.weekday() == 6 and current_time.hour < 6:  # Sunday early morning
+        if weekday == 6 and hour < 6:  # Sunday early morning
             logger.warning("Trading restricted during maintenance window")
             return False
         
         return True
     
-    def _validate_daily_limits(self) -> bool:
-        """Validate daily trading limits"""
-        if self.daily_trades >= self.risk_limits.max_trades_per_day:
-            logger.warning(f"Daily trade limit {self.risk_limits.max_trades_per_day} reached")
-            return False
-        
-        return True
-    
-    def _update_daily_counters(self):
-        """Update daily trading counters"""
-        current_date = datetime.utcnow().date()
+    def _update_daily_counters(self, now: Optional[float] = None):
+        """Update daily trading counters as of now, a UNIX timestamp (default: the clock)"""
+        if now is None:
+            now = time.time()
+        day = int(now // 86400)  # UTC day number, no datetime needed
         
-        if self.last_trade_date != current_date:
+        if day != self._last_trade_day:
             # Reset daily counters
             self.daily_trades = 0
             self.daily_pnl = 0.0
-            self.last_trade_date = current_date
+            self._last_trade_day = day
     
     def calculate_position_size(
         self, 
@@ -226,9 +296,16 @@ class AdvancedRiskManager(RiskManager):
         # Method 3: Volatility-based sizing
         volatility_size = self._calculate_volatility_size(signal, portfolio)
         
-        # Use the most conservative size
-        sizes = [fixed_size, kelly_size, volatility_size]
-        optimal_size = min(size for size in sizes if size > 0)
+        # Use the most conservative positive size; methods that opted out
+        # (size 0) become +inf, and if all did the size is 0
+        sizes = (fixed_size, kelly_size, volatility_size)
+        optimal_size = min(
+            fixed_size if fixed_size > 0 else math.inf,
+            kelly_size if kelly_size > 0 else math.inf,
+            volatility_size if volatility_size > 0 else math.inf
+        )
+        if optimal_size == math.inf:
+            optimal_size = 0.0
         
         # Apply maximum position size limit
         max_size = portfolio.total_value * self.risk_limits.max_position_size / signal.price
@@ -276,37 +353,39 @@ class AdvancedRiskManager(RiskManager):
         # Calculate risk metrics
         metrics = self._calculate_risk_metrics(portfolio)
         
-        # Check risk limits
-        risk_alerts = []
-        
-        # Drawdown check
-        if portfolio.total_value > 0:
-            current_drawdown = (self.max_portfolio_value - portfolio.total_value) / self.max_portfolio_value
-            if current_drawdown > self.risk_limits.max_drawdown * 0.8:  # 80% of limit
-                risk_alerts.append(f"Approaching max drawdown: {current_drawdown:.2%}")
+        total_value = portfolio.total_value
+        limits = self.risk_limits
         
-        # Concentration check
+        current_drawdown = 0
+        daily_loss_pct = 0
+        if total_value > 0:
+            current_drawdown = (self.max_portfolio_value - total_value) / self.max_portfolio_value
+            daily_loss_pct = abs(self.daily_pnl) / total_value
         concentration = self._calculate_concentration_risk(portfolio)
-        if concentration > 0.8:
-            risk_alerts.append(f"High concentration risk: {concentration:.2%}")
         
-        # Daily loss check
-        daily_loss_pct = abs(self.daily_pnl) / portfolio.total_value if portfolio.total_value > 0 else 0
-        if daily_loss_pct > self.risk_limits.max_daily_loss * 0.8:
-            risk_alerts.append(f"Approaching daily loss limit: {daily_loss_pct:.2%}")
+        # Check risk limits in one pass: alert above 80% of the drawdown and
+        # daily loss limits, or above 80% concentration; messages are only
+        # formatted for the checks that fire
+        values = (current_drawdown, concentration, daily_loss_pct)
+        thresholds = (limits.max_drawdown * 0.8, 0.8, limits.max_daily_loss * 0.8)
+        risk_alerts = [
+            template.format(value)
+            for template, value, threshold in zip(_RISK_ALERTS, values, thresholds)
+            if value > threshold
+        ]
         
         return {
             'risk_metrics': metrics,
             'risk_alerts': risk_alerts,
             'daily_trades': self.daily_trades,
             'daily_pnl': self.daily_pnl,
-            'max_drawdown': current_drawdown if portfolio.total_value > 0 else 0,
+            'max_drawdown': current_drawdown,
             'concentration_risk': concentration
         }
     
     def _calculate_risk_metrics(self, portfolio: Portfolio) -> Dict[str, float]:
         """Calculate comprehensive risk metrics"""
-        if not self.equity_curve or len(self.equity_curve) < 2:
+        if self._eq_len < 2:
             return {
                 'max_drawdown': 0.0,
                 'var_95': 0.0,
@@ -315,71 +394,184 @@ class AdvancedRiskManager(RiskManager):
                 'concentration_risk': 0.0
             }
         
-        returns = np.diff(self.equity_curve) / np.array(self.equity_curve[:-1])
-        
         return {
-            'max_drawdown': self._calculate_max_drawdown(),
-            'var_95': np.percentile(returns, 5) if len(returns) > 0 else 0.0,
-            'sharpe_ratio': self._calculate_sharpe_ratio(returns),
-            'volatility': np.std(returns) * np.sqrt(252) if len(returns) > 0 else 0.0,
+            **self._equity_metrics(),
             'concentration_risk': self._calculate_concentration_risk(portfolio)
         }
     
-    def _calculate_max_drawdown(self) -> float:
-        """Calculate maximum drawdown from equity curve"""
-        if len(self.equity_curve) < 2:
-            return 0.0
-        
-        peak = self.equity_curve[0]
-        max_dd = 0.0
-        
-        for value in self.equity_curve[1:]:
-            if value > peak:
-                peak = value
+    def _equity_metrics(self) -> Dict[str, float]:
+        """Drawdown, VaR, Sharpe and volatility, recomputed only after a trade"""
+        if self._last_metrics_version != self._version:
+            std = math.sqrt(max(self._ret_m2, 0.0) / self._ret_n)
             
-            drawdown = (peak - value) / peak
-            max_dd = max(max_dd, drawdown)
+            self._last_metrics = {
+                'max_drawdown': self._calculate_max_drawdown(),
+                'var_95': self._calculate_var_95(),
+                'sharpe_ratio': self._ret_mean / std * _SQRT_252 if std > 0 else 0.0,
+                'volatility': std * _SQRT_252
+            }
+            self._last_metrics_version = self._version
         
-        return max_dd
+        return self._last_metrics
     
-    def _calculate_sharpe_ratio(self, returns: np.ndarray) -> float:
-        """Calculate Sharpe ratio"""
-        if len(returns) == 0:
-            return 0.0
-        
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-        
-        if std_return == 0:
-            return 0.0
+    @property
+    def equity_curve(self) -> List[float]:
+        """Recent portfolio values, oldest first"""
+        return self._equity_view().tolist()
+    
+    def _equity_view(self) -> np.ndarray:
+        """Equity curve in chronological order, cached until the next trade"""
+        if self._equity_arr is None:
+            head = self._eq_head
+            if self._eq_len < EQUITY_WINDOW or head == 0:
+                # Not yet wrapped (or wrapped exactly): a contiguous slice, no copy
+                self._equity_arr = self._eq_buf[:self._eq_len]
+            else:
+                self._equity_arr = np.concatenate((self._eq_buf[head:], self._eq_buf[:head]))
+        return self._equity_arr
+    
+    def _calculate_max_drawdown(self) -> float:
+        """Maximum drawdown over the equity window, maintained incrementally"""
+        if self._dd_stale:
+            self._recompute_drawdown()
         
-        # Annualized Sharpe ratio (assuming daily returns)
-        return (mean_return * 252) / (std_return * np.sqrt(252))
+        return self._cached_max_dd
+    
+    def _recompute_drawdown(self):
+        """Rebuild the running peak and max drawdown from the whole window"""
+        equity = self._equity_view()
+        
+        if equity.size == 0:
+            self._running_peak = 0.0
+            self._cached_max_dd = 0.0
+        else:
+            peaks = np.maximum.accumulate(equity)
+            drawdowns = np.where(peaks > 0, (peaks - equity) / peaks, 0.0)
+            self._running_peak = float(peaks[-1])
+            self._cached_max_dd = float(drawdowns.max())
+        
+        self._dd_stale = False
     
     def _calculate_concentration_risk(self, portfolio: Portfolio) -> float:
         """Calculate portfolio concentration risk"""
         if not portfolio.positions:
             return 0.0
         
-        total_value = sum(pos.market_value for pos in portfolio.positions.values())
+        total_value, sum_sq, _, _ = portfolio.exposure()
         if total_value == 0:
             return 0.0
         
-        # Calculate Herfindahl-Hirschman Index
-        weights = [pos.market_value / total_value for pos in portfolio.positions.values()]
-        hhi = sum(w**2 for w in weights)
+        # Herfindahl-Hirschman Index: sum of squared weights
+        return sum_sq / (total_value * total_value)
+    
+    def _calculate_var_95(self) -> float:
+        """5th percentile of window returns (linear interpolation, as np.percentile)"""
+        n = self._ret_n
+        if n == 0:
+            return 0.0
+        
+        if self._tail_stale:
+            equity = self._equity_view()
+            returns = (np.diff(equity) / equity[:-1]).tolist()
+            self._worst_returns = [-r for r in heapq.nsmallest(self._tail_k, returns)]
+            heapq.heapify(self._worst_returns)
+            self._tail_stale = False
+        
+        smallest = sorted(-r for r in self._worst_returns)
+        pos = 0.05 * (n - 1)
+        lo = int(pos)
         
-        return hhi
+        if lo + 1 < n:
+            return smallest[lo] + (smallest[lo + 1] - smallest[lo]) * (pos - lo)
+        return smallest[lo]
+    
+    def _resize_tail(self):
+        """Track how many smallest returns the percentile needs for the window size"""
+        k = min(int(0.05 * (self._ret_n - 1)) + 2, self._ret_n) if self._ret_n > 0 else 0
+        if k != self._tail_k:
+            self._tail_k = k
+            self._tail_stale = True
+    
+    def _add_return(self, r: float):
+        """Stream a return entering the window into the Welford stats and VaR tail"""
+        self._ret_n += 1
+        delta = r - self._ret_mean
+        self._ret_mean += delta / self._ret_n
+        self._ret_m2 += delta * (r - self._ret_mean)
+        
+        self._resize_tail()
+        if not self._tail_stale:
+            tail = self._worst_returns
+            if len(tail) < self._tail_k:
+                heapq.heappush(tail, -r)
+            elif -r > tail[0]:
+                heapq.heapreplace(tail, -r)
+    
+    def _remove_return(self, r: float):
+        """Stream a return leaving the window out of the Welford stats and VaR tail"""
+        # Only a return inside the kept tail invalidates it
+        if not self._tail_stale and self._worst_returns and -r >= self._worst_returns[0]:
+            self._tail_stale = True
+        
+        if self._ret_n <= 1:
+            self._ret_n, self._ret_mean, self._ret_m2 = 0, 0.0, 0.0
+        else:
+            old_mean = self._ret_mean
+            self._ret_n -= 1
+            self._ret_mean = (old_mean * (self._ret_n + 1) - r) / self._ret_n
+            self._ret_m2 -= (r - old_mean) * (r - self._ret_mean)
+        
+        self._resize_tail()
+    
+    def _reset_return_stats(self):
+        """Recompute the return statistics exactly from the window"""
+        equity = self._equity_view()
+        returns = np.diff(equity) / equity[:-1]
+        
+        self._ret_n = returns.size
+        self._ret_mean = float(returns.mean()) if returns.size else 0.0
+        self._ret_m2 = float(np.square(returns - self._ret_mean).sum())
     
     def update_after_trade(self, trade: Trade, portfolio: Portfolio):
         """Update risk manager after trade execution"""
         self.daily_trades += 1
         self.daily_pnl += trade.pnl
-        self.equity_curve.append(portfolio.total_value)
-        
-        # Keep only last 252 days of equity curve (1 year)
-        if len(self.equity_curve) > 252:
-            self.equity_curve = self.equity_curve[-252:]
+        value = portfolio.total_value
+        
+        # Evicting a point only moves the drawdown if it was a peak the next
+        # point did not reach; then rebuild lazily on the next read
+        if self._eq_len == EQUITY_WINDOW:
+            evicted = self._eq_buf[self._eq_head]
+            if evicted > self._eq_buf[(self._eq_head + 1) % EQUITY_WINDOW]:
+                self._dd_stale = True
+        
+        if not self._dd_stale:
+            if value > self._running_peak:
+                self._running_peak = value
+            elif self._running_peak > 0:
+                drawdown = (self._running_peak - value) / self._running_peak
+                if drawdown > self._cached_max_dd:
+                    self._cached_max_dd = drawdown
+        
+        # Stream the new return in, and the evicted one out
+        head = self._eq_head
+        if self._eq_len == EQUITY_WINDOW:
+            oldest = self._eq_buf[head]
+            self._remove_return((self._eq_buf[(head + 1) % EQUITY_WINDOW] - oldest) / oldest)
+        if self._eq_len > 0:
+            prev = self._eq_buf[head - 1]
+            self._add_return((value - prev) / prev)
+        
+        # Overwrite the oldest point once the window (1 year) is full
+        self._eq_buf[head] = value
+        self._eq_head = (head + 1) % EQUITY_WINDOW
+        self._eq_len = min(self._eq_len + 1, EQUITY_WINDOW)
+        self._equity_arr = None
+        self._version += 1
+        
+        # Clear accumulated rounding once per trip around the buffer
+        if self._eq_head == 0:
+            self._reset_return_stats()
     
     def get_risk_score(self, portfolio: Portfolio) -> float:
         """Calculate overall risk score (0-100, higher = riskier)"""
@@ -451,8 +643,7 @@ class VaRCalculator:
         portfolio_volatility = 0.02  # 2% daily volatility assumption
         
         # Calculate VaR using normal distribution
-        from scipy.stats import norm
-        var = total_value * norm.ppf(1 - confidence) * portfolio_volatility
+        var = total_value * _z_score(confidence) * portfolio_volatility
         
         return abs(var)
 
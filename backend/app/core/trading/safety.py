@@ -3,20 +3,60 @@ Safety Guardrails and Kill Switches for Trading Bots.
 """
 
 import asyncio
+import time
 import uuid
-from typing import Dict, List, Optional, Any, Callable
+from collections import Counter, deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Any, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
-import pandas as pd
 import numpy as np
 
-from app.core.trading.base import TradingBot, Portfolio, Order, Trade, BotStatus
+from app.core.trading.base import (
+    TradingBot, Portfolio, Order, Trade, BotStatus, datetime_to_ns
+)
+from app.utils.jit import njit
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+# Monitoring loop event kinds, queued as (kind, bot_id)
+_EVENT_TICK = "tick"
+_EVENT_BOT = "bot"
+_EVENT_STOP = "stop"
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# Exchange status probes allowed in flight at once
+_MAX_CONCURRENT_PROBES = 8
+
+# Seconds an exchange status probe result is reused for
+_EXCHANGE_STATUS_TTL = 30.0
+
+# Correlation rule: returns kept per symbol, and samples needed to judge
+_CORRELATION_WINDOW = 100
+_MIN_CORRELATION_SAMPLES = 20
+_MIN_RETURN_VARIANCE = 1e-14  # Below this a symbol's returns count as flat
+
+# Suspicious activity: mean gap between the last trades below this is flagged
+_SUSPICIOUS_TRADE_COUNT = 10
+_MIN_AVG_TRADE_GAP_NS = 60 * 1_000_000_000
+
+# Hard cap on retained alerts, on top of the 7-day expiry
+_MAX_ALERTS = 100_000
+
+# Alerts waiting for handler delivery, and seconds each handler may take
+_ALERT_QUEUE_SIZE = 10_000
+_ALERT_HANDLER_TIMEOUT = 5.0
+
+# Repeat triggers of a rule for a bot within the same minute are dropped;
+# fingerprints are remembered for five minutes (monotonic ns)
+_ALERT_DEDUP_BUCKET_NS = 60 * 1_000_000_000
+_ALERT_FINGERPRINT_TTL_NS = 300 * 1_000_000_000
+
+
 class AlertLevel(Enum):
     """Alert severity levels"""
     INFO = "info"
@@ -25,6 +65,10 @@ class AlertLevel(Enum):
     EMERGENCY = "emergency"
 
 
+# Levels counted as critical in the safety status
+_CRITICAL_LEVELS = frozenset((AlertLevel.CRITICAL, AlertLevel.EMERGENCY))
+
+
 class TriggerType(Enum):
     """Safety trigger types"""
     DRAWDOWN = "drawdown"
@@ -38,7 +82,7 @@ class TriggerType(Enum):
     SUSPICIOUS_ACTIVITY = "suspicious_activity"
 
 
-@dataclass
+@dataclass(slots=True)
 class SafetyAlert:
     """Safety alert information"""
     id: str
@@ -52,7 +96,7 @@ class SafetyAlert:
     actions_taken: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class SafetyRule:
     """Safety rule configuration"""
     id: str
@@ -64,9 +108,10 @@ class SafetyRule:
     action: str = "pause"  # pause, stop, alert
     cooldown_period: int = 300  # seconds before rule can trigger again
     last_triggered: Optional[datetime] = None
+    last_triggered_ns: Optional[int] = None  # time.monotonic_ns() at last trigger, for cooldowns
 
 
-@dataclass
+@dataclass(slots=True)
 class KillSwitch:
     """Emergency kill switch configuration"""
     id: str
@@ -81,6 +126,106 @@ class KillSwitch:
     activated_by: Optional[str] = None
 
 
+class ReturnsWindow:
+    """
+    Rolling window of simple returns for a fixed set of symbols, with the
+    running sums of returns and of their outer products, so correlations
+    come from O(N^2) sufficient statistics instead of a pass over the window.
+    """
+    
+    def __init__(self, symbols: tuple, size: int = _CORRELATION_WINDOW):
+        n = len(symbols)
+        self.symbols = symbols
+        self.returns = np.zeros((size, n), dtype=np.float64)
+        self.count = 0
+        self._head = 0
+        self._last_prices: Optional[np.ndarray] = None
+        self._sum = np.zeros(n, dtype=np.float64)
+        self._sum_outer = np.zeros((n, n), dtype=np.float64)
+    
+    def add_prices(self, prices: np.ndarray):
+        """Record one price observation; unchanged prices add no return"""
+        last = self._last_prices
+        if last is not None and not np.array_equal(prices, last) and (last > 0).all():
+            row = prices / last - 1.0
+            size = len(self.returns)
+            
+            # Rank-1 update: drop the row falling out of the window, add the new one
+            if self.count == size:
+                old = self.returns[self._head]
+                self._sum -= old
+                self._sum_outer -= np.outer(old, old)
+            self._sum += row
+            self._sum_outer += np.outer(row, row)
+            
+            self.returns[self._head] = row
+            self._head = (self._head + 1) % size
+            self.count = min(self.count + 1, size)
+            
+            # Rebuild the sums once per lap so rounding can't accumulate
+            if self._head == 0:
+                self._sum = self.returns.sum(axis=0)
+                self._sum_outer = self.returns.T @ self.returns
+        self._last_prices = prices
+    
+    def max_correlation(self) -> float:
+        """
+        Largest absolute pairwise Pearson correlation in the window.
+        Symbols whose returns haven't varied are left out.
+        """
+        count = self.count
+        if count < _MIN_CORRELATION_SAMPLES:
+            return 0.0
+        
+        mean = self._sum / count
+        cov = (self._sum_outer - count * np.outer(mean, mean)) / (count - 1)
+        var = np.diag(cov)
+        live = var > _MIN_RETURN_VARIANCE
+        if live.sum() < 2:
+            return 0.0
+        
+        std = np.sqrt(var[live])
+        corr = cov[np.ix_(live, live)] / np.outer(std, std)
+        np.fill_diagonal(corr, 0.0)
+        return float(min(np.abs(corr).max(), 1.0))
+
+
+@dataclass
+class RuleState:
+    """Running per-bot quantities the safety rules are checked against"""
+    peak_value: float = 0.0
+    daily_pnl: float = 0.0
+    daily_anchor_ns: int = 0  # Start of the day daily_pnl covers, ns since epoch
+    consecutive_losses: int = 0
+    last_position_pct: float = 0.0
+    trades_seen: int = 0  # Trades already folded into the running values
+    trades_key: int = 0  # id() of the trades list they were folded from
+    returns_window: Optional[ReturnsWindow] = None  # Returns of the held symbols
+
+
+@njit(cache=True)
+def _fold_trades(pnl, exit_ns, start, stop, today_ns, losses):
+    """
+    Fold trades [start, stop) into the running rule state in one pass:
+    returns (PnL of those closed since today_ns, updated losing streak).
+    """
+    daily_pnl = 0.0
+    for i in range(start, stop):
+        trade_pnl = pnl[i]
+        if exit_ns[i] >= today_ns:
+            daily_pnl += trade_pnl
+        if trade_pnl < 0:
+            losses += 1
+        else:
+            losses = 0
+    return daily_pnl, losses
+
+
+def _day_start_ns(current_time: datetime) -> int:
+    """Start of the UTC day containing current_time, ns since epoch"""
+    return datetime_to_ns(current_time) // _NS_PER_DAY * _NS_PER_DAY
+
+
 class SafetyManager:
     """
     Comprehensive safety management system that monitors trading bots
@@ -90,23 +235,59 @@ class SafetyManager:
     def __init__(self):
         self.bots: Dict[str, TradingBot] = {}
         self.safety_rules: Dict[str, SafetyRule] = {}
+        self._rules_by_type: Dict[TriggerType, List[SafetyRule]] = {}
         self.kill_switches: Dict[str, KillSwitch] = {}
-        self.alerts: List[SafetyAlert] = []
+        self.alerts: Deque[SafetyAlert] = deque(maxlen=_MAX_ALERTS)  # Oldest first
+        self._alert_fingerprints: Dict[tuple, int] = {}  # fingerprint -> expiry (monotonic ns)
         
         # Monitoring state
         self.monitoring_active = False
         self.monitor_interval = 10  # seconds
         self.last_check: Dict[str, datetime] = {}
+        self.rule_state: Dict[str, RuleState] = {}
+        
+        # Bot events wake the monitoring loop; otherwise it parks until
+        # the next periodic sweep is due
+        self.event_queue: asyncio.Queue = asyncio.Queue()
+        self._trade_handlers: Dict[str, Callable] = {}
+        self._probe_sem = asyncio.Semaphore(_MAX_CONCURRENT_PROBES)
+        
+        # Probe per exchange instance, shared by the bots trading on it:
+        # id(exchange) -> (probed_at, exchange, probe task)
+        self._exchange_status: Dict[int, tuple] = {}
         
         # Statistics
         self.total_alerts = 0
         self.total_interventions = 0
         self.bots_stopped_by_safety = 0
         
-        # Event handlers
+        # Open alert and kill switch counts, kept on every state change so
+        # get_safety_status doesn't rescan the alert history
+        self._counts: Dict[str, int] = {
+            'active_alerts': 0,
+            'critical_alerts': 0,
+            'active_kill_switches': 0,
+        }
+        
+        # Event handlers; while monitoring runs, alerts reach them through
+        # a queue drained by a separate worker task
         self.alert_handlers: List[Callable] = []
+        self._alert_queue: asyncio.Queue = asyncio.Queue(maxsize=_ALERT_QUEUE_SIZE)
+        self._alert_worker_task: Optional[asyncio.Task] = None
         self.intervention_handlers: List[Callable] = []
         
+        # Per-type rule evaluators
+        self._evaluators: Dict[TriggerType, Callable] = {
+            TriggerType.DRAWDOWN: self._drawdown_value,
+            TriggerType.DAILY_LOSS: self._daily_loss_value,
+            TriggerType.CONSECUTIVE_LOSSES: self._consecutive_losses_value,
+            TriggerType.POSITION_SIZE: self._position_size_value,
+            TriggerType.CORRELATION: self._correlation_value,
+            TriggerType.VOLATILITY: self._volatility_value,
+            TriggerType.EXCHANGE_ISSUES: self._exchange_issues_value,
+            TriggerType.SUSPICIOUS_ACTIVITY: self._suspicious_activity_value,
+        }
+        
         # Initialize default safety rules
         self._initialize_default_rules()
     
@@ -114,17 +295,17 @@ class SafetyManager:
         """Initialize default safety rules"""
         
         # Max drawdown rule
-        self.safety_rules["max_drawdown"] = SafetyRule(
+        self.add_rule(SafetyRule(
             id="max_drawdown",
             name="Maximum Drawdown Protection",
             trigger_type=TriggerType.DRAWDOWN,
             threshold_value=0.15,  # 15%
             action="pause",
             cooldown_period=3600  # 1 hour
-        )
+        ))
         
         # Daily loss limit
-        self.safety_rules["daily_loss_limit"] = SafetyRule(
+        self.add_rule(SafetyRule(
             id="daily_loss_limit",
             name="Daily Loss Limit",
             trigger_type=TriggerType.DAILY_LOSS,
@@ -132,41 +313,59 @@ class SafetyManager:
             time_window=86400,  # 24 hours
             action="pause",
             cooldown_period=3600
-        )
+        ))
         
         # Consecutive losses
-        self.safety_rules["consecutive_losses"] = SafetyRule(
+        self.add_rule(SafetyRule(
             id="consecutive_losses",
             name="Consecutive Losses Protection",
             trigger_type=TriggerType.CONSECUTIVE_LOSSES,
             threshold_value=5,  # 5 consecutive losses
             action="pause",
             cooldown_period=1800  # 30 minutes
-        )
+        ))
         
         # Large position size
-        self.safety_rules["large_position"] = SafetyRule(
+        self.add_rule(SafetyRule(
             id="large_position",
             name="Large Position Size Alert",
             trigger_type=TriggerType.POSITION_SIZE,
             threshold_value=0.25,  # 25% of portfolio
             action="alert",
             cooldown_period=300
-        )
+        ))
         
         # High correlation
-        self.safety_rules["high_correlation"] = SafetyRule(
+        self.add_rule(SafetyRule(
             id="high_correlation",
             name="High Correlation Warning",
             trigger_type=TriggerType.CORRELATION,
             threshold_value=0.8,  # 80% correlation
             action="alert",
             cooldown_period=1800
-        )
+        ))
         
         # Initialize default kill switches
         self._initialize_default_kill_switches()
     
+    def add_rule(self, rule: SafetyRule):
+        """Add a safety rule, replacing any rule with the same id"""
+        self.remove_rule(rule.id)
+        self.safety_rules[rule.id] = rule
+        self._rules_by_type.setdefault(rule.trigger_type, []).append(rule)
+    
+    def remove_rule(self, rule_id: str) -> bool:
+        """Remove a safety rule"""
+        rule = self.safety_rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        
+        rules = self._rules_by_type[rule.trigger_type]
+        rules.remove(rule)
+        if not rules:
+            del self._rules_by_type[rule.trigger_type]
+        return True
+    
     def _initialize_default_kill_switches(self):
         """Initialize default kill switches"""
         
@@ -205,16 +404,40 @@ class SafetyManager:
         """Register a bot for safety monitoring"""
         self.bots[bot.bot_id] = bot
         self.last_check[bot.bot_id] = datetime.utcnow()
+        self.rule_state[bot.bot_id] = RuleState()
+        
+        handler = self._make_trade_handler(bot.bot_id)
+        self._trade_handlers[bot.bot_id] = handler
+        bot.add_trade_handler(handler)
+        
+        # Check the new bot right away rather than at the next sweep
+        if self.monitoring_active:
+            self.event_queue.put_nowait((_EVENT_BOT, bot.bot_id))
+        
         logger.info(f"Registered bot {bot.name} ({bot.bot_id}) for safety monitoring")
     
     def unregister_bot(self, bot_id: str):
         """Unregister a bot from safety monitoring"""
         if bot_id in self.bots:
-            del self.bots[bot_id]
-            if bot_id in self.last_check:
-                del self.last_check[bot_id]
+            bot = self.bots.pop(bot_id)
+            self.last_check.pop(bot_id, None)
+            self.rule_state.pop(bot_id, None)
+            
+            handler = self._trade_handlers.pop(bot_id, None)
+            if handler in bot.on_trade_handlers:
+                bot.on_trade_handlers.remove(handler)
+            
             logger.info(f"Unregistered bot {bot_id} from safety monitoring")
     
+    def _make_trade_handler(self, bot_id: str) -> Callable:
+        """Trade handler that queues a safety check for the bot"""
+        
+        async def on_trade(trade: Trade):
+            if self.monitoring_active:
+                self.event_queue.put_nowait((_EVENT_BOT, bot_id))
+        
+        return on_trade
+    
     async def start_monitoring(self):
         """Start safety monitoring"""
         if self.monitoring_active:
@@ -223,37 +446,78 @@ class SafetyManager:
         self.monitoring_active = True
         logger.info("Started safety monitoring")
         
+        self._alert_worker_task = asyncio.create_task(self._alert_worker())
+        
         # Start monitoring loop
-        await self._monitoring_loop()
+        try:
+            await self._monitoring_loop()
+        finally:
+            # Let the worker deliver what is already queued, then stop it
+            worker, self._alert_worker_task = self._alert_worker_task, None
+            await self._alert_queue.put(None)
+            await worker
     
     async def stop_monitoring(self):
         """Stop safety monitoring"""
         self.monitoring_active = False
+        self.event_queue.put_nowait((_EVENT_STOP, None))
         logger.info("Stopped safety monitoring")
     
     async def _monitoring_loop(self):
-        """Main safety monitoring loop"""
+        """
+        Main safety monitoring loop. Bot events are handled as soon as they
+        are queued; a full sweep runs at most monitor_interval apart, as a
+        safety net for price- and time-driven rules.
+        """
+        loop = asyncio.get_running_loop()
+        next_sweep = loop.time()
+        
         while self.monitoring_active:
+            timeout = next_sweep - loop.time()
+            if timeout <= 0:
+                event = (_EVENT_TICK, None)
+            else:
+                try:
+                    event = await asyncio.wait_for(self.event_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    event = (_EVENT_TICK, None)
+            
+            if event[0] == _EVENT_TICK:
+                next_sweep = loop.time() + self.monitor_interval
+            
             try:
-                current_time = datetime.utcnow()
-                
-                # Check each registered bot
-                for bot_id, bot in self.bots.items():
-                    await self._check_bot_safety(bot, current_time)
-                
-                # Check kill switches
-                await self._check_kill_switches(current_time)
-                
-                # Clean up old alerts
-                await self._cleanup_old_alerts()
-                
-                await asyncio.sleep(self.monitor_interval)
-                
+                await self._dispatch(event)
             except Exception as e:
                 logger.error(f"Error in safety monitoring loop: {e}")
-                await asyncio.sleep(30)  # Wait before retrying
     
-    async def _check_bot_safety(self, bot: TradingBot, current_time: datetime):
+    async def _dispatch(self, event: tuple):
+        """Handle one monitoring event"""
+        kind, bot_id = event
+        current_time = datetime.utcnow()
+        today_ns = _day_start_ns(current_time)
+        now_ns = time.monotonic_ns()
+        
+        if kind == _EVENT_BOT:
+            # A trade or registration only moves its own bot's rules
+            bot = self.bots.get(bot_id)
+            if bot is not None:
+                await self._check_bot_safety(bot, current_time, today_ns, now_ns)
+        
+        elif kind == _EVENT_TICK:
+            # Price-driven rules and kill switches still need a periodic pass
+            for bot in list(self.bots.values()):
+                await self._check_bot_safety(bot, current_time, today_ns, now_ns)
+            
+            await self._check_kill_switches(current_time)
+            await self._cleanup_old_alerts(current_time, now_ns)
+    
+    async def _check_bot_safety(
+        self, 
+        bot: TradingBot, 
+        current_time: datetime, 
+        today_ns: Optional[int] = None, 
+        now_ns: Optional[int] = None
+    ):
         """Check safety rules for a specific bot"""
         
         try:
@@ -261,195 +525,227 @@ class SafetyManager:
             if bot.status != BotStatus.RUNNING:
                 return
             
-            # Check each safety rule
-            for rule_id, rule in self.safety_rules.items():
-                if not rule.enabled:
-                    continue
-                
-                # Check cooldown
-                if (rule.last_triggered and 
-                    (current_time - rule.last_triggered).total_seconds() < rule.cooldown_period):
-                    continue
-                
-                # Check rule condition
-                triggered = await self._check_safety_rule(bot, rule, current_time)
+            if today_ns is None:
+                today_ns = _day_start_ns(current_time)
+            if now_ns is None:
+                now_ns = time.monotonic_ns()
+            state = self._update_rule_state(bot, today_ns)
+            
+            # Rules are bucketed by trigger type; each type's value is
+            # computed at most once, and only if one of its rules is live
+            for trigger_type, rules in self._rules_by_type.items():
+                value = None
+                evaluated = False
                 
-                if triggered:
-                    await self._handle_safety_trigger(bot, rule, current_time)
-                    rule.last_triggered = current_time
+                for rule in rules:
+                    if not rule.enabled:
+                        continue
+                    
+                    # Check cooldown
+                    if (rule.last_triggered_ns is not None and 
+                        now_ns - rule.last_triggered_ns < rule.cooldown_period * 1_000_000_000):
+                        continue
+                    
+                    if not evaluated:
+                        value = await self._evaluate_trigger(bot, trigger_type, state)
+                        evaluated = True
+                    
+                    if value is not None and value >= rule.threshold_value:
+                        await self._handle_safety_trigger(bot, rule, current_time, now_ns)
+                        rule.last_triggered = current_time
+                        rule.last_triggered_ns = now_ns
         
         except Exception as e:
             logger.error(f"Error checking safety for bot {bot.bot_id}: {e}")
     
-    async def _check_safety_rule(
+    def _update_rule_state(self, bot: TradingBot, today_ns: int) -> RuleState:
+        """
+        Fold trades closed since the last check and the current portfolio
+        value into the bot's running rule state.
+        
+        The portfolio's trade list stays the source of truth, so trades
+        restored from a checkpoint are counted as well as emitted ones.
+        """
+        state = self.rule_state.get(bot.bot_id)
+        if state is None:
+            state = self.rule_state[bot.bot_id] = RuleState()
+        
+        portfolio = bot.portfolio
+        trades = portfolio.trades
+        pnl, _, exit_ns = portfolio.trade_arrays()
+        
+        # New day: the daily PnL restarts from zero
+        if state.daily_anchor_ns != today_ns:
+            state.daily_anchor_ns = today_ns
+            state.daily_pnl = 0.0
+        
+        # Trade list replaced or truncated: fold it again from the start
+        count = len(pnl)
+        if state.trades_key != id(trades) or state.trades_seen > count:
+            state.trades_key = id(trades)
+            state.trades_seen = 0
+            state.daily_pnl = 0.0
+            state.consecutive_losses = 0
+        
+        if state.trades_seen < count:
+            daily_pnl, losses = _fold_trades(
+                pnl, exit_ns, state.trades_seen, count, today_ns, state.consecutive_losses
+            )
+            state.daily_pnl += float(daily_pnl)
+            state.consecutive_losses = int(losses)
+            state.trades_seen = count
+        
+        # Peaks between checks are caught by the portfolio's own running peak
+        total_value = portfolio.total_value
+        if state.peak_value <= 0:
+            state.peak_value = getattr(bot, '_initial_portfolio_value', total_value)
+        state.peak_value = max(state.peak_value, portfolio.peak_value, total_value)
+        
+        if total_value > 0:
+            state.last_position_pct = portfolio.largest_position_value() / total_value
+        else:
+            state.last_position_pct = 0.0
+        
+        # Returns of the held symbols; a new set of positions starts a new window
+        positions = portfolio.positions
+        if len(positions) >= 2:
+            symbols = tuple(positions)
+            if state.returns_window is None or state.returns_window.symbols != symbols:
+                state.returns_window = ReturnsWindow(symbols)
+            state.returns_window.add_prices(np.fromiter(
+                (position.current_price for position in positions.values()),
+                dtype=np.float64, count=len(symbols)
+            ))
+        else:
+            state.returns_window = None
+        
+        return state
+    
+    async def _evaluate_trigger(
         self, 
         bot: TradingBot, 
-        rule: SafetyRule, 
-        current_time: datetime
-    ) -> bool:
-        """Check if a safety rule is triggered"""
+        trigger_type: TriggerType, 
+        state: RuleState
+    ) -> Optional[float]:
+        """
+        Value a trigger type's rules compare against their thresholds,
+        computed once per bot for all rules of that type. None means none
+        of them can fire.
+        """
+        evaluator = self._evaluators.get(trigger_type)
+        if evaluator is None:
+            return None
         
         try:
-            if rule.trigger_type == TriggerType.DRAWDOWN:
-                return await self._check_drawdown(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.DAILY_LOSS:
-                return await self._check_daily_loss(bot, rule, current_time)
-            
-            elif rule.trigger_type == TriggerType.CONSECUTIVE_LOSSES:
-                return await self._check_consecutive_losses(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.POSITION_SIZE:
-                return await self._check_position_size(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.CORRELATION:
-                return await self._check_correlation(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.VOLATILITY:
-                return await self._check_volatility(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.EXCHANGE_ISSUES:
-                return await self._check_exchange_issues(bot, rule)
-            
-            elif rule.trigger_type == TriggerType.SUSPICIOUS_ACTIVITY:
-                return await self._check_suspicious_activity(bot, rule)
-        
+            return await evaluator(bot, state)
         except Exception as e:
-            logger.error(f"Error checking safety rule {rule.id}: {e}")
-        
-        return False
+            logger.error(f"Error evaluating {trigger_type.value} safety rules: {e}")
+            return None
     
-    async def _check_drawdown(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check maximum drawdown"""
-        if bot.portfolio.total_value <= 0:
-            return False
-        
-        # Get initial value (simplified - would track from start)
-        initial_value = getattr(bot, '_initial_portfolio_value', bot.portfolio.total_value)
-        peak_value = max(initial_value, bot.portfolio.total_value)
+    async def _drawdown_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Drawdown from the running peak portfolio value"""
+        total_value = bot.portfolio.total_value
+        if total_value <= 0 or state.peak_value <= 0:
+            return None
         
-        current_drawdown = (peak_value - bot.portfolio.total_value) / peak_value
-        
-        return current_drawdown >= rule.threshold_value
+        return (state.peak_value - total_value) / state.peak_value
     
-    async def _check_daily_loss(
-        self, 
-        bot: TradingBot, 
-        rule: SafetyRule, 
-        current_time: datetime
-    ) -> bool:
-        """Check daily loss limit"""
-        
-        # Get trades from today
-        today_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_trades = [
-            trade for trade in bot.portfolio.trades
-            if trade.exit_time >= today_start
-        ]
-        
-        if not today_trades:
-            return False
-        
-        daily_pnl = sum(trade.pnl for trade in today_trades)
-        daily_loss_pct = abs(daily_pnl) / bot.portfolio.total_value if bot.portfolio.total_value > 0 else 0
+    async def _daily_loss_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Today's realized loss as a fraction of portfolio value"""
+        total_value = bot.portfolio.total_value
+        if state.daily_pnl >= 0 or total_value <= 0:
+            return None
         
-        return daily_pnl < 0 and daily_loss_pct >= rule.threshold_value
+        return -state.daily_pnl / total_value
     
-    async def _check_consecutive_losses(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check consecutive losses"""
-        
-        if len(bot.portfolio.trades) < rule.threshold_value:
-            return False
-        
-        # Check last N trades
-        recent_trades = bot.portfolio.trades[-int(rule.threshold_value):]
-        
-        return all(trade.pnl < 0 for trade in recent_trades)
+    async def _consecutive_losses_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Length of the current losing streak"""
+        return float(state.consecutive_losses)
     
-    async def _check_position_size(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check position size limits"""
-        
-        if bot.portfolio.total_value <= 0:
-            return False
-        
-        for position in bot.portfolio.positions.values():
-            position_value = position.size * position.current_price
-            position_pct = position_value / bot.portfolio.total_value
-            
-            if position_pct >= rule.threshold_value:
-                return True
-        
-        return False
+    async def _position_size_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Largest position as a fraction of portfolio value"""
+        return state.last_position_pct
     
-    async def _check_correlation(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check portfolio correlation"""
-        
-        # Simplified correlation check
-        # In production, would calculate actual price correlations
-        
-        if len(bot.portfolio.positions) < 2:
-            return False
-        
-        # Check for similar asset classes (simplified)
-        symbols = list(bot.portfolio.positions.keys())
-        crypto_count = sum(1 for symbol in symbols if any(base in symbol for base in ['BTC', 'ETH', 'BNB']))
+    async def _correlation_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Strongest pairwise return correlation between positions"""
+        if state.returns_window is None:
+            return None
         
-        correlation_risk = crypto_count / len(symbols)
-        
-        return correlation_risk >= rule.threshold_value
+        return state.returns_window.max_correlation()
     
-    async def _check_volatility(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check market volatility"""
+    async def _volatility_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """Market volatility"""
         
         # Simplified volatility check
         # Would need historical price data for proper calculation
         
-        return False  # Placeholder
+        return None  # Placeholder
     
-    async def _check_exchange_issues(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check for exchange connectivity issues"""
-        
-        try:
-            # Test exchange connection
-            if hasattr(bot.exchange, 'exchange') and bot.exchange.exchange:
-                # Simple connectivity test
-                await bot.exchange.exchange.fetch_status()
-                return False
-        except Exception:
-            return True
-        
-        return False
+    async def _exchange_issues_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """1.0 when the bot's exchange fails its status probe"""
+        return 1.0 if await self._probe_exchange(bot) else None
     
-    async def _check_suspicious_activity(self, bot: TradingBot, rule: SafetyRule) -> bool:
-        """Check for suspicious activity patterns"""
-        
-        # Check for unusual trading patterns
-        if len(bot.portfolio.trades) < 10:
+    async def _probe_exchange(self, bot: TradingBot) -> bool:
+        """
+        Probe the bot's exchange status; True if the probe fails. Bots on
+        the same exchange instance share one probe, reused for
+        _EXCHANGE_STATUS_TTL seconds.
+        """
+        exchange = getattr(bot.exchange, 'exchange', None)
+        if not exchange:
             return False
         
-        recent_trades = bot.portfolio.trades[-10:]
-        
-        # Check for rapid fire trading
-        time_diffs = []
-        for i in range(1, len(recent_trades)):
-            diff = (recent_trades[i].entry_time - recent_trades[i-1].exit_time).total_seconds()
-            time_diffs.append(diff)
+        now = asyncio.get_running_loop().time()
+        cached = self._exchange_status.get(id(exchange))
+        if cached is None or cached[1] is not exchange or now - cached[0] >= _EXCHANGE_STATUS_TTL:
+            cached = (now, exchange, asyncio.ensure_future(self._fetch_exchange_status(exchange)))
+            self._exchange_status[id(exchange)] = cached
         
-        if time_diffs:
-            avg_time_diff = sum(time_diffs) / len(time_diffs)
-            if avg_time_diff < 60:  # Less than 1 minute between trades
+        # Shielded so one cancelled waiter doesn't cancel the shared probe
+        return await asyncio.shield(cached[2])
+    
+    async def _fetch_exchange_status(self, exchange: Any) -> bool:
+        """Single status request to an exchange; True if it fails"""
+        async with self._probe_sem:
+            try:
+                await exchange.fetch_status()
+                return False
+            except Exception:
                 return True
+    
+    async def _suspicious_activity_value(self, bot: TradingBot, state: RuleState) -> Optional[float]:
+        """1.0 when recent trades look like rapid-fire trading"""
         
-        return False
+        _, entry_ns, exit_ns = bot.portfolio.trade_arrays()
+        count = len(entry_ns)
+        if count < _SUSPICIOUS_TRADE_COUNT:
+            return None
+        
+        # Rapid fire trading: gaps from each exit to the next entry
+        start = count - _SUSPICIOUS_TRADE_COUNT
+        gaps = entry_ns[start + 1:count] - exit_ns[start:count - 1]
+        
+        return 1.0 if float(gaps.mean()) < _MIN_AVG_TRADE_GAP_NS else None
     
     async def _handle_safety_trigger(
         self, 
         bot: TradingBot, 
         rule: SafetyRule, 
-        current_time: datetime
+        current_time: datetime, 
+        now_ns: Optional[int] = None
     ):
         """Handle safety rule trigger"""
         
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        
+        # Drop repeats of the same rule firing for the same bot
+        fingerprint = (bot.bot_id, rule.id, datetime_to_ns(current_time) // _ALERT_DEDUP_BUCKET_NS)
+        if self._alert_fingerprints.get(fingerprint, 0) > now_ns:
+            logger.debug(f"Suppressed duplicate safety alert {fingerprint}")
+            return
+        self._alert_fingerprints[fingerprint] = now_ns + _ALERT_FINGERPRINT_TTL_NS
+        
         # Create alert
         alert = SafetyAlert(
             id=str(uuid.uuid4()),
@@ -460,7 +756,7 @@ class SafetyManager:
             message=f"Safety rule '{rule.name}' triggered for bot {bot.name}"
         )
         
-        self.alerts.append(alert)
+        self._record_alert(alert)
         self.total_alerts += 1
         
         # Take action
@@ -503,32 +799,41 @@ class SafetyManager:
     ) -> bool:
         """Check if kill switch conditions are met"""
         
-        # Check for catastrophic losses across all bots
+        # Check for catastrophic losses across all bots: the combined drop
+        # from each bot's own peak, so bots joining or leaving don't move it
         if TriggerType.DRAWDOWN in kill_switch.triggers:
-            total_loss = 0
-            total_value = 0
+            total_loss = 0.0
+            total_peak = 0.0
             
-            for bot in self.bots.values():
-                initial_value = getattr(bot, '_initial_portfolio_value', bot.portfolio.total_value)
-                total_loss += max(0, initial_value - bot.portfolio.total_value)
-                total_value += initial_value
+            for bot_id, bot in self.bots.items():
+                value = bot.portfolio.total_value
+                if value <= 0:
+                    continue  # Not valued yet
+                
+                state = self.rule_state.get(bot_id)
+                peak = max(
+                    state.peak_value if state else 0.0,
+                    getattr(bot, '_initial_portfolio_value', 0.0),
+                    bot.portfolio.peak_value,
+                    value
+                )
+                total_loss += peak - value
+                total_peak += peak
             
-            if total_value > 0:
-                loss_pct = total_loss / total_value
+            if total_peak > 0:
+                loss_pct = total_loss / total_peak
                 if loss_pct >= kill_switch.threshold:
                     return True
         
         # Check for exchange issues
-        if TriggerType.EXCHANGE_ISSUES in kill_switch.triggers:
-            exchange_issues = 0
-            for bot in self.bots.values():
-                try:
-                    if hasattr(bot.exchange, 'exchange'):
-                        await bot.exchange.exchange.fetch_status()
-                except:
-                    exchange_issues += 1
+        if TriggerType.EXCHANGE_ISSUES in kill_switch.triggers and self.bots:
+            # Probe all exchanges concurrently, bounded by the probe semaphore
+            results = await asyncio.gather(
+                *(self._probe_exchange(bot) for bot in list(self.bots.values()))
+            )
+            exchange_issues = sum(results)
             
-            if exchange_issues >= len(self.bots) * 0.5:  # 50% of bots have issues
+            if exchange_issues >= len(results) * 0.5:  # 50% of bots have issues
                 return True
         
         return False
@@ -546,6 +851,7 @@ class SafetyManager:
         
         kill_switch.activated_at = current_time
         kill_switch.activated_by = activated_by
+        self._counts['active_kill_switches'] += 1
         
         # Create emergency alert
         alert = SafetyAlert(
@@ -577,7 +883,7 @@ class SafetyManager:
                     logger.error(f"Error liquidating positions for bot {bot.bot_id}: {e}")
             alert.actions_taken.append("Liquidated all positions")
         
-        self.alerts.append(alert)
+        self._record_alert(alert)
         self.total_interventions += 1
         
         # Emit alert
@@ -628,6 +934,8 @@ class SafetyManager:
             return False
         
         kill_switch = self.kill_switches[switch_id]
+        if kill_switch.activated_at is not None:
+            self._counts['active_kill_switches'] -= 1
         kill_switch.activated_at = None
         kill_switch.activated_by = None
         
@@ -637,17 +945,79 @@ class SafetyManager:
     async def _emit_alert(self, alert: SafetyAlert):
         """Emit alert to handlers"""
         
-        for handler in self.alert_handlers:
+        # Queue for the worker so slow handlers can't hold up safety checks;
+        # without a running worker, or with the queue full, deliver inline
+        if self._alert_worker_task is not None:
             try:
-                await handler(alert)
-            except Exception as e:
-                logger.error(f"Error in alert handler: {e}")
+                self._alert_queue.put_nowait(alert)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Alert queue full, delivering alert inline")
+        
+        await self._deliver_alert(alert)
+    
+    async def _alert_worker(self):
+        """Deliver queued alerts to handlers until a None sentinel"""
+        while True:
+            alert = await self._alert_queue.get()
+            if alert is None:
+                return
+            await self._deliver_alert(alert)
+    
+    async def _deliver_alert(self, alert: SafetyAlert):
+        """Run all alert handlers for an alert concurrently"""
+        if self.alert_handlers:
+            await asyncio.gather(*(self._call_alert_handler(handler, alert) for handler in self.alert_handlers))
     
-    async def _cleanup_old_alerts(self):
+    async def _call_alert_handler(self, handler: Callable, alert: SafetyAlert):
+        """Run one alert handler, bounded by _ALERT_HANDLER_TIMEOUT"""
+        try:
+            await asyncio.wait_for(handler(alert), timeout=_ALERT_HANDLER_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Alert handler timed out after {_ALERT_HANDLER_TIMEOUT}s")
+        except Exception as e:
+            logger.error(f"Error in alert handler: {e}")
+    
+    async def _cleanup_old_alerts(self, current_time: datetime, now_ns: int):
         """Remove old alerts to prevent memory buildup"""
         
-        cutoff_time = datetime.utcnow() - timedelta(days=7)  # Keep 7 days
-        self.alerts = [alert for alert in self.alerts if alert.timestamp > cutoff_time]
+        cutoff_time = current_time - timedelta(days=7)  # Keep 7 days
+        
+        # Alerts are appended in time order, so expired ones are at the front
+        alerts = self.alerts
+        while alerts and alerts[0].timestamp <= cutoff_time:
+            self._count_alert(alerts.popleft(), -1)
+        
+        self._alert_fingerprints = {
+            fingerprint: expiry
+            for fingerprint, expiry in self._alert_fingerprints.items()
+            if expiry > now_ns
+        }
+    
+    def _record_alert(self, alert: SafetyAlert):
+        """Append an alert to the history and count it if open"""
+        alerts = self.alerts
+        if len(alerts) == alerts.maxlen:
+            self._count_alert(alerts[0], -1)  # Evicted by the append
+        alerts.append(alert)
+        self._count_alert(alert, 1)
+    
+    def _count_alert(self, alert: SafetyAlert, delta: int):
+        """Adjust the open alert counters for an alert entering or leaving"""
+        if not alert.acknowledged:
+            self._counts['active_alerts'] += delta
+            if alert.level in _CRITICAL_LEVELS:
+                self._counts['critical_alerts'] += delta
+    
+    def acknowledge_alert(self, alert_id: str) -> bool:
+        """Acknowledge an alert"""
+        for alert in reversed(self.alerts):
+            if alert.id == alert_id:
+                if not alert.acknowledged:
+                    self._count_alert(alert, -1)
+                    alert.acknowledged = True
+                return True
+        return False
     
     def add_alert_handler(self, handler: Callable):
         """Add alert handler"""
@@ -662,48 +1032,36 @@ class SafetyManager:
         level: Optional[AlertLevel] = None, 
         limit: int = 100
     ) -> List[SafetyAlert]:
-        """Get recent alerts"""
+        """Get recent alerts, newest first"""
         
-        alerts = self.alerts
+        # Alerts are stored oldest first, so walk back from the end
+        alerts = reversed(self.alerts)
         
         if level:
-            alerts = [alert for alert in alerts if alert.level == level]
-        
-        # Sort by timestamp (newest first)
-        alerts.sort(key=lambda x: x.timestamp, reverse=True)
+            alerts = (alert for alert in alerts if alert.level == level)
         
-        return alerts[:limit]
+        return list(islice(alerts, limit))
     
     def get_safety_status(self) -> Dict[str, Any]:
         """Get overall safety status"""
         
-        active_bots = len([bot for bot in self.bots.values() if bot.status == BotStatus.RUNNING])
-        paused_bots = len([bot for bot in self.bots.values() if bot.status == BotStatus.PAUSED])
-        stopped_bots = len([bot for bot in self.bots.values() if bot.status == BotStatus.STOPPED])
-        
-        active_alerts = len([alert for alert in self.alerts if not alert.acknowledged])
-        critical_alerts = len([
-            alert for alert in self.alerts 
-            if alert.level in [AlertLevel.CRITICAL, AlertLevel.EMERGENCY] and not alert.acknowledged
-        ])
-        
-        active_kill_switches = len([
-            ks for ks in self.kill_switches.values() 
-            if ks.activated_at is not None
-        ])
+        # Bot status is changed by the bots themselves, so it is read here
+        # in one pass; alert and kill switch counts are kept as they change
+        statuses = Counter(bot.status for bot in self.bots.values())
+        counts = self._counts
         
         return {
             'monitoring_active': self.monitoring_active,
             'total_bots': len(self.bots),
-            'active_bots': active_bots,
-            'paused_bots': paused_bots,
-            'stopped_bots': stopped_bots,
+            'active_bots': statuses[BotStatus.RUNNING],
+            'paused_bots': statuses[BotStatus.PAUSED],
+            'stopped_bots': statuses[BotStatus.STOPPED],
             'total_alerts': self.total_alerts,
-            'active_alerts': active_alerts,
-            'critical_alerts': critical_alerts,
+            'active_alerts': counts['active_alerts'],
+            'critical_alerts': counts['critical_alerts'],
             'total_interventions': self.total_interventions,
             'bots_stopped_by_safety': self.bots_stopped_by_safety,
-            'active_kill_switches': active_kill_switches,
+            'active_kill_switches': counts['active_kill_switches'],
             'safety_rules_count': len(self.safety_rules),
             'kill_switches_count': len(self.kill_switches)
         }
\ No newline at end of file
@@ -2,20 +2,373 @@
 Breakout Punch Strategy - Trades range breakouts and chart pattern breakouts.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from datetime import datetime, timedelta
-import uuid
+from enum import IntFlag
 
-from app.core.trading.base import TradingStrategy, Signal
-from app.core.indicators.volatility import BollingerBandsIndicator, ATRIndicator
-from app.core.indicators.trend import SMAIndicator, EMAIndicator
-from app.core.indicators.volume import VolumeROCIndicator, OBVIndicator
+from app.core.trading.base import TradingStrategy, Signal, SignalArrays
+from app.core.indicators.incremental import (
+    IncrementalATR, IncrementalBB, IncrementalEMA, IncrementalSMA, rolling_reduce
+)
+from app.utils.jit import njit
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Columns mirrored into each symbol's bar buffer, and its initial capacity
+_OHLCV_COLUMNS = ('high', 'low', 'close', 'volume')
+_OHLCV_BUFFER = 512
+
+# Bars per symbol whose ranges and pivot levels stay memoized
+_MEMO_BARS = 64
+
+# Bars on each side a support/resistance pivot must strictly exceed
+_PIVOT_NEIGHBOURS = 2
+
+
+class BreakoutCondition(IntFlag):
+    """Conditions a breakout candidate met, as a bitmask"""
+    RANGE_BREAKOUT = 1
+    BB_BREAKOUT = 2
+    BB_SQUEEZE = 4
+    MA_ALIGNMENT = 8
+    VOLUME = 16
+    MOMENTUM = 32
+    SR_BREAK = 64
+
+
+# Plain-int condition bits for the scoring kernel, which cannot use the enum
+_COND_RANGE = int(BreakoutCondition.RANGE_BREAKOUT)
+_COND_BB = int(BreakoutCondition.BB_BREAKOUT)
+_COND_BB_SQUEEZE = int(BreakoutCondition.BB_SQUEEZE)
+_COND_MA = int(BreakoutCondition.MA_ALIGNMENT)
+_COND_VOLUME = int(BreakoutCondition.VOLUME)
+_COND_MOMENTUM = int(BreakoutCondition.MOMENTUM)
+_COND_SR = int(BreakoutCondition.SR_BREAK)
+
+# Condition names reported in signal payloads, for each direction
+_CONDITION_NAMES = {
+    'buy': (
+        (BreakoutCondition.RANGE_BREAKOUT, 'range_breakout'),
+        (BreakoutCondition.BB_BREAKOUT, 'bb_breakout'),
+        (BreakoutCondition.BB_SQUEEZE, 'bb_squeeze_breakout'),
+        (BreakoutCondition.MA_ALIGNMENT, 'ma_alignment'),
+        (BreakoutCondition.VOLUME, 'volume_breakout'),
+        (BreakoutCondition.MOMENTUM, 'price_momentum'),
+        (BreakoutCondition.SR_BREAK, 'sr_break'),
+    ),
+    'sell': (
+        (BreakoutCondition.RANGE_BREAKOUT, 'range_breakdown'),
+        (BreakoutCondition.BB_BREAKOUT, 'bb_breakdown'),
+        (BreakoutCondition.BB_SQUEEZE, 'bb_squeeze_breakdown'),
+        (BreakoutCondition.MA_ALIGNMENT, 'ma_alignment'),
+        (BreakoutCondition.VOLUME, 'volume_breakdown'),
+        (BreakoutCondition.MOMENTUM, 'price_momentum'),
+        (BreakoutCondition.SR_BREAK, 'sr_break'),
+    ),
+}
+
+
+def _memo(cache: Dict[tuple, Any], key: tuple, compute: Callable[[], Any]) -> Any:
+    """
+    Cached value for key, computing and storing it on a miss. The cache
+    keeps the _MEMO_BARS most recently added keys.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = compute()
+        if len(cache) > _MEMO_BARS:
+            del cache[next(iter(cache))]
+    return value
+
+
+def _pivot_levels(values: np.ndarray, neighbours: int, peaks: bool) -> np.ndarray:
+    """
+    Values strictly above (peaks) or below (troughs) every value within
+    `neighbours` bars on either side, in order of appearance.
+    """
+    width = 2 * neighbours + 1
+    if len(values) < width:
+        return values[:0]
+    
+    windows = sliding_window_view(values, width)
+    centre = windows[:, neighbours]
+    if peaks:
+        mask = centre > np.maximum(windows[:, :neighbours].max(axis=1), windows[:, neighbours + 1:].max(axis=1))
+    else:
+        mask = centre < np.minimum(windows[:, :neighbours].min(axis=1), windows[:, neighbours + 1:].min(axis=1))
+    return centre[mask]
+
+
+@njit(cache=True, nogil=True)
+def _score_breakout(
+    bullish, current_price, prev_close,
+    upper, lower, bb_width, prev_bb_width,
+    sma_fast, sma_slow, ema, volume_ratio,
+    range_triggers,
+    trend_filter, volume_filter,
+    squeeze_threshold, volume_multiplier
+):
+    """
+    Score every breakout condition except the support/resistance break:
+    returns (score, max_score, condition bits, index of the broken range).
+    range_triggers holds each range's breakout price; the index is -1 when
+    no range was broken.
+    """
+    bits = 0
+    score = 0
+    max_score = 0
+    broken_range = -1
+    
+    # Range breakout
+    max_score += 30
+    for i in range(range_triggers.shape[0]):
+        if current_price >= range_triggers[i] if bullish else current_price <= range_triggers[i]:
+            bits |= _COND_RANGE
+            score += 30
+            broken_range = i
+            break
+    
+    # Bollinger Band breakout, strongest out of a squeeze
+    max_score += 20
+    outside = current_price > upper if bullish else current_price < lower
+    if bb_width <= squeeze_threshold:
+        if bb_width > prev_bb_width and outside:
+            bits |= _COND_BB_SQUEEZE
+            score += 20
+    elif outside:
+        bits |= _COND_BB
+        score += 15
+    
+    # Moving average alignment
+    max_score += 15
+    if trend_filter:
+        if bullish:
+            aligned = current_price > sma_fast and sma_fast > sma_slow and current_price > ema
+        else:
+            aligned = current_price < sma_fast and sma_fast < sma_slow and current_price < ema
+        if aligned:
+            bits |= _COND_MA
+            score += 15
+    else:
+        score += 15
+    
+    # Volume confirmation
+    max_score += 15
+    if volume_filter:
+        if volume_ratio >= volume_multiplier:
+            bits |= _COND_VOLUME
+            score += 15
+    else:
+        score += 15
+    
+    # Price momentum of 0.2% in the breakout direction
+    max_score += 10
+    price_change = (current_price - prev_close) / prev_close
+    if (price_change > 0.002) if bullish else (price_change < -0.002):
+        bits |= _COND_MOMENTUM
+        score += 10
+    
+    return score, max_score, bits, broken_range
+
+
+@njit(cache=True, nogil=True)
+def _breakout_targets(
+    bullish, price, breakout_level, range_size, atr, stop_multiplier, target_multiplier
+):
+    """
+    Stop and target for a breakout entered at price: returns
+    (stop_loss, take_profit, risk, reward).
+    """
+    # Target the larger of the range height and the ATR multiple
+    target_distance = atr * target_multiplier
+    if range_size > 0:
+        range_distance = breakout_level * range_size
+        if not target_distance > range_distance:
+            target_distance = range_distance
+    
+    if bullish:
+        # Stop below breakout level
+        stop_loss = breakout_level - atr * stop_multiplier
+        take_profit = price + target_distance
+        return stop_loss, take_profit, price - stop_loss, take_profit - price
+    
+    # Stop above breakout level
+    stop_loss = breakout_level + atr * stop_multiplier
+    take_profit = price - target_distance
+    return stop_loss, take_profit, stop_loss - price, price - take_profit
+
+
+@njit(cache=True, nogil=True)
+def _pivot_break(values, start, stop, neighbours, price, factor, peaks):
+    """
+    Whether price clears (peaks) or undercuts (troughs) a pivot of
+    values[start:stop] scaled by factor; the loop form of _pivot_levels.
+    """
+    for j in range(start + neighbours, stop - neighbours):
+        centre = values[j]
+        pivot = True
+        for k in range(j - neighbours, j + neighbours + 1):
+            if k != j and not (centre > values[k] if peaks else centre < values[k]):
+                pivot = False
+                break
+        if pivot and (price > centre * factor if peaks else price < centre * factor):
+            return True
+    return False
+
+
+@njit(cache=True, nogil=True)
+def _breakout_series(
+    closes, highs, lows, start,
+    bb_upper, bb_lower, bb_width, sma_fast, sma_slow, ema, atr, volume_ratio,
+    range_high, range_low, short_high, short_low,
+    range_threshold, breakout_threshold, lookback,
+    trend_filter, volume_filter, squeeze_threshold, volume_multiplier,
+    min_confidence, min_risk_reward, stop_multiplier, target_multiplier
+):
+    """
+    Evaluate every bar from start on as generate_signals would evaluate it
+    as the latest bar. Returns the number of signals and arrays of bar index,
+    direction (+1/-1), confidence, stop, target, risk/reward and conditions.
+    """
+    n = closes.shape[0]
+    bars = np.empty(2 * n, np.int64)
+    directions = np.empty(2 * n, np.int8)
+    confidences = np.empty(2 * n)
+    stops = np.empty(2 * n)
+    targets = np.empty(2 * n)
+    ratios = np.empty(2 * n)
+    conditions = np.empty(2 * n, np.int64)
+    count = 0
+    
+    triggers = np.empty(2)
+    levels = np.empty(2)
+    sizes = np.empty(2)
+    required = max(0.4, min_confidence)
+    
+    for i in range(start, n):
+        price = closes[i]
+        size = (range_high[i] - range_low[i]) / range_low[i]
+        short_size = (short_high[i] - short_low[i]) / short_low[i]
+        
+        for side in range(2):
+            bullish = side == 0
+            
+            # Ranges, as _detect_ranges builds them
+            k = 0
+            if size >= range_threshold:
+                levels[k] = range_high[i] if bullish else range_low[i]
+                sizes[k] = size
+                k += 1
+            if short_size >= range_threshold * 0.5:
+                levels[k] = short_high[i] if bullish else short_low[i]
+                sizes[k] = short_size
+                k += 1
+            for r in range(k):
+                if bullish:
+                    triggers[r] = levels[r] * (1 + breakout_threshold)
+                else:
+                    triggers[r] = levels[r] * (1 - breakout_threshold)
+            
+            score, max_score, bits, broken_range = _score_breakout(
+                bullish, price, closes[i - 1],
+                bb_upper[i], bb_lower[i], bb_width[i], bb_width[i - 1],
+                sma_fast[i], sma_slow[i], ema[i], volume_ratio[i],
+                triggers[:k], trend_filter, volume_filter,
+                squeeze_threshold, volume_multiplier
+            )
+            
+            # Support/resistance break, when it could still matter
+            max_score += 10
+            if (score + 10) / max_score < required:
+                continue
+            factor = 1 + breakout_threshold if bullish else 1 - breakout_threshold
+            if _pivot_break(
+                highs if bullish else lows, max(i + 1 - lookback, 0), i + 1,
+                _PIVOT_NEIGHBOURS, price, factor, bullish
+            ):
+                bits |= _COND_SR
+                score += 10
+            
+            confidence = score / max_score
+            if confidence < 0.4:
+                continue
+            
+            if broken_range >= 0:
+                breakout_level = levels[broken_range]
+                range_size = sizes[broken_range]
+            else:
+                breakout_level = bb_upper[i] if bullish else bb_lower[i]
+                range_size = 0.0
+            
+            stop_loss, take_profit, risk, reward = _breakout_targets(
+                bullish, price, breakout_level, range_size, atr[i],
+                stop_multiplier, target_multiplier
+            )
+            ratio = reward / risk if risk > 0 else 0.0
+            if ratio < min_risk_reward or confidence < min_confidence:
+                continue
+            
+            bars[count] = i
+            directions[count] = 1 if bullish else -1
+            confidences[count] = confidence
+            stops[count] = stop_loss
+            targets[count] = take_profit
+            ratios[count] = ratio
+            conditions[count] = bits
+            count += 1
+    
+    return count, bars, directions, confidences, stops, targets, ratios, conditions
+
+
+class _OHLCVBuffer:
+    """
+    One symbol's bars held column by column in float64 arrays. A frame that
+    extends the bars already held is appended in place, rewriting the last
+    held bar in case it was still forming; any other frame reloads the buffer.
+    """
+    __slots__ = ('columns', 'length', 'first_ts', 'last_ts')
+    
+    def __init__(self):
+        self.columns = {name: np.empty(_OHLCV_BUFFER) for name in _OHLCV_COLUMNS}
+        self.length = 0
+        self.first_ts = None
+        self.last_ts = None
+    
+    def sync(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Bring the buffer in line with df and return views of its columns"""
+        n = len(df)
+        index = df.index
+        held = self.length
+        
+        if held and n >= held and index[0] == self.first_ts and index[held - 1] == self.last_ts:
+            start = held - 1
+        else:
+            start = 0
+        
+        capacity = len(self.columns['close'])
+        if n > capacity:
+            while capacity < n:
+                capacity *= 2
+            for name, column in self.columns.items():
+                grown = np.empty(capacity)
+                grown[:start] = column[:start]
+                self.columns[name] = grown
+        
+        for name, column in self.columns.items():
+            column[start:n] = df[name].iloc[start:].to_numpy()
+        
+        self.length = n
+        self.first_ts = index[0] if n else None
+        self.last_ts = index[-1] if n else None
+        return {name: column[:n] for name, column in self.columns.items()}
+
 
 class BreakoutPunchStrategy(TradingStrategy):
     """
@@ -81,7 +434,10 @@ class BreakoutPunchStrategy(TradingStrategy):
             'trend_filter': True,
             'volume_filter': True,
             'volatility_filter': True,
-            'time_filter': True  # Avoid news times
+            'time_filter': True,  # Avoid news times
+            
+            # Signal ids: uuid4 instead of the cheaper process-local sequence
+            'uuid_signal_ids': False
         }
         
         if parameters:
@@ -89,17 +445,26 @@ class BreakoutPunchStrategy(TradingStrategy):
         
         super().__init__("breakout_punch", default_params)
         
-        # Initialize indicators
-        self.bb = BollingerBandsIndicator(
+        # Initialize indicators; only their latest values are read
+        self.bb = IncrementalBB(
             period=self.parameters['bb_period'],
             std_dev=self.parameters['bb_std']
         )
-        self.atr = ATRIndicator(period=self.parameters['atr_period'])
-        self.sma_fast = SMAIndicator(periods=[self.parameters['sma_fast']])
-        self.sma_slow = SMAIndicator(periods=[self.parameters['sma_slow']])
-        self.ema = EMAIndicator(periods=[self.parameters['ema_period']])
-        self.volume_roc = VolumeROCIndicator(period=5)
-        self.obv = OBVIndicator()
+        self.atr = IncrementalATR(period=self.parameters['atr_period'])
+        self.sma_fast = IncrementalSMA(self.parameters['sma_fast'])
+        self.sma_slow = IncrementalSMA(self.parameters['sma_slow'])
+        self.ema = IncrementalEMA(self.parameters['ema_period'])
+        
+        # Per-symbol column buffers the signal logic reads bars from
+        self._ohlcv: Dict[str, _OHLCVBuffer] = {}
+        
+        # Ranges and pivot levels per symbol, keyed by bar (oldest first), so
+        # repeated queries for the same bar reuse them
+        self._range_cache: Dict[str, Dict[tuple, List[Dict[str, Any]]]] = {}
+        self._pivot_cache: Dict[str, Dict[tuple, Dict[str, np.ndarray]]] = {}
+        
+        # Worker threads for batch signal generation, started on first use
+        self._executor: Optional[ThreadPoolExecutor] = None
     
     async def generate_signals(
         self, 
@@ -108,312 +473,347 @@ class BreakoutPunchStrategy(TradingStrategy):
         indicators: Dict[str, Any]
     ) -> List[Signal]:
         """Generate breakout trading signals"""
+        return self._generate(symbol, df)
+    
+    def generate_signals_batch(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, List[Signal]]:
+        """
+        Generate breakout signals for many symbols at once, evaluating the
+        symbols in parallel on worker threads. frames maps symbol to bars.
+        """
+        def generate(symbol: str) -> List[Signal]:
+            try:
+                return self._generate(symbol, frames[symbol])
+            except Exception as e:
+                logger.error(f"Error generating breakout signals for {symbol}: {e}")
+                return []
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        
+        symbols = list(frames)
+        return dict(zip(symbols, self._executor.map(generate, symbols)))
+    
+    def generate_signals_vectorized(self, df: pd.DataFrame) -> SignalArrays:
+        """
+        Evaluate every bar of df in one pass, with the same outcome as calling
+        generate_signals on each prefix of df, and return the signals as arrays.
+        Intended for backtests; signals_from_arrays converts at a live boundary.
+        """
+        params = self.parameters
+        highs = df['high'].to_numpy(dtype=np.float64)
+        lows = df['low'].to_numpy(dtype=np.float64)
+        closes = df['close'].to_numpy(dtype=np.float64)
+        volumes = df['volume'].to_numpy(dtype=np.float64)
+        
+        # Indicator series, each bar computed as the incremental indicators would
+        bb_middle = rolling_reduce(closes, params['bb_period'], np.mean)
+        bb_std = rolling_reduce(closes, params['bb_period'], np.std, ddof=1)
+        bb_upper = bb_middle + params['bb_std'] * bb_std
+        bb_lower = bb_middle - params['bb_std'] * bb_std
+        prev_closes = np.concatenate(([np.nan], closes[:-1]))
+        true_range = np.fmax(np.fmax(highs - lows, np.abs(highs - prev_closes)), np.abs(lows - prev_closes))
+        atr = rolling_reduce(true_range, params['atr_period'], np.mean)
+        sma_fast = rolling_reduce(closes, params['sma_fast'], np.mean)
+        sma_slow = rolling_reduce(closes, params['sma_slow'], np.mean)
+        ema = pd.Series(closes).ewm(span=params['ema_period'], adjust=False).mean().to_numpy()
+        volume_ma = rolling_reduce(volumes, params['volume_ma_period'], np.mean)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_width = (bb_upper - bb_lower) / bb_middle
+            volume_ratio = np.where(volume_ma > 0, volumes / volume_ma, 1.0)
+        
+        period = params['range_periods']
+        warmup = max(params['sma_slow'], period) + 20
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count, bars, directions, confidences, stops, targets, ratios, conditions = _breakout_series(
+                closes, highs, lows, max(warmup - 1, 1),
+                bb_upper, bb_lower, bb_width, sma_fast, sma_slow, ema, atr, volume_ratio,
+                rolling_reduce(highs, period, np.max), rolling_reduce(lows, period, np.min),
+                rolling_reduce(highs, period // 2, np.max), rolling_reduce(lows, period // 2, np.min),
+                params['range_threshold'], params['breakout_threshold'], period,
+                bool(params['trend_filter']), bool(params['volume_filter']),
+                params['squeeze_threshold'], params['volume_breakout_multiplier'],
+                params['min_confidence'], params['min_risk_reward'],
+                params['atr_stop_multiplier'], params['atr_target_multiplier']
+            )
+        
+        bars = bars[:count]
+        return SignalArrays(
+            timestamps=df.index.to_numpy()[bars],
+            directions=directions[:count],
+            confidences=confidences[:count],
+            prices=closes[bars],
+            stop_losses=stops[:count],
+            take_profits=targets[:count],
+            risk_reward_ratios=ratios[:count],
+            conditions=conditions[:count]
+        )
+    
+    def signals_from_arrays(self, symbol: str, arrays: SignalArrays) -> List[Signal]:
+        """Signal objects for signals produced by generate_signals_vectorized"""
+        signals = []
+        for i in range(len(arrays)):
+            direction = 'buy' if arrays.directions[i] > 0 else 'sell'
+            conditions = BreakoutCondition(int(arrays.conditions[i]))
+            signals.append(Signal(
+                id=self._next_signal_id(),
+                symbol=symbol,
+                direction=direction,
+                confidence=float(arrays.confidences[i]),
+                price=float(arrays.prices[i]),
+                timestamp=pd.Timestamp(arrays.timestamps[i]).to_pydatetime(),
+                strategy=self.name,
+                stop_loss=float(arrays.stop_losses[i]),
+                take_profit=float(arrays.take_profits[i]),
+                risk_reward_ratio=float(arrays.risk_reward_ratios[i]),
+                indicators={
+                    'conditions': {
+                        name: True for flag, name in _CONDITION_NAMES[direction]
+                        if conditions & flag
+                    }
+                }
+            ))
+        return signals
+    
+    def _generate(self, symbol: str, df: pd.DataFrame) -> List[Signal]:
+        """Evaluate the latest bar of df for breakout signals"""
         
         if len(df) < max(self.parameters['sma_slow'], self.parameters['range_periods']) + 20:
             return []
         
         signals = []
         
-        try:
-            # Calculate indicators
-            bb_result = await self.bb.calculate(df)
-            atr_result = await self.atr.calculate(df)
-            sma_fast_result = await self.sma_fast.calculate(df)
-            sma_slow_result = await self.sma_slow.calculate(df)
-            ema_result = await self.ema.calculate(df)
-            volume_roc_result = await self.volume_roc.calculate(df)
-            obv_result = await self.obv.calculate(df)
-            
-            # Get current values
-            current_price = df['close'].iloc[-1]
-            current_volume = df['volume'].iloc[-1]
-            current_time = df.index[-1]
-            
-            # Calculate volume moving average
-            volume_ma = df['volume'].rolling(self.parameters['volume_ma_period']).mean().iloc[-1]
-            volume_ratio = current_volume / volume_ma if volume_ma > 0 else 1
-            
-            # Detect ranges and breakouts
-            ranges = self._detect_ranges(df)
-            
-            # Check for bullish breakouts
-            bullish_breakout = self._check_bullish_breakout(
-                df, current_price, bb_result, atr_result.values.iloc[-1],
-                sma_fast_result.values.iloc[-1], sma_slow_result.values.iloc[-1],
-                ema_result.values.iloc[-1], volume_ratio, ranges
+        # Mirror the new bars into the symbol's column buffer
+        buffer = self._ohlcv.get(symbol)
+        if buffer is None:
+            buffer = self._ohlcv[symbol] = _OHLCVBuffer()
+        columns = buffer.sync(df)
+        highs = columns['high']
+        lows = columns['low']
+        closes = columns['close']
+        volumes = columns['volume']
+        
+        # Calculate indicators at the latest bars
+        upper_band, middle_band, lower_band = self.bb.last(closes)
+        atr = self.atr.last(highs, lows, closes)
+        sma_fast = self.sma_fast.last(closes)
+        sma_slow = self.sma_slow.last(closes)
+        ema = self.ema.update(symbol, df.index, closes)
+        
+        # Get current values; there is nothing to evaluate without both closes
+        current_price = closes[-1]
+        prev_close = closes[-2]
+        if np.isnan(current_price) or np.isnan(prev_close):
+            return []
+        current_volume = volumes[-1]
+        current_time = df.index[-1]
+        
+        # Bollinger band edges and width for this bar and the one before
+        bb_upper = upper_band[-1]
+        bb_lower = lower_band[-1]
+        bb_width = (bb_upper - bb_lower) / middle_band[-1]
+        prev_bb_width = (upper_band[-2] - lower_band[-2]) / middle_band[-2]
+        
+        # Volume moving average over the last window only
+        volume_ma = volumes[-self.parameters['volume_ma_period']:].mean()
+        volume_ratio = current_volume / volume_ma if volume_ma > 0 else 1
+        
+        # The bar is identified by its own and the previous timestamp, plus
+        # its high and low in case it is still forming
+        bar_key = (df.index[-2], current_time, highs[-1], lows[-1])
+        range_cache = self._range_cache.setdefault(symbol, {})
+        pivots = _memo(self._pivot_cache.setdefault(symbol, {}), bar_key, dict)
+        
+        # Detect ranges and breakouts
+        ranges = _memo(range_cache, bar_key, lambda: self._detect_ranges(highs, lows))
+        
+        # Check for bullish breakouts
+        bullish_breakout = self._check_bullish_breakout(
+            highs, lows, current_price, prev_close,
+            bb_upper, bb_lower, bb_width, prev_bb_width,
+            sma_fast, sma_slow, ema, volume_ratio, ranges, pivots
+        )
+        
+        if bullish_breakout:
+            signal = self._create_breakout_signal(
+                symbol, current_price, current_time, atr,
+                bullish_breakout, 'buy'
             )
-            
-            if bullish_breakout:
-                signal = self._create_breakout_signal(
-                    symbol, current_price, current_time, atr_result.values.iloc[-1],
-                    bullish_breakout, 'buy'
-                )
-                if signal and signal.confidence >= self.parameters['min_confidence']:
-                    signals.append(signal)
-            
-            # Check for bearish breakouts
-            bearish_breakout = self._check_bearish_breakout(
-                df, current_price, bb_result, atr_result.values.iloc[-1],
-                sma_fast_result.values.iloc[-1], sma_slow_result.values.iloc[-1],
-                ema_result.values.iloc[-1], volume_ratio, ranges
+            if signal and signal.confidence >= self.parameters['min_confidence']:
+                signals.append(signal)
+        
+        # Check for bearish breakouts
+        bearish_breakout = self._check_bearish_breakout(
+            highs, lows, current_price, prev_close,
+            bb_upper, bb_lower, bb_width, prev_bb_width,
+            sma_fast, sma_slow, ema, volume_ratio, ranges, pivots
+        )
+        
+        if bearish_breakout:
+            signal = self._create_breakout_signal(
+                symbol, current_price, current_time, atr,
+                bearish_breakout, 'sell'
             )
-            
-            if bearish_breakout:
-                signal = self._create_breakout_signal(
-                    symbol, current_price, current_time, atr_result.values.iloc[-1],
-                    bearish_breakout, 'sell'
-                )
-                if signal and signal.confidence >= self.parameters['min_confidence']:
-                    signals.append(signal)
-            
-            return signals
-            
-        except Exception as e:
-            logger.error(f"Error generating breakout signals for {symbol}: {e}")
-            return []
+            if signal and signal.confidence >= self.parameters['min_confidence']:
+                signals.append(signal)
+        
+        return signals
     
-    def _detect_ranges(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _detect_ranges(self, highs: np.ndarray, lows: np.ndarray) -> List[Dict[str, Any]]:
         """Detect trading ranges in price data"""
         ranges = []
         
-        try:
-            period = self.parameters['range_periods']
-            recent_data = df.tail(period * 2)  # Look at more data for better range detection
-            
-            # Calculate rolling highs and lows
-            rolling_high = recent_data['high'].rolling(period).max()
-            rolling_low = recent_data['low'].rolling(period).min()
-            
-            # Current range
-            current_high = rolling_high.iloc[-1]
-            current_low = rolling_low.iloc[-1]
-            range_size = (current_high - current_low) / current_low
-            
-            if range_size >= self.parameters['range_threshold']:
-                ranges.append({
-                    'high': current_high,
-                    'low': current_low,
-                    'size': range_size,
-                    'middle': (current_high + current_low) / 2,
-                    'age': period  # How long this range has been forming
-                })
-            
-            # Also detect shorter-term ranges
-            short_period = period // 2
-            short_high = recent_data['high'].tail(short_period).max()
-            short_low = recent_data['low'].tail(short_period).min()
-            short_range_size = (short_high - short_low) / short_low
-            
-            if short_range_size >= self.parameters['range_threshold'] * 0.5:
-                ranges.append({
-                    'high': short_high,
-                    'low': short_low,
-                    'size': short_range_size,
-                    'middle': (short_high + short_low) / 2,
-                    'age': short_period
-                })
-            
-        except Exception as e:
-            logger.error(f"Error detecting ranges: {e}")
+        period = self.parameters['range_periods']
+        threshold = self.parameters['breakout_threshold']
+        
+        # Current range
+        current_high = highs[-period:].max()
+        current_low = lows[-period:].min()
+        range_size = (current_high - current_low) / current_low
+        
+        if range_size >= self.parameters['range_threshold']:
+            ranges.append({
+                'high': current_high,
+                'low': current_low,
+                'size': range_size,
+                'middle': (current_high + current_low) / 2,
+                'age': period,  # How long this range has been forming
+                'breakout_high': current_high * (1 + threshold),
+                'breakout_low': current_low * (1 - threshold)
+            })
+        
+        # Also detect shorter-term ranges
+        short_period = period // 2
+        short_high = highs[-short_period:].max()
+        short_low = lows[-short_period:].min()
+        short_range_size = (short_high - short_low) / short_low
+        
+        if short_range_size >= self.parameters['range_threshold'] * 0.5:
+            ranges.append({
+                'high': short_high,
+                'low': short_low,
+                'size': short_range_size,
+                'middle': (short_high + short_low) / 2,
+                'age': short_period,
+                'breakout_high': short_high * (1 + threshold),
+                'breakout_low': short_low * (1 - threshold)
+            })
         
         return ranges
     
     def _check_bullish_breakout(
         self,
-        df: pd.DataFrame,
+        highs: np.ndarray,
+        lows: np.ndarray,
         current_price: float,
-        bb_result: Any,  # IndicatorResult
-        atr: float,
+        prev_close: float,
+        bb_upper: float,
+        bb_lower: float,
+        bb_width: float,
+        prev_bb_width: float,
         sma_fast: float,
         sma_slow: float,
         ema: float,
         volume_ratio: float,
-        ranges: List[Dict[str, Any]]
+        ranges: List[Dict[str, Any]],
+        pivots: Optional[Dict[str, np.ndarray]] = None
     ) -> Optional[Dict[str, Any]]:
         """Check for bullish breakout conditions"""
-        
-        conditions = {}
-        score = 0
-        max_score = 0
-        breakout_level = None
-        range_size = 0
-        
-        # Range breakout
-        max_score += 30
-        for range_data in ranges:
-            resistance = range_data['high']
-            breakout_price = resistance * (1 + self.parameters['breakout_threshold'])
-            
-            if current_price >= breakout_price:
-                conditions['range_breakout'] = True
-                score += 30
-                breakout_level = resistance
-                range_size = range_data['size']
-                break
-        
-        # Bollinger Band breakout
-        max_score += 20
-        bb_upper = bb_result.additional_series['upper_band'].iloc[-1]
-        bb_middle = bb_result.values.iloc[-1]  # Middle band
-        bb_lower = bb_result.additional_series['lower_band'].iloc[-1]
-        bb_width = (bb_upper - bb_lower) / bb_middle
-        
-        # Check for squeeze followed by expansion
-        if bb_width <= self.parameters['squeeze_threshold']:
-            # Was in squeeze
-            prev_bb_upper = bb_result.additional_series['upper_band'].iloc[-2]
-            prev_bb_lower = bb_result.additional_series['lower_band'].iloc[-2]
-            prev_bb_middle = bb_result.values.iloc[-2]
-            prev_bb_width = (prev_bb_upper - prev_bb_lower) / prev_bb_middle
-            if bb_width > prev_bb_width and current_price > bb_upper:
-                conditions['bb_squeeze_breakout'] = True
-                score += 20
-        elif current_price > bb_upper:
-            conditions['bb_breakout'] = True
-            score += 15
-        
-        # Moving average breakout
-        max_score += 15
-        if self.parameters['trend_filter']:
-            if (current_price > sma_fast > sma_slow and 
-                current_price > ema and
-                sma_fast > sma_slow):
-                conditions['ma_alignment'] = True
-                score += 15
-        else:
-            score += 15
-        
-        # Volume confirmation
-        max_score += 15
-        if self.parameters['volume_filter']:
-            if volume_ratio >= self.parameters['volume_breakout_multiplier']:
-                conditions['volume_breakout'] = True
-                score += 15
-        else:
-            score += 15
-        
-        # Price momentum
-        max_score += 10
-        price_change = (current_price - df['close'].iloc[-2]) / df['close'].iloc[-2]
-        if price_change > 0.002:  # 0.2% momentum
-            conditions['price_momentum'] = True
-            score += 10
-        
-        # Support/resistance break confirmation
-        max_score += 10
-        if self._check_support_resistance_break(df, current_price, 'bullish'):
-            conditions['sr_break'] = True
-            score += 10
-        
-        confidence = score / max_score if max_score > 0 else 0
-        
-        if confidence >= 0.4:  # Lowered to match min_confidence
-            return {
-                'conditions': conditions,
-                'confidence': confidence,
-                'score': score,
-                'max_score': max_score,
-                'breakout_level': breakout_level or bb_upper,
-                'range_size': range_size,
-                'volume_ratio': volume_ratio
-            }
-        
-        return None
+        return self._score_direction(
+            True, highs, lows, current_price, prev_close,
+            bb_upper, bb_lower, bb_width, prev_bb_width,
+            sma_fast, sma_slow, ema, volume_ratio, ranges, pivots
+        )
     
     def _check_bearish_breakout(
         self,
-        df: pd.DataFrame,
+        highs: np.ndarray,
+        lows: np.ndarray,
         current_price: float,
-        bb_result: Any,  # IndicatorResult
-        atr: float,
+        prev_close: float,
+        bb_upper: float,
+        bb_lower: float,
+        bb_width: float,
+        prev_bb_width: float,
         sma_fast: float,
         sma_slow: float,
         ema: float,
         volume_ratio: float,
-        ranges: List[Dict[str, Any]]
+        ranges: List[Dict[str, Any]],
+        pivots: Optional[Dict[str, np.ndarray]] = None
     ) -> Optional[Dict[str, Any]]:
         """Check for bearish breakout conditions"""
-        
-        conditions = {}
-        score = 0
-        max_score = 0
-        breakout_level = None
-        range_size = 0
-        
-        # Range breakdown
-        max_score += 30
-        for range_data in ranges:
-            support = range_data['low']
-            breakdown_price = support * (1 - self.parameters['breakout_threshold'])
-            
-            if current_price <= breakdown_price:
-                conditions['range_breakdown'] = True
-                score += 30
-                breakout_level = support
-                range_size = range_data['size']
-                break
-        
-        # Bollinger Band breakdown
-        max_score += 20
-        bb_lower = bb_result.additional_series['lower_band'].iloc[-1]
-        bb_middle = bb_result.values.iloc[-1]  # Middle band
-        bb_upper = bb_result.additional_series['upper_band'].iloc[-1]
-        bb_width = (bb_upper - bb_lower) / bb_middle
-        
-        if bb_width <= self.parameters['squeeze_threshold']:
-            prev_bb_upper = bb_result.additional_series['upper_band'].iloc[-2]
-            prev_bb_lower = bb_result.additional_series['lower_band'].iloc[-2]
-            prev_bb_middle = bb_result.values.iloc[-2]
-            prev_bb_width = (prev_bb_upper - prev_bb_lower) / prev_bb_middle
-            if bb_width > prev_bb_width and current_price < bb_lower:
-                conditions['bb_squeeze_breakdown'] = True
-                score += 20
-        elif current_price < bb_lower:
-            conditions['bb_breakdown'] = True
-            score += 15
-        
-        # Moving average breakdown
-        max_score += 15
-        if self.parameters['trend_filter']:
-            if (current_price < sma_fast < sma_slow and 
-                current_price < ema and
-                sma_fast < sma_slow):
-                conditions['ma_alignment'] = True
-                score += 15
-        else:
-            score += 15
-        
-        # Volume confirmation
-        max_score += 15
-        if self.parameters['volume_filter']:
-            if volume_ratio >= self.parameters['volume_breakout_multiplier']:
-                conditions['volume_breakdown'] = True
-                score += 15
-        else:
-            score += 15
-        
-        # Price momentum
-        max_score += 10
-        price_change = (current_price - df['close'].iloc[-2]) / df['close'].iloc[-2]
-        if price_change < -0.002:  # -0.2% momentum
-            conditions['price_momentum'] = True
-            score += 10
+        return self._score_direction(
+            False, highs, lows, current_price, prev_close,
+            bb_upper, bb_lower, bb_width, prev_bb_width,
+            sma_fast, sma_slow, ema, volume_ratio, ranges, pivots
+        )
+    
+    def _score_direction(
+        self,
+        bullish: bool,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        current_price: float,
+        prev_close: float,
+        bb_upper: float,
+        bb_lower: float,
+        bb_width: float,
+        prev_bb_width: float,
+        sma_fast: float,
+        sma_slow: float,
+        ema: float,
+        volume_ratio: float,
+        ranges: List[Dict[str, Any]],
+        pivots: Optional[Dict[str, np.ndarray]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Score one breakout direction and expand the result when it qualifies"""
+        edge = 'high' if bullish else 'low'
+        range_triggers = np.array([r['breakout_' + edge] for r in ranges], dtype=np.float64)
+        
+        score, max_score, kernel_bits, broken_range = _score_breakout(
+            bullish, current_price, prev_close,
+            bb_upper, bb_lower, bb_width, prev_bb_width,
+            sma_fast, sma_slow, ema, volume_ratio,
+            range_triggers,
+            bool(self.parameters['trend_filter']),
+            bool(self.parameters['volume_filter']),
+            self.parameters['squeeze_threshold'],
+            self.parameters['volume_breakout_multiplier']
+        )
+        conditions = BreakoutCondition(kernel_bits)
         
         # Support/resistance break confirmation
         max_score += 10
-        if self._check_support_resistance_break(df, current_price, 'bearish'):
-            conditions['sr_break'] = True
+        
+        # Skip the pivot scan when even a break could not lift this direction
+        # to a signal generate_signals would keep
+        required = max(0.4, self.parameters['min_confidence'])
+        if (score + 10) / max_score < required:
+            return None
+        
+        if self._check_support_resistance_break(
+            highs, lows, current_price, 'bullish' if bullish else 'bearish', pivots
+        ):
+            conditions |= BreakoutCondition.SR_BREAK
             score += 10
         
         confidence = score / max_score if max_score > 0 else 0
         
         if confidence >= 0.4:  # Lowered to match min_confidence
+            if broken_range >= 0:
+                breakout_level = ranges[broken_range][edge]
+                range_size = ranges[broken_range]['size']
+            else:
+                breakout_level = bb_upper if bullish else bb_lower
+                range_size = 0
             return {
                 'conditions': conditions,
                 'confidence': confidence,
                 'score': score,
                 'max_score': max_score,
-                'breakout_level': breakout_level or bb_lower,
+                'breakout_level': breakout_level,
                 'range_size': range_size,
                 'volume_ratio': volume_ratio
             }
@@ -422,50 +822,32 @@ class BreakoutPunchStrategy(TradingStrategy):
     
     def _check_support_resistance_break(
         self, 
-        df: pd.DataFrame, 
+        highs: np.ndarray, 
+        lows: np.ndarray, 
         current_price: float, 
-        direction: str
+        direction: str,
+        pivots: Optional[Dict[str, np.ndarray]] = None
     ) -> bool:
-        """Check if price is breaking significant support/resistance"""
-        try:
-            # Look for significant levels in recent data
-            lookback = self.parameters['range_periods']
-            recent_data = df.tail(lookback)
-            
-            if direction == 'bullish':
-                # Find resistance levels (recent highs)
-                resistance_levels = []
-                for i in range(2, len(recent_data) - 2):
-                    if (recent_data.iloc[i]['high'] > recent_data.iloc[i-1]['high'] and
-                        recent_data.iloc[i]['high'] > recent_data.iloc[i-2]['high'] and
-                        recent_data.iloc[i]['high'] > recent_data.iloc[i+1]['high'] and
-                        recent_data.iloc[i]['high'] > recent_data.iloc[i+2]['high']):
-                        resistance_levels.append(recent_data.iloc[i]['high'])
-                
-                # Check if current price is breaking any resistance
-                for level in resistance_levels:
-                    if current_price > level * (1 + self.parameters['breakout_threshold']):
-                        return True
-            
-            else:  # bearish
-                # Find support levels (recent lows)
-                support_levels = []
-                for i in range(2, len(recent_data) - 2):
-                    if (recent_data.iloc[i]['low'] < recent_data.iloc[i-1]['low'] and
-                        recent_data.iloc[i]['low'] < recent_data.iloc[i-2]['low'] and
-                        recent_data.iloc[i]['low'] < recent_data.iloc[i+1]['low'] and
-                        recent_data.iloc[i]['low'] < recent_data.iloc[i+2]['low']):
-                        support_levels.append(recent_data.iloc[i]['low'])
-                
-                # Check if current price is breaking any support
-                for level in support_levels:
-                    if current_price < level * (1 - self.parameters['breakout_threshold']):
-                        return True
-        
-        except Exception:
-            pass
-        
-        return False
+        """
+        Check if price is breaking significant support/resistance. pivots
+        memoizes the levels found for this bar, keyed by direction.
+        """
+        # Look for significant levels in recent data
+        lookback = self.parameters['range_periods']
+        bullish = direction == 'bullish'
+        levels = pivots.get(direction) if pivots is not None else None
+        
+        if levels is None:
+            # Resistance levels are recent pivot highs, support levels pivot lows
+            recent = highs[-lookback:] if bullish else lows[-lookback:]
+            levels = _pivot_levels(recent, _PIVOT_NEIGHBOURS, peaks=bullish)
+            if pivots is not None:
+                pivots[direction] = levels
+        
+        # Check if current price is breaking any of them
+        if bullish:
+            return bool((current_price > levels * (1 + self.parameters['breakout_threshold'])).any())
+        return bool((current_price < levels * (1 - self.parameters['breakout_threshold'])).any())
     
     def _create_breakout_signal(
         self,
@@ -481,39 +863,12 @@ class BreakoutPunchStrategy(TradingStrategy):
         breakout_level = signal_data['breakout_level']
         range_size = signal_data.get('range_size', 0)
         
-        if direction == 'buy':
-            # Stop below breakout level
-            stop_loss = breakout_level - (atr * self.parameters['atr_stop_multiplier'])
-            
-            # Target based on range size or ATR
-            if range_size > 0:
-                target_distance = max(
-                    breakout_level * range_size,  # Range-based target
-                    atr * self.parameters['atr_target_multiplier']  # ATR-based target
-                )
-            else:
-                target_distance = atr * self.parameters['atr_target_multiplier']
-            
-            take_profit = price + target_distance
-            risk = price - stop_loss
-            reward = take_profit - price
-            
-        else:  # sell
-            # Stop above breakout level
-            stop_loss = breakout_level + (atr * self.parameters['atr_stop_multiplier'])
-            
-            # Target based on range size or ATR
-            if range_size > 0:
-                target_distance = max(
-                    breakout_level * range_size,
-                    atr * self.parameters['atr_target_multiplier']
-                )
-            else:
-                target_distance = atr * self.parameters['atr_target_multiplier']
-            
-            take_profit = price - target_distance
-            risk = stop_loss - price
-            reward = price - take_profit
+        # Stop beyond the breakout level, target from range size or ATR
+        stop_loss, take_profit, risk, reward = _breakout_targets(
+            direction == 'buy', price, breakout_level, range_size, atr,
+            self.parameters['atr_stop_multiplier'],
+            self.parameters['atr_target_multiplier']
+        )
         
         # Risk-reward validation
         risk_reward_ratio = reward / risk if risk > 0 else 0
@@ -522,7 +877,7 @@ class BreakoutPunchStrategy(TradingStrategy):
             return None
         
         return Signal(
-            id=str(uuid.uuid4()),
+            id=self._next_signal_id(),
             symbol=symbol,
             direction=direction,
             confidence=signal_data['confidence'],
@@ -533,7 +888,10 @@ class BreakoutPunchStrategy(TradingStrategy):
             take_profit=take_profit,
             risk_reward_ratio=risk_reward_ratio,
             indicators={
-                'conditions': signal_data['conditions'],
+                'conditions': {
+                    name: True for flag, name in _CONDITION_NAMES[direction]
+                    if signal_data['conditions'] & flag
+                },
                 'breakout_level': breakout_level,
                 'range_size': range_size,
                 'volume_ratio': signal_data['volume_ratio'],
@@ -545,6 +903,16 @@ class BreakoutPunchStrategy(TradingStrategy):
             }
         )
     
+    def clear_caches(self):
+        """Drop all per-symbol state and worker threads, e.g. before restarting a backtest"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._ohlcv.clear()
+        self._range_cache.clear()
+        self._pivot_cache.clear()
+        self.ema.reset()
+    
     def get_required_indicators(self) -> List[str]:
         """Get list of required indicators"""
         return ['bollinger', 'atr', 'sma', 'ema', 'volume']
@@ -6,17 +6,237 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-import uuid
+from enum import IntFlag
 
-from app.core.trading.base import TradingStrategy, Signal
-from app.core.indicators.momentum import RSIIndicator, MACDIndicator, StochasticIndicator
-from app.core.indicators.trend import SMAIndicator, EMAIndicator
-from app.core.indicators.volatility import BollingerBandsIndicator, ATRIndicator
+from app.core.trading.base import TradingStrategy, Signal, SignalArrays
+from app.core.indicators.incremental import (
+    IncrementalATR, IncrementalBB, IncrementalEMA, IncrementalMACD, IncrementalRSI, IncrementalSMA,
+    rolling_reduce
+)
+from app.utils.jit import njit
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+class MomentumCondition(IntFlag):
+    """Conditions a momentum candidate met, as a bitmask"""
+    RSI_CROSS = 1
+    MACD_MOMENTUM = 2
+    TREND_ALIGNMENT = 4
+    BB_SQUEEZE = 8
+    VOLUME = 16
+    PRICE_POSITION = 32
+    VOLATILITY_OK = 64
+    MACD_SIDE = 128
+
+
+# Score weight of each condition, in bit order
+_CONDITION_WEIGHTS = (20, 15, 15, 10, 10, 10, 10, 10)
+_MAX_SCORE = sum(_CONDITION_WEIGHTS)
+
+# Plain-int condition bits for the scoring kernel, which cannot use the enum
+_COND_RSI = int(MomentumCondition.RSI_CROSS)
+_COND_MACD = int(MomentumCondition.MACD_MOMENTUM)
+_COND_TREND = int(MomentumCondition.TREND_ALIGNMENT)
+_COND_BB_SQUEEZE = int(MomentumCondition.BB_SQUEEZE)
+_COND_VOLUME = int(MomentumCondition.VOLUME)
+_COND_POSITION = int(MomentumCondition.PRICE_POSITION)
+_COND_VOLATILITY = int(MomentumCondition.VOLATILITY_OK)
+_COND_MACD_SIDE = int(MomentumCondition.MACD_SIDE)
+
+# Conditions that cannot hold for both directions on the same bar
+_EXCLUSIVE_CONDITIONS = (
+    MomentumCondition.RSI_CROSS | MomentumCondition.MACD_MOMENTUM |
+    MomentumCondition.TREND_ALIGNMENT | MomentumCondition.BB_SQUEEZE |
+    MomentumCondition.PRICE_POSITION | MomentumCondition.MACD_SIDE
+)
+
+# Condition names reported in signal payloads, for each direction
+_CONDITION_NAMES = {
+    'buy': (
+        (MomentumCondition.RSI_CROSS, 'rsi_breakout'),
+        (MomentumCondition.MACD_MOMENTUM, 'macd_momentum'),
+        (MomentumCondition.TREND_ALIGNMENT, 'trend_alignment'),
+        (MomentumCondition.BB_SQUEEZE, 'bb_squeeze_breakout'),
+        (MomentumCondition.VOLUME, 'volume_confirmation'),
+        (MomentumCondition.PRICE_POSITION, 'price_position'),
+        (MomentumCondition.VOLATILITY_OK, 'volatility_ok'),
+        (MomentumCondition.MACD_SIDE, 'macd_positive'),
+    ),
+    'sell': (
+        (MomentumCondition.RSI_CROSS, 'rsi_breakdown'),
+        (MomentumCondition.MACD_MOMENTUM, 'macd_momentum'),
+        (MomentumCondition.TREND_ALIGNMENT, 'trend_alignment'),
+        (MomentumCondition.BB_SQUEEZE, 'bb_squeeze_breakdown'),
+        (MomentumCondition.VOLUME, 'volume_confirmation'),
+        (MomentumCondition.PRICE_POSITION, 'price_position'),
+        (MomentumCondition.VOLATILITY_OK, 'volatility_ok'),
+        (MomentumCondition.MACD_SIDE, 'macd_negative'),
+    ),
+}
+
+
+@njit(cache=True, nogil=True)
+def _score_momentum(
+    bullish, price, rsi_current, rsi_prev, macd_current,
+    macd_signal_current, macd_hist_current, macd_hist_prev,
+    sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr_pct,
+    rsi_entry, rsi_limit, squeeze_threshold, volume_threshold,
+    trend_filter, volatility_filter, volume_filter
+):
+    """
+    Score one momentum direction: returns (score, condition bits). rsi_entry
+    and rsi_limit are the entry and overbought/oversold levels of the
+    direction. A disabled filter scores its weight without setting its bit.
+    """
+    bits = 0
+    score = 0
+    
+    # RSI crossing its entry level without reaching the extreme
+    if bullish:
+        rsi_cross = rsi_current > rsi_entry and rsi_prev <= rsi_entry and rsi_current < rsi_limit
+    else:
+        rsi_cross = rsi_current < rsi_entry and rsi_prev >= rsi_entry and rsi_current > rsi_limit
+    if rsi_cross:
+        bits |= _COND_RSI
+        score += _CONDITION_WEIGHTS[0]
+    
+    # MACD momentum
+    if bullish:
+        macd_momentum = macd_current > macd_signal_current and macd_hist_current > macd_hist_prev
+    else:
+        macd_momentum = macd_current < macd_signal_current and macd_hist_current < macd_hist_prev
+    if macd_momentum:
+        bits |= _COND_MACD
+        score += _CONDITION_WEIGHTS[1]
+    
+    # Trend alignment
+    if trend_filter:
+        if bullish:
+            aligned = price > sma_fast and sma_fast > sma_slow and price > ema
+        else:
+            aligned = price < sma_fast and sma_fast < sma_slow and price < ema
+        if aligned:
+            bits |= _COND_TREND
+            score += _CONDITION_WEIGHTS[2]
+    else:
+        score += _CONDITION_WEIGHTS[2]
+    
+    # Bollinger Band squeeze breakout, and the side of the middle band
+    beyond_middle = price > bb_middle if bullish else price < bb_middle
+    if volatility_filter:
+        if bb_width < squeeze_threshold and beyond_middle:
+            bits |= _COND_BB_SQUEEZE
+            score += _CONDITION_WEIGHTS[3]
+    else:
+        score += _CONDITION_WEIGHTS[3]
+    
+    # Volume confirmation
+    if volume_filter:
+        if volume_ratio >= volume_threshold:
+            bits |= _COND_VOLUME
+            score += _CONDITION_WEIGHTS[4]
+    else:
+        score += _CONDITION_WEIGHTS[4]
+    
+    # Price position
+    if beyond_middle:
+        bits |= _COND_POSITION
+        score += _CONDITION_WEIGHTS[5]
+    
+    # Volatility check (ATR under 5% of price)
+    if atr_pct < 5.0:
+        bits |= _COND_VOLATILITY
+        score += _CONDITION_WEIGHTS[6]
+    
+    # MACD on the side of the zero line matching the direction
+    if macd_current > 0 if bullish else macd_current < 0:
+        bits |= _COND_MACD_SIDE
+        score += _CONDITION_WEIGHTS[7]
+    
+    return score, bits
+
+
+@njit(cache=True, nogil=True)
+def _momentum_targets(bullish, price, atr, atr_multiplier, min_risk_reward):
+    """
+    Stop and target for a momentum entry at price: returns
+    (stop_loss, take_profit, risk, risk_reward_ratio).
+    """
+    if bullish:
+        stop_loss = price - (atr * atr_multiplier)
+        risk = price - stop_loss
+        take_profit = price + (risk * min_risk_reward)
+        ratio = (take_profit - price) / risk if risk > 0 else 0.0
+    else:
+        stop_loss = price + (atr * atr_multiplier)
+        risk = stop_loss - price
+        take_profit = price - (risk * min_risk_reward)
+        ratio = (price - take_profit) / risk if risk > 0 else 0.0
+    return stop_loss, take_profit, risk, ratio
+
+
+@njit(cache=True, nogil=True)
+def _momentum_series(
+    closes, start, rsi, macd, macd_signal, histogram,
+    sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr,
+    rsi_entry_bull, rsi_entry_bear, rsi_overbought, rsi_oversold,
+    squeeze_threshold, volume_threshold, trend_filter, volatility_filter, volume_filter,
+    min_confidence, min_risk_reward, atr_multiplier
+):
+    """
+    Evaluate every bar from start on as generate_signals would evaluate it
+    as the latest bar. Returns the number of signals and arrays of bar index,
+    direction (+1/-1), confidence, stop, target, risk/reward and conditions.
+    """
+    n = closes.shape[0]
+    bars = np.empty(2 * n, np.int64)
+    directions = np.empty(2 * n, np.int8)
+    confidences = np.empty(2 * n)
+    stops = np.empty(2 * n)
+    targets = np.empty(2 * n)
+    ratios = np.empty(2 * n)
+    conditions = np.empty(2 * n, np.int64)
+    count = 0
+    
+    for i in range(start, n):
+        price = closes[i]
+        atr_pct = (atr[i] / price) * 100
+        
+        for side in range(2):
+            bullish = side == 0
+            score, bits = _score_momentum(
+                bullish, price, rsi[i], rsi[i - 1], macd[i],
+                macd_signal[i], histogram[i], histogram[i - 1],
+                sma_fast[i], sma_slow[i], ema[i], bb_middle[i], bb_width[i], volume_ratio[i], atr_pct,
+                rsi_entry_bull if bullish else rsi_entry_bear,
+                rsi_overbought if bullish else rsi_oversold,
+                squeeze_threshold, volume_threshold,
+                trend_filter, volatility_filter, volume_filter
+            )
+            confidence = score / _MAX_SCORE
+            if confidence < 0.4 or confidence < min_confidence:
+                continue
+            
+            stop_loss, take_profit, risk, ratio = _momentum_targets(
+                bullish, price, atr[i], atr_multiplier, min_risk_reward
+            )
+            if ratio < min_risk_reward:
+                continue
+            
+            bars[count] = i
+            directions[count] = 1 if bullish else -1
+            confidences[count] = confidence
+            stops[count] = stop_loss
+            targets[count] = take_profit
+            ratios[count] = ratio
+            conditions[count] = bits
+            count += 1
+    
+    return count, bars, directions, confidences, stops, targets, ratios, conditions
+
+
 class MomentumPunchStrategy(TradingStrategy):
     """
     Momentum-based strategy that identifies strong directional moves
@@ -76,7 +296,10 @@ class MomentumPunchStrategy(TradingStrategy):
             # Signal filtering
             'trend_filter': True,
             'volume_filter': True,
-            'volatility_filter': True
+            'volatility_filter': True,
+            
+            # Signal ids: uuid4 instead of the cheaper process-local sequence
+            'uuid_signal_ids': False
         }
         
         if parameters:
@@ -84,21 +307,22 @@ class MomentumPunchStrategy(TradingStrategy):
         
         super().__init__("momentum_punch", default_params)
         
-        # Initialize indicators
-        self.rsi = RSIIndicator(period=self.parameters['rsi_period'])
-        self.macd = MACDIndicator(
+        # Initialize indicators; only the latest bars are read, so these
+        # compute just those instead of whole series
+        self.rsi = IncrementalRSI(period=self.parameters['rsi_period'])
+        self.macd = IncrementalMACD(
             fast=self.parameters['macd_fast'],
             slow=self.parameters['macd_slow'],
             signal=self.parameters['macd_signal']
         )
-        self.sma_fast = SMAIndicator(periods=[self.parameters['sma_fast']])
-        self.sma_slow = SMAIndicator(periods=[self.parameters['sma_slow']])
-        self.ema = EMAIndicator(periods=[self.parameters['ema_period']])
-        self.bb = BollingerBandsIndicator(
+        self.sma_fast = IncrementalSMA(self.parameters['sma_fast'])
+        self.sma_slow = IncrementalSMA(self.parameters['sma_slow'])
+        self.ema = IncrementalEMA(self.parameters['ema_period'])
+        self.bb = IncrementalBB(
             period=self.parameters['bb_period'],
             std_dev=self.parameters['bb_std']
         )
-        self.atr = ATRIndicator(period=self.parameters['atr_period'])
+        self.atr = IncrementalATR(period=self.parameters['atr_period'])
     
     async def generate_signals(
         self, 
@@ -114,46 +338,44 @@ class MomentumPunchStrategy(TradingStrategy):
         signals = []
         
         try:
-            # Calculate all indicators
-            rsi_result = await self.rsi.calculate(df)
-            macd_result = await self.macd.calculate(df)
-            sma_fast_result = await self.sma_fast.calculate(df)
-            sma_slow_result = await self.sma_slow.calculate(df)
-            ema_result = await self.ema.calculate(df)
-            bb_result = await self.bb.calculate(df)
-            atr_result = await self.atr.calculate(df)
+            highs = df['high'].to_numpy(dtype=np.float64)
+            lows = df['low'].to_numpy(dtype=np.float64)
+            closes = df['close'].to_numpy(dtype=np.float64)
+            volumes = df['volume'].to_numpy(dtype=np.float64)
             
             # Get current values (last row)
-            current_price = df['close'].iloc[-1]
-            current_volume = df['volume'].iloc[-1]
+            current_price = closes[-1]
+            current_volume = volumes[-1]
             current_time = df.index[-1]
             
             # RSI values
-            rsi_current = rsi_result.values.iloc[-1]
-            rsi_prev = rsi_result.values.iloc[-2]
+            rsi_prev, rsi_current = self.rsi.last(closes)
             
             # MACD values
-            macd_current = macd_result.values.iloc[-1]  # MACD line
-            macd_signal_current = macd_result.additional_series['signal_line'].iloc[-1]
-            macd_hist_current = macd_result.additional_series['histogram'].iloc[-1]
-            macd_hist_prev = macd_result.additional_series['histogram'].iloc[-2]
+            macd_line, signal_line, histogram = self.macd.update(symbol, df.index, closes)
+            macd_current = macd_line[-1]
+            macd_signal_current = signal_line[-1]
+            macd_hist_current = histogram[-1]
+            macd_hist_prev = histogram[-2]
             
             # Moving averages
-            sma_fast_current = sma_fast_result.values.iloc[-1]
-            sma_slow_current = sma_slow_result.values.iloc[-1]
-            ema_current = ema_result.values.iloc[-1]
+            sma_fast_current = self.sma_fast.last(closes)
+            sma_slow_current = self.sma_slow.last(closes)
+            ema_current = self.ema.update(symbol, df.index, closes)
             
             # Bollinger Bands
-            bb_middle = bb_result.values.iloc[-1]  # Middle band (SMA)
-            bb_upper = bb_result.additional_series['upper_band'].iloc[-1]
-            bb_lower = bb_result.additional_series['lower_band'].iloc[-1]
+            upper_band, middle_band, lower_band = self.bb.last(closes)
+            bb_middle = middle_band[-1]
+            bb_upper = upper_band[-1]
+            bb_lower = lower_band[-1]
             bb_width = (bb_upper - bb_lower) / bb_middle if bb_middle != 0 else 0
             
             # ATR
-            atr_current = atr_result.values.iloc[-1]
+            atr_current = self.atr.last(highs, lows, closes)
+            atr_pct = (atr_current / current_price) * 100
             
-            # Volume analysis
-            volume_ma = df['volume'].rolling(self.parameters['volume_ma_period']).mean().iloc[-1]
+            # Volume moving average over the last window only
+            volume_ma = volumes[-self.parameters['volume_ma_period']:].mean()
             volume_ratio = current_volume / volume_ma if volume_ma > 0 else 1
             
             # Check for bullish momentum signal
@@ -162,7 +384,7 @@ class MomentumPunchStrategy(TradingStrategy):
                 macd_signal_current, macd_hist_current, macd_hist_prev,
                 sma_fast_current, sma_slow_current, ema_current,
                 bb_upper, bb_lower, bb_middle, bb_width,
-                volume_ratio, atr_current
+                volume_ratio, atr_pct
             )
             
             if bullish_signal:
@@ -172,13 +394,19 @@ class MomentumPunchStrategy(TradingStrategy):
                 if signal and signal.confidence >= self.parameters['min_confidence']:
                     signals.append(signal)
             
+            # The directions can only both meet the volume and volatility
+            # conditions, so a bullish candidate that met enough of the others
+            # leaves no room for a bearish one to qualify
+            if bullish_signal and not self._opposite_can_qualify(bullish_signal['conditions']):
+                return signals
+            
             # Check for bearish momentum signal
             bearish_signal = self._check_bearish_momentum(
                 current_price, rsi_current, rsi_prev, macd_current,
                 macd_signal_current, macd_hist_current, macd_hist_prev,
                 sma_fast_current, sma_slow_current, ema_current,
                 bb_upper, bb_lower, bb_middle, bb_width,
-                volume_ratio, atr_current
+                volume_ratio, atr_pct
             )
             
             if bearish_signal:
@@ -194,6 +422,90 @@ class MomentumPunchStrategy(TradingStrategy):
             logger.error(f"Error generating momentum signals for {symbol}: {e}")
             return []
     
+    def generate_signals_vectorized(self, df: pd.DataFrame) -> SignalArrays:
+        """
+        Evaluate every bar of df in one pass, with the same outcome as calling
+        generate_signals on each prefix of df, and return the signals as arrays.
+        Intended for backtests; signals_from_arrays converts at a live boundary.
+        """
+        params = self.parameters
+        highs = df['high'].to_numpy(dtype=np.float64)
+        lows = df['low'].to_numpy(dtype=np.float64)
+        closes = df['close'].to_numpy(dtype=np.float64)
+        volumes = df['volume'].to_numpy(dtype=np.float64)
+        
+        # Indicator series, each bar computed as the incremental indicators would
+        rsi = self.rsi.series(closes)
+        macd, macd_signal, histogram = self.macd.series(closes)
+        sma_fast = rolling_reduce(closes, params['sma_fast'], np.mean)
+        sma_slow = rolling_reduce(closes, params['sma_slow'], np.mean)
+        ema = pd.Series(closes).ewm(span=params['ema_period'], adjust=False).mean().to_numpy()
+        bb_middle = rolling_reduce(closes, params['bb_period'], np.mean)
+        bb_std = rolling_reduce(closes, params['bb_period'], np.std, ddof=1)
+        bb_upper = bb_middle + params['bb_std'] * bb_std
+        bb_lower = bb_middle - params['bb_std'] * bb_std
+        prev_closes = np.concatenate(([np.nan], closes[:-1]))
+        true_range = np.fmax(np.fmax(highs - lows, np.abs(highs - prev_closes)), np.abs(lows - prev_closes))
+        atr = rolling_reduce(true_range, params['atr_period'], np.mean)
+        volume_ma = rolling_reduce(volumes, params['volume_ma_period'], np.mean)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_width = np.where(bb_middle != 0, (bb_upper - bb_lower) / bb_middle, 0.0)
+            volume_ratio = np.where(volume_ma > 0, volumes / volume_ma, 1.0)
+        
+        warmup = max(params['sma_slow'], params['macd_slow']) + 10
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count, bars, directions, confidences, stops, targets, ratios, conditions = _momentum_series(
+                closes, max(warmup - 1, 1), rsi, macd, macd_signal, histogram,
+                sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr,
+                params['rsi_entry_bull'], params['rsi_entry_bear'],
+                params['rsi_overbought'], params['rsi_oversold'],
+                params['bb_squeeze_threshold'], params['volume_threshold'],
+                bool(params['trend_filter']),
+                bool(params['volatility_filter']),
+                bool(params['volume_filter']),
+                params['min_confidence'], params['min_risk_reward'], params['atr_multiplier']
+            )
+        
+        bars = bars[:count]
+        return SignalArrays(
+            timestamps=df.index.to_numpy()[bars],
+            directions=directions[:count],
+            confidences=confidences[:count],
+            prices=closes[bars],
+            stop_losses=stops[:count],
+            take_profits=targets[:count],
+            risk_reward_ratios=ratios[:count],
+            conditions=conditions[:count]
+        )
+    
+    def signals_from_arrays(self, symbol: str, arrays: SignalArrays) -> List[Signal]:
+        """Signal objects for signals produced by generate_signals_vectorized"""
+        signals = []
+        for i in range(len(arrays)):
+            direction = 'buy' if arrays.directions[i] > 0 else 'sell'
+            conditions = MomentumCondition(int(arrays.conditions[i]))
+            signals.append(Signal(
+                id=self._next_signal_id(),
+                symbol=symbol,
+                direction=direction,
+                confidence=float(arrays.confidences[i]),
+                price=float(arrays.prices[i]),
+                timestamp=pd.Timestamp(arrays.timestamps[i]).to_pydatetime(),
+                strategy=self.name,
+                stop_loss=float(arrays.stop_losses[i]),
+                take_profit=float(arrays.take_profits[i]),
+                risk_reward_ratio=float(arrays.risk_reward_ratios[i]),
+                indicators={
+                    'conditions': {
+                        name: True for flag, name in _CONDITION_NAMES[direction]
+                        if conditions & flag
+                    }
+                }
+            ))
+        return signals
+    
     def _check_bullish_momentum(
         self,
         price: float,
@@ -211,88 +523,14 @@ class MomentumPunchStrategy(TradingStrategy):
         bb_middle: float,
         bb_width: float,
         volume_ratio: float,
-        atr: float
+        atr_pct: float
     ) -> Optional[Dict[str, Any]]:
         """Check for bullish momentum conditions"""
-        
-        conditions = {}
-        score = 0
-        max_score = 0
-        
-        # RSI momentum breakout
-        max_score += 20
-        if (rsi_current > self.parameters['rsi_entry_bull'] and 
-            rsi_prev <= self.parameters['rsi_entry_bull'] and
-            rsi_current < self.parameters['rsi_overbought']):
-            conditions['rsi_breakout'] = True
-            score += 20
-        
-        # MACD momentum
-        max_score += 15
-        if macd_current > macd_signal_current and macd_hist_current > macd_hist_prev:
-            conditions['macd_momentum'] = True
-            score += 15
-        
-        # Trend alignment
-        max_score += 15
-        if self.parameters['trend_filter']:
-            if price > sma_fast > sma_slow and price > ema:
-                conditions['trend_alignment'] = True
-                score += 15
-        else:
-            score += 15  # Skip filter
-        
-        # Bollinger Band breakout
-        max_score += 10
-        if self.parameters['volatility_filter']:
-            if bb_width < self.parameters['bb_squeeze_threshold']:
-                # Squeeze breakout
-                if price > bb_middle:
-                    conditions['bb_squeeze_breakout'] = True
-                    score += 10
-        else:
-            score += 10  # Skip filter
-        
-        # Volume confirmation
-        max_score += 10
-        if self.parameters['volume_filter']:
-            if volume_ratio >= self.parameters['volume_threshold']:
-                conditions['volume_confirmation'] = True
-                score += 10
-        else:
-            score += 10  # Skip filter
-        
-        # Price position
-        max_score += 10
-        if price > bb_middle:
-            conditions['price_position'] = True
-            score += 10
-        
-        # Volatility check (ATR not too high)
-        max_score += 10
-        atr_pct = (atr / price) * 100
-        if atr_pct < 5.0:  # Less than 5% volatility
-            conditions['volatility_ok'] = True
-            score += 10
-        
-        # MACD above zero line (additional momentum)
-        max_score += 10
-        if macd_current > 0:
-            conditions['macd_positive'] = True
-            score += 10
-        
-        confidence = score / max_score if max_score > 0 else 0
-        
-        # Lower threshold to generate more signals while still maintaining quality
-        if confidence >= 0.4:  # At least 40% of conditions met
-            return {
-                'conditions': conditions,
-                'confidence': confidence,
-                'score': score,
-                'max_score': max_score
-            }
-        
-        return None
+        return self._score_direction(
+            True, price, rsi_current, rsi_prev, macd_current,
+            macd_signal_current, macd_hist_current, macd_hist_prev,
+            sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr_pct
+        )
     
     def _check_bearish_momentum(
         self,
@@ -311,81 +549,54 @@ class MomentumPunchStrategy(TradingStrategy):
         bb_middle: float,
         bb_width: float,
         volume_ratio: float,
-        atr: float
+        atr_pct: float
     ) -> Optional[Dict[str, Any]]:
         """Check for bearish momentum conditions"""
+        return self._score_direction(
+            False, price, rsi_current, rsi_prev, macd_current,
+            macd_signal_current, macd_hist_current, macd_hist_prev,
+            sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr_pct
+        )
+    
+    def _score_direction(
+        self,
+        bullish: bool,
+        price: float,
+        rsi_current: float,
+        rsi_prev: float,
+        macd_current: float,
+        macd_signal_current: float,
+        macd_hist_current: float,
+        macd_hist_prev: float,
+        sma_fast: float,
+        sma_slow: float,
+        ema: float,
+        bb_middle: float,
+        bb_width: float,
+        volume_ratio: float,
+        atr_pct: float
+    ) -> Optional[Dict[str, Any]]:
+        """Score one momentum direction and expand the result when it qualifies"""
+        params = self.parameters
+        
+        score, bits = _score_momentum(
+            bullish, price, rsi_current, rsi_prev, macd_current,
+            macd_signal_current, macd_hist_current, macd_hist_prev,
+            sma_fast, sma_slow, ema, bb_middle, bb_width, volume_ratio, atr_pct,
+            params['rsi_entry_bull'] if bullish else params['rsi_entry_bear'],
+            params['rsi_overbought'] if bullish else params['rsi_oversold'],
+            params['bb_squeeze_threshold'], params['volume_threshold'],
+            bool(params['trend_filter']),
+            bool(params['volatility_filter']),
+            bool(params['volume_filter'])
+        )
+        max_score = _MAX_SCORE
+        confidence = score / max_score
         
-        conditions = {}
-        score = 0
-        max_score = 0
-        
-        # RSI momentum breakdown
-        max_score += 20
-        if (rsi_current < self.parameters['rsi_entry_bear'] and 
-            rsi_prev >= self.parameters['rsi_entry_bear'] and
-            rsi_current > self.parameters['rsi_oversold']):
-            conditions['rsi_breakdown'] = True
-            score += 20
-        
-        # MACD momentum
-        max_score += 15
-        if macd_current < macd_signal_current and macd_hist_current < macd_hist_prev:
-            conditions['macd_momentum'] = True
-            score += 15
-        
-        # Trend alignment
-        max_score += 15
-        if self.parameters['trend_filter']:
-            if price < sma_fast < sma_slow and price < ema:
-                conditions['trend_alignment'] = True
-                score += 15
-        else:
-            score += 15  # Skip filter
-        
-        # Bollinger Band breakdown
-        max_score += 10
-        if self.parameters['volatility_filter']:
-            if bb_width < self.parameters['bb_squeeze_threshold']:
-                # Squeeze breakdown
-                if price < bb_middle:
-                    conditions['bb_squeeze_breakdown'] = True
-                    score += 10
-        else:
-            score += 10  # Skip filter
-        
-        # Volume confirmation
-        max_score += 10
-        if self.parameters['volume_filter']:
-            if volume_ratio >= self.parameters['volume_threshold']:
-                conditions['volume_confirmation'] = True
-                score += 10
-        else:
-            score += 10  # Skip filter
-        
-        # Price position
-        max_score += 10
-        if price < bb_middle:
-            conditions['price_position'] = True
-            score += 10
-        
-        # Volatility check
-        max_score += 10
-        atr_pct = (atr / price) * 100
-        if atr_pct < 5.0:
-            conditions['volatility_ok'] = True
-            score += 10
-        
-        # MACD below zero line
-        max_score += 10
-        if macd_current < 0:
-            conditions['macd_negative'] = True
-            score += 10
-        
-        confidence = score / max_score if max_score > 0 else 0
-        
-        if confidence >= 0.4:
+        # Lower threshold to generate more signals while still maintaining quality
+        if confidence >= 0.4:  # At least 40% of conditions met
             return {
-                'conditions': conditions,
+                'conditions': MomentumCondition(bits),
                 'confidence': confidence,
                 'score': score,
                 'max_score': max_score
@@ -393,6 +604,19 @@ class MomentumPunchStrategy(TradingStrategy):
         
         return None
     
+    def _opposite_can_qualify(self, conditions: MomentumCondition) -> bool:
+        """Whether the other direction can still score enough to qualify"""
+        exclusive = _EXCLUSIVE_CONDITIONS
+        if self.parameters['rsi_entry_bear'] > self.parameters['rsi_entry_bull']:
+            # Overlapping entry levels let both RSI crosses happen at once
+            exclusive &= ~MomentumCondition.RSI_CROSS
+        taken = sum(
+            weight for flag, weight in zip(MomentumCondition, _CONDITION_WEIGHTS)
+            if conditions & exclusive & flag
+        )
+        required = max(0.4, self.parameters['min_confidence'])
+        return (_MAX_SCORE - taken) / _MAX_SCORE >= required
+    
     def _create_bullish_signal(
         self,
         symbol: str,
@@ -403,21 +627,18 @@ class MomentumPunchStrategy(TradingStrategy):
     ) -> Optional[Signal]:
         """Create bullish momentum signal"""
         
-        # Calculate stop loss and take profit
-        stop_loss = price - (atr * self.parameters['atr_multiplier'])
-        risk = price - stop_loss
-        
-        # Calculate take profit based on risk-reward ratio
-        take_profit = price + (risk * self.parameters['min_risk_reward'])
-        
-        # Risk-reward validation
-        risk_reward_ratio = (take_profit - price) / risk if risk > 0 else 0
+        # Stop at an ATR multiple, target at the minimum risk-reward
+        stop_loss, take_profit, risk, risk_reward_ratio = _momentum_targets(
+            True, price, atr,
+            self.parameters['atr_multiplier'],
+            self.parameters['min_risk_reward']
+        )
         
         if risk_reward_ratio < self.parameters['min_risk_reward']:
             return None
         
         return Signal(
-            id=str(uuid.uuid4()),
+            id=self._next_signal_id(),
             symbol=symbol,
             direction='buy',
             confidence=signal_data['confidence'],
@@ -428,7 +649,10 @@ class MomentumPunchStrategy(TradingStrategy):
             take_profit=take_profit,
             risk_reward_ratio=risk_reward_ratio,
             indicators={
-                'conditions': signal_data['conditions'],
+                'conditions': {
+                    name: True for flag, name in _CONDITION_NAMES['buy']
+                    if signal_data['conditions'] & flag
+                },
                 'atr': atr,
                 'risk': risk,
                 'score': signal_data['score'],
@@ -446,21 +670,18 @@ class MomentumPunchStrategy(TradingStrategy):
     ) -> Optional[Signal]:
         """Create bearish momentum signal"""
         
-        # Calculate stop loss and take profit for short
-        stop_loss = price + (atr * self.parameters['atr_multiplier'])
-        risk = stop_loss - price
-        
-        # Calculate take profit
-        take_profit = price - (risk * self.parameters['min_risk_reward'])
-        
-        # Risk-reward validation
-        risk_reward_ratio = (price - take_profit) / risk if risk > 0 else 0
+        # Stop at an ATR multiple, target at the minimum risk-reward
+        stop_loss, take_profit, risk, risk_reward_ratio = _momentum_targets(
+            False, price, atr,
+            self.parameters['atr_multiplier'],
+            self.parameters['min_risk_reward']
+        )
         
         if risk_reward_ratio < self.parameters['min_risk_reward']:
             return None
         
         return Signal(
-            id=str(uuid.uuid4()),
+            id=self._next_signal_id(),
             symbol=symbol,
             direction='sell',
             confidence=signal_data['confidence'],
@@ -471,7 +692,10 @@ class MomentumPunchStrategy(TradingStrategy):
             take_profit=take_profit,
             risk_reward_ratio=risk_reward_ratio,
             indicators={
-                'conditions': signal_data['conditions'],
+                'conditions': {
+                    name: True for flag, name in _CONDITION_NAMES['sell']
+                    if signal_data['conditions'] & flag
+                },
                 'atr': atr,
                 'risk': risk,
                 'score': signal_data['score'],
@@ -479,6 +703,11 @@ class MomentumPunchStrategy(TradingStrategy):
             }
         )
     
+    def clear_caches(self):
+        """Drop all per-symbol state, e.g. before restarting a backtest"""
+        self.macd.reset()
+        self.ema.reset()
+    
     def get_required_indicators(self) -> List[str]:
         """Get list of required indicators"""
         return ['rsi', 'macd', 'sma', 'ema', 'bollinger', 'atr']
@@ -0,0 +1,24 @@
+"""
+Optional Numba JIT support for numeric kernels.
+
+Numba is an optional dependency. When it is not installed ``njit`` returns
+the decorated function unchanged and ``prange`` falls back to ``range``, so
+kernels still run as plain Python/NumPy.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -2,27 +2,40 @@
 Comprehensive testing framework for the trading bot system.
 """
 
+import dataclasses
 import pytest
 import asyncio
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 import pandas as pd
 import numpy as np
 
 from app.core.trading.base import (
-    Order, OrderType, OrderSide, OrderStatus, Signal, Trade, Position, Portfolio
+    Order, OrderType, OrderSide, OrderStatus, Signal, Trade, Position, Portfolio,
+    BotStatus, TradingBot
 )
 from app.core.trading.exchange import BinanceExchange
 from app.core.trading.risk_manager import AdvancedRiskManager, RiskLimits
-from app.core.trading.strategies.momentum_punch import MomentumPunchStrategy
+from app.core.trading.strategies.momentum_punch import MomentumCondition, MomentumPunchStrategy
 from app.core.trading.strategies.value_punch import ValuePunchStrategy
-from app.core.trading.strategies.breakout_punch import BreakoutPunchStrategy
+from app.core.trading.strategies.breakout_punch import (
+    BreakoutCondition, BreakoutPunchStrategy, _OHLCVBuffer, _pivot_levels, _score_breakout
+)
+from app.core.indicators import (
+    BollingerBandsIndicator, ATRIndicator, RSIIndicator, MACDIndicator,
+    IncrementalBB, IncrementalATR, IncrementalEMA, IncrementalRSI, IncrementalMACD
+)
 from app.core.trading.strategies.trend_punch import TrendPunchStrategy
 from app.core.trading.adaptive_bot import AdaptiveMultiStrategyBot
-from app.core.trading.order_manager import SmartOrderManager, ExecutionParams, ExecutionStrategy
+from app.core.trading.order_manager import (
+    SmartOrderManager, ExecutionParams, ExecutionStrategy, twap_schedule
+)
 from app.core.trading.paper_trader import PaperTradingEngine
-from app.core.trading.safety import SafetyManager
+from app.core.trading.safety import (
+    SafetyManager, SafetyAlert, SafetyRule, AlertLevel, TriggerType, ReturnsWindow
+)
 from app.core.trading.monitoring import RealTimeMonitor
 from app.core.trading.analytics import PerformanceAnalyzer
 
@@ -52,6 +65,89 @@ class TestTradingBotBase:
         assert not order.is_filled
         assert order.is_active
     
+    def test_order_updated_at(self):
+        """Test order update time round-trips through nanoseconds"""
+        order = Order(
+            id="test-order-2",
+            symbol="BTC/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.BUY,
+            amount=0.1
+        )
+        stamp = datetime(2024, 1, 2, 3, 4, 5, 678901)
+        
+        order.updated_at = stamp
+        
+        assert order.updated_at == stamp
+        assert order.updated_ns == 1704164645678901000
+    
+    def test_trade_arrays(self):
+        """Test closed-trade arrays follow the trade list"""
+        portfolio = Portfolio(cash=10000.0)
+        stamp = datetime(2024, 1, 2, 3, 4, 5, 678901)
+        
+        def trade(pnl):
+            return Trade(
+                id=str(uuid.uuid4()), symbol="BTC/USDT", side="long",
+                entry_price=100.0, exit_price=100.0 + pnl, size=1.0,
+                entry_time=stamp, exit_time=stamp, pnl=pnl, pnl_pct=0.0,
+                commission=0.0, exit_reason="test", strategy="test"
+            )
+        
+        assert len(portfolio.trade_arrays()[0]) == 0
+        
+        portfolio.trades.extend(trade(float(i)) for i in range(300))
+        pnl, entry_ns, exit_ns = portfolio.trade_arrays()
+        assert pnl.tolist() == [float(i) for i in range(300)]
+        assert (entry_ns == 1704164645678901000).all()
+        assert (exit_ns == 1704164645678901000).all()
+        
+        portfolio.trades.append(trade(-5.0))
+        assert portfolio.trade_arrays()[0][-1] == -5.0
+        
+        portfolio.trades = [trade(7.0)]
+        assert portfolio.trade_arrays()[0].tolist() == [7.0]
+    
+    def test_portfolio_peak_tracking(self):
+        """Test running peak and max drawdown follow valuations"""
+        portfolio = Portfolio(cash=0.0)
+        portfolio.positions["BTC/USDT"] = Position(
+            symbol="BTC/USDT", side="long", size=1.0, entry_price=100.0,
+            current_price=100.0, entry_time=datetime.utcnow()
+        )
+        
+        for price in (100.0, 120.0, 90.0, 110.0, 130.0, 117.0):
+            portfolio.update_portfolio_value({"BTC/USDT": price})
+        
+        assert portfolio.peak_value == 130.0
+        assert portfolio.max_drawdown == pytest.approx(0.25)
+    
+    def test_portfolio_exposure_invalidation(self):
+        """Test exposure is rebuilt after same-size refills and in-place edits"""
+        def position(symbol, size):
+            return Position(
+                symbol=symbol, side="long", size=size, entry_price=100.0,
+                current_price=100.0, entry_time=datetime.utcnow()
+            )
+        
+        portfolio = Portfolio(cash=0.0)
+        portfolio.set_position(position("BTC/USDT", 1.0))
+        assert portfolio.exposure()[2] == {"BTC": 100.0}
+        
+        # Same dict, same length, different holdings (as restore_state does)
+        portfolio.positions.clear()
+        portfolio.invalidate_exposure()
+        portfolio.set_position(position("ETH/USDT", 2.0))
+        assert portfolio.exposure()[2] == {"ETH": 200.0}
+        
+        portfolio.positions["ETH/USDT"].size = 3.0
+        portfolio.invalidate_exposure()
+        assert portfolio.exposure()[0] == pytest.approx(300.0)
+        assert portfolio.largest_position_value() == pytest.approx(300.0)
+        
+        assert portfolio.remove_position("ETH/USDT").size == 3.0
+        assert portfolio.exposure()[0] == 0.0
+    
     def test_position_calculation(self):
         """Test position P&L calculations"""
         position = Position(
@@ -184,6 +280,24 @@ class TestRiskManagement:
         assert size > 0
         assert size <= 0.1  # Should not exceed max position size
     
+    def test_position_size_without_sizing_inputs(self, risk_manager):
+        """Test sizing falls back to zero when every method opts out"""
+        signal = Signal(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            direction="buy",
+            confidence=0.8,
+            price=50000.0,
+            timestamp=datetime.utcnow(),
+            strategy="test",
+            indicators={}
+        )
+        
+        portfolio = Portfolio(cash=0.0)
+        portfolio.total_value = 0.0
+        
+        assert risk_manager.calculate_position_size(signal, portfolio, 0.01) == 0.0
+    
     def test_order_validation(self, risk_manager):
         """Test order validation"""
         portfolio = Portfolio(cash=10000.0)
@@ -212,6 +326,166 @@ class TestRiskManagement:
         )
         
         assert risk_manager.validate_order(invalid_order, portfolio) is False
+    
+    def test_risk_limits_replaced_not_mutated(self, risk_manager):
+        """Test limits are frozen and replacing them updates order validation"""
+        order = Order(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.BUY,
+            amount=0.3,  # 15% of portfolio at 50k
+            price=50000.0
+        )
+        portfolio = Portfolio(cash=100000.0)
+        portfolio.total_value = 100000.0
+        risk_manager.max_portfolio_value = 100000.0
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            risk_manager.risk_limits.max_position_size = 0.2
+        
+        monday_noon = datetime(2024, 1, 8, 12, 0).replace(tzinfo=timezone.utc).timestamp()
+        with patch('app.core.trading.risk_manager.time') as clock:
+            clock.time.return_value = monday_noon
+            assert risk_manager.validate_order(order, portfolio) is False
+            
+            risk_manager.risk_limits = dataclasses.replace(
+                risk_manager.risk_limits, max_position_size=0.2, max_single_asset=0.5
+            )
+            assert risk_manager.validate_order(order, portfolio) is True
+            # The class-level entry point runs the same checks
+            assert AdvancedRiskManager.validate_order(risk_manager, order, portfolio) is True
+    
+    def test_validation_reads_clock_once(self, risk_manager):
+        """Test one clock reading drives the daily reset and the trading hours"""
+        order = Order(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.BUY,
+            amount=0.01,
+            price=50000.0
+        )
+        sunday_night = datetime(2024, 1, 7, 3, 0).replace(tzinfo=timezone.utc).timestamp()
+        risk_manager.daily_trades = 3
+        
+        with patch('app.core.trading.risk_manager.time') as clock:
+            clock.time.return_value = sunday_night
+            assert risk_manager.validate_order(order, Portfolio(cash=10000.0)) is False
+        
+        assert clock.time.call_count == 1
+        assert risk_manager.daily_trades == 0
+        assert risk_manager._last_trade_day == int(sunday_night // 86400)
+        assert risk_manager._validate_trading_hours(sunday_night + 3 * 3600) is True
+    
+    def test_risk_metrics(self, risk_manager):
+        """Test drawdown, VaR, Sharpe and volatility from the equity curve"""
+        portfolio = Portfolio(cash=10000.0)
+        equity = [100.0, 120.0, 90.0, 110.0, 60.0, 80.0, 95.0]
+        
+        for value in equity:
+            portfolio.total_value = value
+            risk_manager.update_after_trade(MagicMock(pnl=0.0), portfolio)
+        
+        metrics = risk_manager._calculate_risk_metrics(portfolio)
+        returns = np.diff(equity) / np.array(equity[:-1])
+        
+        assert metrics['max_drawdown'] == pytest.approx(0.5)
+        assert metrics['var_95'] == pytest.approx(np.percentile(returns, 5))
+        assert metrics['volatility'] == pytest.approx(np.std(returns) * np.sqrt(252))
+        assert metrics['sharpe_ratio'] == pytest.approx(
+            np.mean(returns) / np.std(returns) * np.sqrt(252)
+        )
+    
+    def test_equity_window(self, risk_manager):
+        """Test the equity curve keeps only the most recent window"""
+        portfolio = Portfolio(cash=10000.0)
+        
+        for value in range(1, 301):
+            portfolio.total_value = float(value)
+            risk_manager.update_after_trade(MagicMock(pnl=0.0), portfolio)
+        
+        assert risk_manager.equity_curve == [float(v) for v in range(49, 301)]
+    
+    def test_correlation_cluster(self, risk_manager):
+        """Test orders are blocked once a correlated cluster holds two positions"""
+        portfolio = Portfolio(cash=10000.0)
+        for symbol in ["BTC/USDT", "ETH/USDT"]:
+            portfolio.positions[symbol] = Position(
+                symbol=symbol,
+                side="long",
+                size=0.01,
+                entry_price=100.0,
+                current_price=100.0,
+                entry_time=datetime.utcnow()
+            )
+        
+        def order_for(symbol):
+            return Order(
+                id=str(uuid.uuid4()),
+                symbol=symbol,
+                type=OrderType.MARKET,
+                side=OrderSide.BUY,
+                amount=0.01,
+                price=100.0
+            )
+        
+        assert risk_manager._validate_correlation(order_for("ETH/BTC"), portfolio) is False
+        assert risk_manager._validate_correlation(order_for("SOL/USDT"), portfolio) is True
+    
+    def test_portfolio_risk_alerts(self, risk_manager):
+        """Test alerts fire above 80% of the drawdown and daily loss limits"""
+        portfolio = Portfolio(cash=8500.0)
+        portfolio.total_value = 8500.0
+        risk_manager.max_portfolio_value = 10000.0
+        risk_manager.daily_pnl = -450.0
+        
+        risk = risk_manager.check_portfolio_risk(portfolio)
+        
+        assert risk['max_drawdown'] == pytest.approx(0.15)
+        assert risk['risk_alerts'] == [
+            "Approaching max drawdown: 15.00%",
+            "Approaching daily loss limit: 5.29%"
+        ]
+        
+        risk_manager.daily_pnl = 0.0
+        portfolio.total_value = 10000.0
+        assert risk_manager.check_portfolio_risk(portfolio)['risk_alerts'] == []
+    
+    def test_var_calculation(self, risk_manager):
+        """Test parametric VaR uses the normal quantile for the confidence"""
+        portfolio = Portfolio(cash=0.0)
+        portfolio.total_value = 100000.0
+        
+        var = risk_manager.var_calculator.calculate_var(portfolio)
+        
+        assert var == pytest.approx(100000.0 * 1.6448536269514722 * 0.02)
+    
+    def test_concentration_risk(self, risk_manager):
+        """Test HHI and per-asset exposure follow portfolio price updates"""
+        portfolio = Portfolio(cash=0.0)
+        for symbol, size in [("BTC/USDT", 1.0), ("ETH/USDT", 1.0), ("ETH/BTC", 2.0)]:
+            portfolio.positions[symbol] = Position(
+                symbol=symbol,
+                side="long",
+                size=size,
+                entry_price=100.0,
+                current_price=100.0,
+                entry_time=datetime.utcnow()
+            )
+        
+        assert risk_manager._calculate_concentration_risk(portfolio) == pytest.approx(0.375)
+        
+        portfolio.update_portfolio_value({"BTC/USDT": 200.0})
+        total, _, by_base, count_by_base = portfolio.exposure()
+        
+        assert total == pytest.approx(500.0)
+        assert by_base == {"BTC": 200.0, "ETH": 300.0}
+        assert count_by_base == {"BTC": 1, "ETH": 2}
+        assert portfolio.largest_position_value() == pytest.approx(200.0)
+        assert risk_manager._calculate_concentration_risk(portfolio) == pytest.approx(
+            (200**2 + 100**2 + 200**2) / 500**2
+        )
 
 
 class TestTradingStrategies:
@@ -285,6 +559,276 @@ class TestTradingStrategies:
             assert isinstance(signal, Signal)
             assert signal.strategy == "breakout_punch"
     
+    @pytest.mark.asyncio
+    async def test_breakout_batch_matches_single(self, sample_data):
+        """Test batch breakout generation matches per-symbol generation"""
+        frames = {
+            "BTC/USDT": sample_data,
+            "ETH/USDT": sample_data * 1.01,
+            "SOL/USDT": sample_data.iloc[::-1].set_axis(sample_data.index)
+        }
+        
+        strategy = BreakoutPunchStrategy({'min_risk_reward': 1.0})
+        assert strategy._executor is None
+        batch = strategy.generate_signals_batch(frames)
+        single = BreakoutPunchStrategy({'min_risk_reward': 1.0})
+        
+        assert list(batch) == list(frames)
+        for symbol, df in frames.items():
+            expected = await single.generate_signals(symbol, df, {})
+            assert [(s.direction, s.confidence, s.stop_loss) for s in batch[symbol]] == \
+                [(s.direction, s.confidence, s.stop_loss) for s in expected]
+        
+        # Worker threads are released with the rest of the strategy's state
+        strategy.clear_caches()
+        assert strategy._executor is None
+    
+    @pytest.mark.asyncio
+    async def test_breakout_memoizes_per_bar(self, sample_data):
+        """Test ranges are computed once per bar and caches can be cleared"""
+        strategy = BreakoutPunchStrategy()
+        
+        with patch.object(strategy, '_detect_ranges', wraps=strategy._detect_ranges) as detect:
+            await strategy.generate_signals("BTC/USDT", sample_data, {})
+            await strategy.generate_signals("BTC/USDT", sample_data, {})
+            assert detect.call_count == 1
+            
+            # The same bar still forming with a new high is evaluated afresh
+            forming = sample_data.copy()
+            forming.iloc[-1, forming.columns.get_loc('high')] *= 1.01
+            await strategy.generate_signals("BTC/USDT", forming, {})
+            assert detect.call_count == 2
+        
+        strategy.clear_caches()
+        assert not strategy._range_cache and not strategy._pivot_cache and not strategy._ohlcv
+    
+    @pytest.mark.asyncio
+    async def test_breakout_vectorized_matches_per_bar(self, sample_data):
+        """Test the all-bars pass reproduces per-bar signal generation"""
+        params = {'trend_filter': False, 'volume_filter': False, 'min_risk_reward': 1.0}
+        strategy = BreakoutPunchStrategy(params)
+        
+        expected = []
+        for end in range(1, len(sample_data) + 1):
+            expected += await strategy.generate_signals("BTC/USDT", sample_data.iloc[:end], {})
+        arrays = strategy.generate_signals_vectorized(sample_data)
+        signals = strategy.signals_from_arrays("BTC/USDT", arrays)
+        
+        assert len(expected) > 0
+        assert len(arrays) == len(expected)
+        for signal, reference in zip(signals, expected):
+            assert (signal.timestamp, signal.direction, signal.price) == \
+                (reference.timestamp, reference.direction, reference.price)
+            assert signal.confidence == reference.confidence
+            assert signal.stop_loss == pytest.approx(reference.stop_loss)
+            assert signal.take_profit == pytest.approx(reference.take_profit)
+            assert signal.indicators['conditions'] == reference.indicators['conditions']
+        
+        assert len(strategy.generate_signals_vectorized(sample_data.iloc[:10])) == 0
+    
+    @pytest.mark.asyncio
+    async def test_momentum_vectorized_matches_per_bar(self, sample_data):
+        """Test the momentum all-bars pass reproduces per-bar signal generation"""
+        strategy = MomentumPunchStrategy({'volume_filter': False})
+        
+        expected = []
+        for end in range(1, len(sample_data) + 1):
+            expected += await strategy.generate_signals("BTC/USDT", sample_data.iloc[:end], {})
+        arrays = strategy.generate_signals_vectorized(sample_data)
+        signals = strategy.signals_from_arrays("BTC/USDT", arrays)
+        
+        assert len(expected) > 0
+        assert len(arrays) == len(expected)
+        for signal, reference in zip(signals, expected):
+            assert (signal.timestamp, signal.direction, signal.price) == \
+                (reference.timestamp, reference.direction, reference.price)
+            assert signal.confidence == reference.confidence
+            assert signal.stop_loss == pytest.approx(reference.stop_loss)
+            assert signal.take_profit == pytest.approx(reference.take_profit)
+            assert signal.indicators['conditions'] == reference.indicators['conditions']
+        
+        assert len(strategy.generate_signals_vectorized(sample_data.iloc[:10])) == 0
+    
+    def test_signal_ids(self):
+        """Test strategies hand out sequential ids unless uuids are requested"""
+        strategy = BreakoutPunchStrategy()
+        first, second = strategy._next_signal_id(), strategy._next_signal_id()
+        
+        assert first != second
+        assert first.rsplit('-', 1)[0] == second.rsplit('-', 1)[0]
+        assert int(second.rsplit('-', 1)[1]) > int(first.rsplit('-', 1)[1])
+        assert len(first) <= 36
+        
+        live = BreakoutPunchStrategy({'uuid_signal_ids': True})
+        assert len(live._next_signal_id()) == 36
+    
+    @pytest.mark.asyncio
+    async def test_incremental_indicators(self, sample_data):
+        """Test incremental indicators match the full indicator series"""
+        highs = sample_data['high'].to_numpy()
+        lows = sample_data['low'].to_numpy()
+        closes = sample_data['close'].to_numpy()
+        
+        bb = await BollingerBandsIndicator(period=20, std_dev=2.0).calculate(sample_data)
+        upper, middle, lower = IncrementalBB(period=20, std_dev=2.0).last(closes)
+        np.testing.assert_allclose(upper, bb.additional_series['upper_band'].to_numpy()[-2:])
+        np.testing.assert_allclose(middle, bb.values.to_numpy()[-2:])
+        np.testing.assert_allclose(lower, bb.additional_series['lower_band'].to_numpy()[-2:])
+        
+        atr = await ATRIndicator(period=14).calculate(sample_data)
+        assert IncrementalATR(period=14).last(highs, lows, closes) == pytest.approx(atr.values.iloc[-1])
+        
+        # Extending the frame folds in only the new bars; a moved start rebuilds
+        expected = sample_data['close'].ewm(span=21, adjust=False).mean()
+        ema = IncrementalEMA(21)
+        for end in (60, 61, 80, 100):
+            value = ema.update("BTC/USDT", sample_data.index[:end], closes[:end])
+            assert value == expected.iloc[end - 1]
+        assert ema._states["BTC/USDT"][2] == 99
+        
+        shifted = sample_data['close'].iloc[10:].ewm(span=21, adjust=False).mean()
+        assert ema.update("BTC/USDT", sample_data.index[10:], closes[10:]) == shifted.iloc[-1]
+    
+    @pytest.mark.asyncio
+    async def test_incremental_momentum_indicators(self, sample_data):
+        """Test incremental RSI and MACD match the full indicator series"""
+        closes = sample_data['close'].to_numpy()
+        
+        rsi = await RSIIndicator(period=14).calculate(sample_data)
+        np.testing.assert_allclose(IncrementalRSI(period=14).last(closes), rsi.values.to_numpy()[-2:])
+        # Short frames read neutral like the full indicator
+        np.testing.assert_array_equal(IncrementalRSI(period=14).last(closes[:10]), [50.0, 50.0])
+        
+        macd = IncrementalMACD(fast=12, slow=26, signal=9)
+        for end in (60, 61, 100):
+            full = await MACDIndicator(fast=12, slow=26, signal=9).calculate(sample_data.iloc[:end])
+            line, signal, histogram = macd.update("BTC/USDT", sample_data.index[:end], closes[:end])
+            np.testing.assert_allclose(line, full.values.to_numpy()[-2:])
+            np.testing.assert_allclose(signal, full.additional_series['signal_line'].to_numpy()[-2:])
+            np.testing.assert_allclose(histogram, full.additional_series['histogram'].to_numpy()[-2:])
+        assert macd._states["BTC/USDT"][2] == 99
+        
+        # The all-bars series report what update() reports for each prefix
+        np.testing.assert_allclose(IncrementalRSI(period=14).series(closes)[-2:], rsi.values.to_numpy()[-2:])
+        np.testing.assert_array_equal(macd.series(closes)[2][-2:], histogram)
+    
+    def test_ohlcv_buffer_sync(self):
+        """Test the bar buffer appends extensions and reloads other frames"""
+        n = 1200
+        df = pd.DataFrame({
+            'high': np.arange(n, dtype=float) + 1,
+            'low': np.arange(n, dtype=float) - 1,
+            'close': np.arange(n, dtype=float),
+            'volume': np.arange(n)
+        }, index=pd.date_range('2023-01-01', periods=n, freq='1H'))
+        buffer = _OHLCVBuffer()
+        
+        for end in (100, 101, 600, n):
+            columns = buffer.sync(df.iloc[:end])
+            np.testing.assert_array_equal(columns['close'], df['close'].to_numpy()[:end])
+            np.testing.assert_array_equal(columns['volume'], df['volume'].to_numpy()[:end])
+        
+        # A still-forming last bar is rewritten
+        revised = df.copy()
+        revised.iloc[-1, revised.columns.get_loc('close')] = -1.0
+        assert buffer.sync(revised)['close'][-1] == -1.0
+        
+        # A window that slid forward reloads
+        columns = buffer.sync(df.iloc[50:])
+        np.testing.assert_array_equal(columns['high'], df['high'].to_numpy()[50:])
+    
+    def test_momentum_scoring(self):
+        """Test momentum scoring weights and reported conditions"""
+        strategy = MomentumPunchStrategy()
+        # RSI crossing 60, MACD rising above its signal, aligned trend, no squeeze
+        values = dict(
+            price=105.0, rsi_current=62.0, rsi_prev=58.0, macd_current=1.0,
+            macd_signal_current=0.5, macd_hist_current=0.5, macd_hist_prev=0.2,
+            sma_fast=103.0, sma_slow=100.0, ema=104.0, bb_middle=102.0,
+            bb_width=0.2, volume_ratio=1.0, atr_pct=1.0
+        )
+        
+        bullish = strategy._score_direction(True, **values)
+        assert bullish['score'] == 80 and bullish['max_score'] == 100
+        assert bullish['conditions'] == (
+            MomentumCondition.RSI_CROSS | MomentumCondition.MACD_MOMENTUM |
+            MomentumCondition.TREND_ALIGNMENT | MomentumCondition.PRICE_POSITION |
+            MomentumCondition.VOLATILITY_OK | MomentumCondition.MACD_SIDE
+        )
+        assert strategy._score_direction(False, **values) is None
+        # Beyond the shared volatility condition the bullish side took 70 of 100
+        assert not strategy._opposite_can_qualify(bullish['conditions'])
+        assert strategy._opposite_can_qualify(MomentumCondition.RSI_CROSS | MomentumCondition.VOLATILITY_OK)
+        
+        # A disabled filter scores its weight without being reported
+        strategy.parameters['volume_filter'] = False
+        unfiltered = strategy._score_direction(True, **values)
+        assert unfiltered['score'] == 90
+        assert not unfiltered['conditions'] & MomentumCondition.VOLUME
+    
+    def test_breakout_scoring_kernel(self):
+        """Test the breakout scoring kernel sets the expected condition bits"""
+        # Breakout prices of a wide range, then a tighter one the price clears
+        triggers = np.array([105.0, 101.5])
+        
+        score, max_score, bits, broken_range = _score_breakout(
+            True, 102.0, 101.0,
+            101.0, 90.0, 11.0 / 98.0, 11.0 / 98.0,
+            99.0, 97.0, 100.0, 2.0,
+            triggers, True, True, 0.1, 1.5
+        )
+        assert (score, max_score, broken_range) == (85, 90, 1)
+        assert BreakoutCondition(bits) == (
+            BreakoutCondition.RANGE_BREAKOUT | BreakoutCondition.BB_BREAKOUT |
+            BreakoutCondition.MA_ALIGNMENT | BreakoutCondition.VOLUME | BreakoutCondition.MOMENTUM
+        )
+        
+        # Nothing breaks to the downside
+        score, _, bits, broken_range = _score_breakout(
+            False, 102.0, 101.0,
+            101.0, 90.0, 11.0 / 98.0, 11.0 / 98.0,
+            99.0, 97.0, 100.0, 1.0,
+            np.array([95.0]), True, True, 0.1, 1.5
+        )
+        assert (score, bits, broken_range) == (0, 0, -1)
+    
+    def test_breakout_skips_pivot_scan_when_out_of_reach(self):
+        """Test the pivot scan only runs when a break could still make a signal"""
+        strategy = BreakoutPunchStrategy({'min_confidence': 0.9})
+        highs = np.linspace(100.0, 110.0, 30)
+        kwargs = dict(
+            highs=highs, lows=highs - 2.0, current_price=111.0, prev_close=110.0,
+            bb_upper=110.0, bb_lower=90.0, bb_width=0.2, prev_bb_width=0.2,
+            sma_fast=105.0, sma_slow=100.0, ema=104.0, volume_ratio=2.0, ranges=[]
+        )
+        
+        # Bollinger, MA, volume and momentum give 55 of 90: 65% at best
+        with patch.object(strategy, '_check_support_resistance_break', return_value=True) as scan:
+            assert strategy._check_bullish_breakout(**kwargs) is None
+            scan.assert_not_called()
+            
+            strategy.parameters['min_confidence'] = 0.6
+            result = strategy._check_bullish_breakout(**kwargs)
+            scan.assert_called_once()
+            assert result['confidence'] == pytest.approx(0.65)
+            assert result['conditions'] & BreakoutCondition.SR_BREAK
+    
+    def test_breakout_support_resistance_pivots(self):
+        """Test pivot levels are detected and broken in both directions"""
+        strategy = BreakoutPunchStrategy({'range_periods': 10})
+        highs = np.array([100, 101, 105, 101, 100, 99, 100, 102, 100, 99], dtype=float)
+        lows = np.array([95, 94, 90, 94, 95, 96, 95, 93, 95, 96], dtype=float)
+        
+        assert strategy._check_support_resistance_break(highs, lows, 103.0, 'bullish') is True
+        assert strategy._check_support_resistance_break(highs, lows, 102.0, 'bullish') is False
+        assert strategy._check_support_resistance_break(highs, lows, 92.0, 'bearish') is True
+        assert strategy._check_support_resistance_break(highs, lows, 93.0, 'bearish') is False
+        
+        # Flat tops are not pivots
+        assert _pivot_levels(np.array([1.0, 1.0, 5.0, 5.0, 1.0, 1.0]), 2, peaks=True).size == 0
+        np.testing.assert_array_equal(_pivot_levels(highs, 1, peaks=True), [105, 102])
+        np.testing.assert_array_equal(_pivot_levels(lows, 1, peaks=False), [90, 93])
+    
     @pytest.mark.asyncio
     async def test_trend_strategy(self, sample_data):
         """Test trend strategy signal generation"""
@@ -469,6 +1013,64 @@ class TestOrderExecution:
         
         assert report.strategy_used == ExecutionStrategy.TWAP
         assert report.chunks_executed > 1
+    
+    def test_twap_schedule(self):
+        """Test TWAP schedule is an exact equal split of at most 20 chunks"""
+        sizes = twap_schedule(0.1, 0.02)
+        assert len(sizes) == 5
+        assert sizes.sum() == 0.1
+        assert np.allclose(sizes, 0.02)
+        
+        # Remainder is spread instead of leaving a tiny tail chunk
+        sizes = twap_schedule(0.1, 0.03)
+        assert len(sizes) == 4
+        assert sizes.sum() == 0.1
+        
+        # Huge orders stop at 20 full chunks, never exceeding chunk_size
+        sizes = twap_schedule(1000.0, 10.0)
+        assert len(sizes) == 20
+        assert np.all(sizes == 10.0)
+        assert sizes.sum() == 200.0
+    
+    @pytest.mark.asyncio
+    async def test_iceberg_execution(self, mock_exchange):
+        """Test iceberg slices advance as soon as each slice fills"""
+        order_manager = SmartOrderManager(mock_exchange)
+        
+        signal = Signal(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            direction="buy",
+            confidence=0.8,
+            price=50000.0,
+            timestamp=datetime.utcnow(),
+            strategy="test",
+            indicators={}
+        )
+        
+        filled_order = Order(
+            id="order-123",
+            symbol="BTC/USDT",
+            type=OrderType.LIMIT,
+            side=OrderSide.BUY,
+            amount=0.01,  # 10% visible slice
+            filled_amount=0.01,
+            filled_price=49950.0,
+            status=OrderStatus.FILLED,
+            commission=0.05
+        )
+        mock_exchange.get_order_status.return_value = filled_order
+        
+        execution_params = ExecutionParams(strategy=ExecutionStrategy.ICEBERG)
+        
+        start = datetime.utcnow()
+        report = await order_manager.execute_order(signal, 0.1, execution_params)
+        elapsed = (datetime.utcnow() - start).total_seconds()
+        
+        assert report.success is True
+        assert report.strategy_used == ExecutionStrategy.ICEBERG
+        assert report.chunks_executed >= 10
+        assert elapsed < 2  # No fixed pause between slices
 
 
 class TestPaperTrading:
@@ -516,6 +1118,330 @@ class TestPaperTrading:
         # Check account balance updated
         account = paper_engine.accounts[account_id]
         assert account.current_balance < 10000.0  # Should be reduced by purchase
+    
+    @pytest.mark.asyncio
+    async def test_position_pnl_refresh(self, paper_engine):
+        """Test unrealized PnL is refreshed for every open position"""
+        account_id = await paper_engine.create_account()
+        
+        for symbol in ["BTC/USDT", "ETH/USDT", "SOL/USDT"]:
+            order = Order(
+                id=str(uuid.uuid4()),
+                symbol=symbol,
+                type=OrderType.MARKET,
+                side=OrderSide.BUY,
+                amount=0.1,
+                price=50000.0
+            )
+            await paper_engine.place_order(account_id, order, simulate_delay=False)
+        
+        sell = Order(
+            id=str(uuid.uuid4()),
+            symbol="ETH/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.SELL,
+            amount=0.1,
+            price=50000.0
+        )
+        await paper_engine.place_order(account_id, sell, simulate_delay=False)
+        
+        positions = await paper_engine.get_positions(account_id)
+        
+        assert set(positions) == {"BTC/USDT", "SOL/USDT"}
+        for position in positions.values():
+            expected = (50000.0 - position.entry_price) * position.size
+            assert position.unrealized_pnl == pytest.approx(expected)
+    
+    @pytest.mark.asyncio
+    async def test_position_cost_basis(self, paper_engine):
+        """Test running cost basis tracks the average entry price"""
+        account_id = await paper_engine.create_account()
+        
+        fills = []
+        for side, amount in [(OrderSide.BUY, 0.2), (OrderSide.BUY, 0.1), (OrderSide.SELL, 0.15)]:
+            order = Order(
+                id=str(uuid.uuid4()),
+                symbol="BTC/USDT",
+                type=OrderType.MARKET,
+                side=side,
+                amount=amount,
+                price=50000.0
+            )
+            await paper_engine.place_order(account_id, order, simulate_delay=False)
+            fills.append(order)
+        
+        position = paper_engine.accounts[account_id].positions["BTC/USDT"]
+        expected_entry = (
+            fills[0].amount * fills[0].filled_price + fills[1].amount * fills[1].filled_price
+        ) / 0.3
+        
+        assert position.size == pytest.approx(0.15)
+        assert position.entry_price == pytest.approx(expected_entry)
+        assert position.cost_basis == pytest.approx(position.size * position.entry_price)
+    
+    @pytest.mark.asyncio
+    async def test_account_metrics_counters(self, paper_engine, sample_trades):
+        """Test trade counters are maintained as trades are recorded"""
+        account_id = await paper_engine.create_account()
+        account = paper_engine.accounts[account_id]
+        
+        for trade in sample_trades:
+            account.record_trade(trade)
+        account.calculate_metrics()
+        
+        winners = sum(1 for trade in sample_trades if trade.pnl > 0)
+        assert account.trades_count == len(sample_trades)
+        assert account.winning_trades == winners
+        assert account.losing_trades == len(sample_trades) - winners
+        assert account.total_pnl == pytest.approx(sum(t.pnl for t in sample_trades))
+        
+        recent = await paper_engine.get_trades(account_id, limit=3)
+        assert recent == sample_trades[-3:]
+        
+        stats = paper_engine.get_global_stats()
+        assert stats['total_trades'] == len(sample_trades)
+        assert stats['total_volume'] == pytest.approx(
+            sum(t.size * t.entry_price for t in sample_trades)
+        )
+    
+    @pytest.mark.asyncio
+    async def test_order_index(self, paper_engine):
+        """Test orders are listed newest first and active orders tracked"""
+        account_id = await paper_engine.create_account()
+        
+        limit_order = Order(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            type=OrderType.LIMIT,
+            side=OrderSide.BUY,
+            amount=0.1,
+            price=40000.0,  # Below market, stays open
+            created_at=datetime.utcnow() - timedelta(minutes=1)
+        )
+        market_order = Order(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.BUY,
+            amount=0.1,
+            price=50000.0
+        )
+        await paper_engine.place_order(account_id, market_order, simulate_delay=False)
+        await paper_engine.place_order(account_id, limit_order, simulate_delay=False)
+        
+        orders = await paper_engine.get_orders(account_id)
+        assert [o.id for o in orders] == [market_order.id, limit_order.id]
+        
+        active = await paper_engine.get_orders(account_id, active_only=True)
+        assert [o.id for o in active] == [limit_order.id]
+        
+        latest = await paper_engine.get_orders(account_id, limit=1)
+        assert [o.id for o in latest] == [market_order.id]
+        assert await paper_engine.get_orders(account_id, active_only=True, limit=0) == []
+        
+        assert await paper_engine.cancel_order(account_id, limit_order.id) is True
+        assert await paper_engine.get_orders(account_id, active_only=True) == []
+        
+        status = await paper_engine.get_account_status(account_id)
+        assert status['open_orders'] == 0
+    
+    @pytest.mark.asyncio
+    async def test_filled_orders_not_stored(self, paper_engine):
+        """Test accounts can skip keeping filled orders"""
+        account_id = await paper_engine.create_account(store_filled_orders=False)
+        
+        order = Order(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            type=OrderType.MARKET,
+            side=OrderSide.BUY,
+            amount=0.1,
+            price=50000.0
+        )
+        await paper_engine.place_order(account_id, order, simulate_delay=False)
+        
+        account = paper_engine.accounts[account_id]
+        assert order.status == OrderStatus.FILLED
+        assert account.orders == {}
+        assert account.order_index == []
+        assert "BTC/USDT" in account.positions
+    
+    @pytest.mark.asyncio
+    async def test_price_cache_ttl(self, paper_engine):
+        """Test prices are served from cache until the TTL expires"""
+        assert await paper_engine._get_current_price("BTC/USDT") == 50000.0
+        assert await paper_engine._get_current_price("BTC/USDT") == 50000.0
+        assert paper_engine.exchange.get_ticker.await_count == 1
+        
+        paper_engine.price_ttl = 0.0
+        await paper_engine._get_current_price("BTC/USDT")
+        assert paper_engine.exchange.get_ticker.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_backtest_signal_alignment(self, paper_engine, sample_ohlcv_data):
+        """Test backtest aligns signals to nearest candles and skips stragglers"""
+        df = sample_ohlcv_data
+        
+        def make_signal(timestamp, direction):
+            return Signal(
+                id=str(uuid.uuid4()),
+                symbol="BTC/USDT",
+                direction=direction,
+                confidence=0.8,
+                price=50000.0,
+                timestamp=timestamp,
+                strategy="test",
+                indicators={}
+            )
+        
+        signals = [
+            make_signal(df.index[50] + timedelta(minutes=20), 'sell'),
+            make_signal(df.index[10], 'buy'),
+            make_signal(df.index[-1] + timedelta(hours=5), 'buy'),  # No nearby candle
+        ]
+        
+        with patch(
+            'app.core.trading.paper_trader.data_manager.fetch_ohlcv',
+            new=AsyncMock(return_value=df)
+        ):
+            result = await paper_engine.run_backtest(
+                account_id=None,
+                symbol="BTC/USDT",
+                start_date=df.index[0].to_pydatetime(),
+                end_date=df.index[-1].to_pydatetime(),
+                strategy_signals=signals
+            )
+        
+        assert result['signals_processed'] == 3
+        assert result['signals_executed'] == 2
+        assert result['total_trades'] == 1
+        
+        trade = result['trades'].iloc[0]
+        assert trade['entry_price'] == df['high'].iloc[10]
+        assert trade['exit_price'] == df['low'].iloc[50]
+        assert trade['exit_time'] == df.index[50]
+        
+        orders = result['orders']
+        assert list(orders['side']) == ['buy', 'sell']
+    
+    @pytest.mark.asyncio
+    async def test_backtest_drawdown_marks_positions(self, paper_engine, sample_ohlcv_data):
+        """Test backtest drawdown is taken on marked-to-market equity, not cash"""
+        df = sample_ohlcv_data
+        signals = [
+            Signal(
+                id=str(uuid.uuid4()),
+                symbol="BTC/USDT",
+                direction=direction,
+                confidence=0.8,
+                price=50000.0,
+                timestamp=df.index[k],
+                strategy="test",
+                indicators={}
+            )
+            for k, direction in [(10, 'buy'), (30, 'sell')]
+        ]
+        
+        with patch(
+            'app.core.trading.paper_trader.data_manager.fetch_ohlcv',
+            new=AsyncMock(return_value=df)
+        ):
+            result = await paper_engine.run_backtest(
+                account_id=None,
+                symbol="BTC/USDT",
+                start_date=df.index[0].to_pydatetime(),
+                end_date=df.index[-1].to_pydatetime(),
+                strategy_signals=signals
+            )
+        
+        buy, sell = result['orders'].itertuples()
+        initial = result['initial_balance']
+        cash = initial - buy.filled_amount * buy.filled_price - buy.commission
+        held = buy.filled_amount - sell.filled_amount
+        equity = [
+            cash + buy.filled_amount * df['close'].iloc[10],
+            result['final_balance'] + max(held, 0.0) * df['close'].iloc[30]
+        ]
+        peaks = np.maximum.accumulate(np.maximum(equity, initial))
+        
+        # Spending cash on the buy is not a loss
+        assert result['max_drawdown'] == pytest.approx(np.max((peaks - equity) / peaks))
+        assert result['max_drawdown'] < 0.05
+    
+    @pytest.mark.asyncio
+    async def test_backtest_without_closed_trades(self, paper_engine, sample_ohlcv_data):
+        """Test a backtest that closes no trade returns an empty trade table"""
+        df = sample_ohlcv_data
+        signal = Signal(
+            id=str(uuid.uuid4()),
+            symbol="BTC/USDT",
+            direction='buy',
+            confidence=0.8,
+            price=50000.0,
+            timestamp=df.index[10],
+            strategy="test",
+            indicators={}
+        )
+        
+        with patch(
+            'app.core.trading.paper_trader.data_manager.fetch_ohlcv',
+            new=AsyncMock(return_value=df)
+        ):
+            for signals in ([signal], []):
+                result = await paper_engine.run_backtest(
+                    account_id=None,
+                    symbol="BTC/USDT",
+                    start_date=df.index[0].to_pydatetime(),
+                    end_date=df.index[-1].to_pydatetime(),
+                    strategy_signals=signals
+                )
+                
+                assert result['total_trades'] == 0
+                assert result['trades'].empty
+                assert 'pnl' in result['trades'].columns
+                assert result['win_rate'] == 0
+    
+    @pytest.mark.asyncio
+    async def test_backtest_batch(self, paper_engine, sample_ohlcv_data):
+        """Test batched backtests match individual runs per parameter set"""
+        df = sample_ohlcv_data
+        
+        signals = [
+            Signal(
+                id=str(uuid.uuid4()),
+                symbol="BTC/USDT",
+                direction=direction,
+                confidence=0.8,
+                price=50000.0,
+                timestamp=df.index[k],
+                strategy="test",
+                indicators={}
+            )
+            for k, direction in [(10, 'buy'), (30, 'sell'), (40, 'buy'), (60, 'sell')]
+        ]
+        window = dict(
+            symbol="BTC/USDT",
+            start_date=df.index[0].to_pydatetime(),
+            end_date=df.index[-1].to_pydatetime(),
+            strategy_signals=signals
+        )
+        
+        with patch(
+            'app.core.trading.paper_trader.data_manager.fetch_ohlcv',
+            new=AsyncMock(return_value=df)
+        ):
+            batch = await paper_engine.run_backtests_batch(
+                param_grid=[{'initial_balance': 100000}, {'initial_balance': 50000}],
+                max_workers=2,
+                **window
+            )
+            single = await paper_engine.run_backtest(
+                account_id=None, initial_balance=50000, **window
+            )
+        
+        assert [r['initial_balance'] for r in batch] == [100000, 50000]
+        assert batch[1]['final_balance'] == pytest.approx(single['final_balance'])
+        assert batch[1]['total_trades'] == single['total_trades'] == 2
 
 
 class TestSafetySystem:
@@ -526,6 +1452,31 @@ class TestSafetySystem:
         """Create safety manager"""
         return SafetyManager()
     
+    @pytest.fixture
+    def bot(self):
+        """Create a running bot stand-in"""
+        bot = MagicMock(spec=TradingBot)
+        bot.bot_id = "safety-bot"
+        bot.name = "Safety Bot"
+        bot.status = BotStatus.RUNNING
+        bot.portfolio = Portfolio(cash=10000.0, total_value=10000.0)
+        bot.on_trade_handlers = []
+        bot.add_trade_handler.side_effect = bot.on_trade_handlers.append
+        bot.pause = AsyncMock()
+        bot.stop = AsyncMock()
+        return bot
+    
+    @staticmethod
+    def _trade(pnl, exit_time=None):
+        exit_time = exit_time or datetime.utcnow()
+        return Trade(
+            id=str(uuid.uuid4()), symbol="BTC/USDT", side="long",
+            entry_price=50000.0, exit_price=50000.0 + pnl, size=1.0,
+            entry_time=exit_time - timedelta(hours=1), exit_time=exit_time,
+            pnl=pnl, pnl_pct=0.0, commission=0.0,
+            exit_reason="test", strategy="test"
+        )
+    
     def test_safety_rule_initialization(self, safety_manager):
         """Test safety rule initialization"""
         assert len(safety_manager.safety_rules) > 0
@@ -545,6 +1496,283 @@ class TestSafetySystem:
         kill_switch = safety_manager.kill_switches['emergency_stop']
         assert kill_switch.activated_at is not None
         assert kill_switch.activated_by == 'test_user'
+    
+    @pytest.mark.asyncio
+    async def test_trade_event_checks_bot(self, safety_manager, bot):
+        """Test a trade event runs the bot's rules from running state"""
+        safety_manager.register_bot(bot)
+        safety_manager.monitoring_active = True
+        
+        # Old losses from yesterday count toward the streak but not the day
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        bot.portfolio.trades.extend(self._trade(-10.0, yesterday) for _ in range(4))
+        await bot.on_trade_handlers[0](bot.portfolio.trades[-1])
+        await safety_manager._dispatch(safety_manager.event_queue.get_nowait())
+        bot.pause.assert_not_awaited()
+        
+        bot.portfolio.trades.append(self._trade(-10.0))
+        await bot.on_trade_handlers[0](bot.portfolio.trades[-1])
+        await safety_manager._dispatch(safety_manager.event_queue.get_nowait())
+        
+        state = safety_manager.rule_state[bot.bot_id]
+        assert state.consecutive_losses == 5
+        assert state.daily_pnl == pytest.approx(-10.0)
+        bot.pause.assert_awaited_once()
+        
+        safety_manager.unregister_bot(bot.bot_id)
+        assert bot.on_trade_handlers == []
+    
+    @pytest.mark.asyncio
+    async def test_monitoring_wakes_on_register(self, safety_manager, bot):
+        """Test a bot registered mid-interval is checked without waiting"""
+        safety_manager.monitor_interval = 60
+        bot.portfolio.trades.extend(self._trade(-10.0) for _ in range(5))
+        
+        task = asyncio.create_task(safety_manager.start_monitoring())
+        await asyncio.sleep(0)
+        safety_manager.register_bot(bot)
+        
+        for _ in range(50):
+            if bot.pause.await_count:
+                break
+            await asyncio.sleep(0.01)
+        
+        await safety_manager.stop_monitoring()
+        await asyncio.wait_for(task, timeout=1)
+        
+        bot.pause.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_exchange_kill_switch_probes(self, safety_manager, bot):
+        """Test exchange probes run concurrently and count failures"""
+        in_flight = peak = 0
+        
+        async def fetch_status(fail):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if fail:
+                raise ConnectionError("down")
+        
+        kill_switch = safety_manager.kill_switches['exchange_issues']
+        assert not await safety_manager._check_kill_switch_conditions(kill_switch, datetime.utcnow())
+        
+        for i in range(4):
+            member = MagicMock(spec=TradingBot)
+            member.bot_id, member.name = f"bot-{i}", f"Bot {i}"
+            member.exchange = MagicMock()
+            member.exchange.exchange.fetch_status = lambda fail=i < 2: fetch_status(fail)
+            safety_manager.bots[member.bot_id] = member
+        
+        assert await safety_manager._check_kill_switch_conditions(kill_switch, datetime.utcnow())
+        assert peak == 4
+    
+    @pytest.mark.asyncio
+    async def test_exchange_status_cached(self, safety_manager, bot):
+        """Test bots sharing an exchange reuse one status probe"""
+        exchange = MagicMock()
+        exchange.fetch_status = AsyncMock(return_value={'status': 'ok'})
+        bot.exchange = MagicMock(exchange=exchange)
+        
+        results = await asyncio.gather(*(safety_manager._probe_exchange(bot) for _ in range(3)))
+        assert results == [False, False, False]
+        assert await safety_manager._probe_exchange(bot) is False
+        assert exchange.fetch_status.await_count == 1
+        
+        # Expired entries probe again
+        key = id(exchange)
+        probed_at, _, task = safety_manager._exchange_status[key]
+        safety_manager._exchange_status[key] = (probed_at - 60, exchange, task)
+        exchange.fetch_status.side_effect = ConnectionError("down")
+        assert await safety_manager._probe_exchange(bot) is True
+        assert exchange.fetch_status.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_alert_history(self, safety_manager):
+        """Test alert expiry and newest-first retrieval"""
+        now = datetime.utcnow()
+        for days_ago in (9, 8, 3, 2, 1):
+            safety_manager.alerts.append(SafetyAlert(
+                id=str(days_ago), timestamp=now - timedelta(days=days_ago),
+                level=AlertLevel.CRITICAL if days_ago % 2 else AlertLevel.WARNING,
+                trigger_type=TriggerType.DRAWDOWN, bot_id="bot", message="test"
+            ))
+        
+        await safety_manager._cleanup_old_alerts(now, time.monotonic_ns())
+        
+        assert [a.id for a in safety_manager.alerts] == ['3', '2', '1']
+        assert [a.id for a in safety_manager.get_alerts(limit=2)] == ['1', '2']
+        assert [a.id for a in safety_manager.get_alerts(level=AlertLevel.CRITICAL)] == ['1', '3']
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_trigger_suppressed(self, safety_manager, bot):
+        """Test a rule firing twice for a bot in one bucket alerts once"""
+        rule = safety_manager.safety_rules['max_drawdown']
+        now = datetime.utcnow()
+        
+        await safety_manager._handle_safety_trigger(bot, rule, now)
+        await safety_manager._handle_safety_trigger(bot, rule, now)
+        
+        assert len(safety_manager.alerts) == 1
+        assert safety_manager.total_alerts == 1
+        bot.pause.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_fleet_drawdown_kill_switch(self, safety_manager, bot):
+        """Test the catastrophic-loss switch measures from each bot's peak"""
+        kill_switch = safety_manager.kill_switches['catastrophic_loss']
+        safety_manager.register_bot(bot)
+        
+        bot.portfolio.peak_value = 14000.0
+        bot.portfolio.total_value = 11000.0
+        assert not await safety_manager._check_kill_switch_conditions(kill_switch, datetime.utcnow())
+        
+        bot.portfolio.total_value = 10000.0
+        assert await safety_manager._check_kill_switch_conditions(kill_switch, datetime.utcnow())
+    
+    @pytest.mark.asyncio
+    async def test_large_position_alert(self, safety_manager, bot):
+        """Test the largest position share drives the position size rule"""
+        safety_manager.register_bot(bot)
+        for i in range(12):
+            symbol = f"C{i}/USDT"
+            bot.portfolio.positions[symbol] = Position(
+                symbol=symbol, side="long", size=1.0, entry_price=100.0,
+                current_price=100.0, entry_time=datetime.utcnow()
+            )
+        bot.portfolio.cash = 1000.0
+        prices = {symbol: 100.0 for symbol in bot.portfolio.positions}
+        prices["C3/USDT"] = 3000.0
+        bot.portfolio.update_portfolio_value(prices)
+        
+        await safety_manager._check_bot_safety(bot, datetime.utcnow())
+        
+        assert safety_manager.rule_state[bot.bot_id].last_position_pct == pytest.approx(3000.0 / 5100.0)
+        assert [a.trigger_type for a in safety_manager.alerts] == [TriggerType.POSITION_SIZE]
+        bot.pause.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_suspicious_activity(self, safety_manager, bot):
+        """Test rapid-fire trading is flagged from exit-to-entry gaps"""
+        safety_manager.add_rule(SafetyRule(
+            id="rapid", name="Rapid Fire", trigger_type=TriggerType.SUSPICIOUS_ACTIVITY,
+            action="alert"
+        ))
+        start = datetime.utcnow() - timedelta(hours=1)
+        
+        for gap in (90, 30):
+            bot.portfolio.trades = [
+                self._trade(1.0, start + timedelta(seconds=i * (gap + 3600))) for i in range(12)
+            ]
+            await safety_manager._check_bot_safety(bot, datetime.utcnow())
+        
+        assert [a.trigger_type for a in safety_manager.alerts] == [TriggerType.SUSPICIOUS_ACTIVITY]
+        
+        assert safety_manager.remove_rule("rapid")
+        assert TriggerType.SUSPICIOUS_ACTIVITY not in safety_manager._rules_by_type
+    
+    def test_returns_window_correlation(self):
+        """Test windowed max correlation against np.corrcoef"""
+        rng = np.random.default_rng(7)
+        window = ReturnsWindow(("A", "B", "C", "D"), size=50)
+        prices = np.full(4, 100.0)
+        returns = []
+        
+        window.add_prices(prices.copy())
+        assert window.max_correlation() == 0.0
+        
+        for _ in range(80):
+            r = rng.normal(0, 0.01, 4)
+            r[1] = 0.9 * r[0] + 0.1 * r[1]
+            r[3] = 0.0  # Flat symbol is left out
+            prices = prices * (1 + r)
+            returns.append(r)
+            window.add_prices(prices.copy())
+        
+        expected = np.corrcoef(np.array(returns[-50:])[:, :3], rowvar=False)
+        np.fill_diagonal(expected, 0.0)
+        assert window.count == 50
+        assert window.max_correlation() == pytest.approx(np.abs(expected).max())
+    
+    @pytest.mark.asyncio
+    async def test_alert_handlers_off_loop(self, safety_manager, bot):
+        """Test a slow alert handler doesn't hold up rule checks"""
+        delivered = []
+        
+        async def slow_handler(alert):
+            await asyncio.sleep(0.05)
+            delivered.append(alert.trigger_type)
+        
+        safety_manager.add_alert_handler(slow_handler)
+        safety_manager.monitor_interval = 60
+        task = asyncio.create_task(safety_manager.start_monitoring())
+        await asyncio.sleep(0)
+        
+        rule = safety_manager.safety_rules['max_drawdown']
+        await asyncio.wait_for(
+            safety_manager._handle_safety_trigger(bot, rule, datetime.utcnow()), timeout=0.02
+        )
+        assert delivered == []
+        
+        await safety_manager.stop_monitoring()
+        await asyncio.wait_for(task, timeout=1)
+        assert delivered == [TriggerType.DRAWDOWN]
+    
+    @pytest.mark.asyncio
+    async def test_safety_status_counts(self, safety_manager, bot):
+        """Test status counters follow alerts and kill switches"""
+        safety_manager.register_bot(bot)
+        now = datetime.utcnow()
+        
+        await safety_manager._handle_safety_trigger(bot, safety_manager.safety_rules['large_position'], now)
+        await safety_manager._handle_safety_trigger(bot, safety_manager.safety_rules['max_drawdown'], now)
+        await safety_manager.manual_kill_switch('emergency_stop')
+        
+        status = safety_manager.get_safety_status()
+        assert (status['active_bots'], status['active_alerts'], status['critical_alerts']) == (1, 3, 2)
+        assert status['active_kill_switches'] == 1
+        
+        drawdown_alert = safety_manager.alerts[1]
+        assert safety_manager.acknowledge_alert(drawdown_alert.id)
+        assert safety_manager.acknowledge_alert(drawdown_alert.id)
+        assert not safety_manager.acknowledge_alert("missing")
+        await safety_manager.reset_kill_switch('emergency_stop')
+        await safety_manager.reset_kill_switch('emergency_stop')
+        
+        status = safety_manager.get_safety_status()
+        assert (status['active_alerts'], status['critical_alerts']) == (2, 1)
+        assert status['active_kill_switches'] == 0
+        
+        await safety_manager._cleanup_old_alerts(now + timedelta(days=8), time.monotonic_ns())
+        status = safety_manager.get_safety_status()
+        assert (status['active_alerts'], status['critical_alerts']) == (0, 0)
+    
+    @pytest.mark.asyncio
+    async def test_drawdown_from_running_peak(self, safety_manager, bot):
+        """Test drawdown is measured from the highest value seen"""
+        safety_manager.register_bot(bot)
+        now = datetime.utcnow()
+        
+        bot.portfolio.total_value = 12000.0
+        await safety_manager._check_bot_safety(bot, now)
+        bot.pause.assert_not_awaited()
+        
+        bot.portfolio.total_value = 10000.0
+        await safety_manager._check_bot_safety(bot, now)
+        
+        assert safety_manager.rule_state[bot.bot_id].peak_value == 12000.0
+        bot.pause.assert_awaited_once()
+        
+        # Rule stays quiet until its cooldown has passed
+        rule = safety_manager.safety_rules['max_drawdown']
+        await safety_manager._check_bot_safety(bot, now + timedelta(minutes=5))
+        bot.pause.assert_awaited_once()
+        
+        rule.last_triggered_ns -= rule.cooldown_period * 1_000_000_000
+        await safety_manager._check_bot_safety(bot, now + timedelta(minutes=5))
+        assert bot.pause.await_count == 2
 
 
 class TestPerformanceAnalytics: